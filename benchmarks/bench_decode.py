@@ -0,0 +1,75 @@
+"""
+Compares the JSON decoder backends on product, store and openBox pages.
+
+Pages of 100 items are synthesized by default; pass raw response bodies
+(e.g. saved from the API) as arguments to benchmark those instead.
+
+Run from the repository root:
+    python benchmarks/bench_decode.py [response.json ...]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bestbuy'))
+
+from decode import DECODERS  # noqa: E402
+from models import Product, Store  # noqa: E402
+
+
+def product(sku):
+    item = {key: 'value' for key in Product.attributes().values()}
+    item.update({'sku': sku, 'regularPrice': 999.99, 'salePrice': 899.99,
+                 'images': [{'rel': 'Front', 'href': 'https://example.com/a.jpg'}] * 5,
+                 'categoryPath': [{'id': 'abcat0100000', 'name': 'TV & Home Theater'}] * 3})
+    return item
+
+
+def store(store_id):
+    item = {key: 'value' for key in Store.attributes().values()}
+    item.update({'storeId': store_id, 'lat': 44.9, 'lng': -93.2,
+                 'services': [{'service': 'Geek Squad Services'}] * 10})
+    return item
+
+
+def open_box(sku):
+    return {'sku': sku, 'names': {'title': 'Open box item'},
+            'prices': {'regularPrice': 999.99, 'currentPrice': 799.99},
+            'offers': [{'condition': 'excellent', 'prices': {'currentPrice': 749.99}}] * 3}
+
+
+def payloads():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as body:
+                yield os.path.basename(path), body.read()
+        return
+    for name, key, build in (('products', 'products', product),
+                             ('stores', 'stores', store),
+                             ('openBox', 'results', open_box)):
+        page = {'totalPages': 1, key: [build(i) for i in range(100)]}
+        yield name, json.dumps(page).encode('utf-8')
+
+
+def main():
+    for name, body in payloads():
+        print('{0} ({1:.0f} KB)'.format(name, len(body) / 1024))
+        for backend, decoder in DECODERS.items():
+            try:
+                loads = decoder().loads
+            except ImportError:
+                print('  {0:>8}: not installed'.format(backend))
+                continue
+            count = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < 1:
+                loads(body)
+                count += 1
+            elapsed = time.perf_counter() - start
+            print('  {0:>8}: {1:8.1f} MB/s'.format(
+                backend, len(body) * count / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
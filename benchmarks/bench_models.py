@@ -0,0 +1,70 @@
+"""
+Measures construction time and memory of model objects.
+
+"eager" copies every field into a per-instance __dict__ the way the models
+used to; the current models are __slots__ views over the decoded JSON.
+
+Run from the repository root:
+    python benchmarks/bench_models.py [count]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bestbuy'))
+
+from models import Image, Product  # noqa: E402
+
+
+def sample_product(sku):
+    product = {key: None for key in Product.attributes().values()}
+    product.update({
+        'sku': sku, 'name': 'Product {0}'.format(sku), 'regularPrice': 999.99,
+        'salePrice': 899.99, 'onSale': True, 'customerReviewAverage': 4.5,
+        'images': [{'rel': 'Front', 'href': 'https://example.com/{0}.jpg'.format(sku)}],
+        'relatedProducts': [{'sku': sku + 1}]})
+    return product
+
+
+class EagerProduct:
+    """
+    Copies every field at construction time, like the previous Product.
+    """
+
+    _attributes = list(Product.attributes().items())
+
+    def __init__(self, json):
+        self.json = json
+        for attribute, key in self._attributes:
+            setattr(self, attribute, json.get(key, None))
+        self.images = [Image(image) for image in json.get('images', [])]
+
+
+def measure(model, payloads):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [model(payload) for payload in payloads]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    total = sum(product.salePrice for product in objects)
+    read = time.perf_counter() - start
+    assert total > 0
+    return elapsed, size, read
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payloads = [sample_product(sku) for sku in range(count)]
+    print('{0:>8} products'.format(count))
+    print('{0:>8} {1:>12} {2:>12} {3:>12}'.format('model', 'build (s)', 'memory (MB)', 'read (s)'))
+    for name, model in (('eager', EagerProduct), ('slots', Product)):
+        elapsed, size, read = measure(model, payloads)
+        print('{0:>8} {1:>12.3f} {2:>12.1f} {3:>12.3f}'.format(
+            name, elapsed, size / 1e6, read))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares the per-request cost of the pooled Transport against a new
+connection per request (the previous bare requests.get behaviour).
+
+Run from the repository root:
+    python benchmarks/bench_transport.py [requests]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bestbuy'))
+
+from client import ProductAPI  # noqa: E402
+from stub import StubServer  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+PAYLOAD = {'products': [{'sku': 5721600, 'name': 'Test Product',
+                         'regularPrice': 999.99, 'salePrice': 899.99}]}
+
+
+class UnpooledTransport(Transport):
+    """
+    Opens a fresh session (and connection) for every request.
+    """
+
+    def get(self, path, params=None, endpoint=None, priority=None):
+        with Transport(self.api_key, self.base_url, timeout=self.timeout) as t:
+            return t.get(path, params, endpoint)
+
+
+def run(transport, count):
+    api = ProductAPI(transport)
+    start = time.perf_counter()
+    for _ in range(count):
+        api.search_sku(5721600)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with StubServer(PAYLOAD) as server:
+        unpooled = run(UnpooledTransport('key', server.url), count)
+        with Transport('key', server.url) as transport:
+            pooled = run(transport, count)
+    print('requests:           {0}'.format(count))
+    print('unpooled per call:  {0:.1f} us'.format(unpooled * 1e6))
+    print('pooled per call:    {0:.1f} us'.format(pooled * 1e6))
+    print('speedup:            {0:.2f}x'.format(unpooled / pooled))
+
+
+if __name__ == '__main__':
+    main()
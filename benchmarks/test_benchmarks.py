@@ -0,0 +1,139 @@
+"""
+pytest-benchmark suite of the hot paths, running fully offline.
+
+A synthetic catalog is recorded once to a cassette through
+RecordingTransport, then every network benchmark talks to a StubServer
+replaying that cassette, so no API key or network access is needed.
+
+Run from the repository root:
+    pytest benchmarks/test_benchmarks.py --benchmark-autosave
+    pytest benchmarks/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import json
+import os
+import sys
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bestbuy'))
+
+from cache import ResponseCache  # noqa: E402
+from cassette import Cassette, RecordingTransport  # noqa: E402
+from client import BestBuy, ProductAPI  # noqa: E402
+from decode import DECODERS  # noqa: E402
+from models import Category, Image, Offer, OpenBox, Product, Recommendation, Store  # noqa: E402
+from query import Q  # noqa: E402
+from stub import StubServer  # noqa: E402
+from transport import Transport  # noqa: E402
+
+PAGES = 5
+SKUS = list(range(1000, 1000 + PAGES * 100))
+
+
+def product(sku):
+    item = {key: 'value' for key in Product.attributes().values()}
+    item.update({'sku': sku, 'regularPrice': 999.99, 'salePrice': 899.99,
+                 'images': [{'rel': 'Front', 'href': 'https://example.com/a.jpg'}] * 5,
+                 'categoryPath': [{'id': 'abcat0100000', 'name': 'TV & Home Theater'}] * 3,
+                 'relatedProducts': [{'sku': sku + 1}] * 3,
+                 'includedItemList': [{'includedItem': 'Remote'}] * 2})
+    return item
+
+
+SAMPLES = {
+    Product: product(1000),
+    Store: dict({key: 'value' for key in Store.attributes().values()},
+                services=[{'service': 'Geek Squad Services'}] * 10),
+    Category: {'id': 'abcat0100000', 'name': 'TV & Home Theater', 'active': True,
+               'path': [{'id': 'cat00000', 'name': 'Best Buy'}] * 2,
+               'subCategories': [{'id': 'abcat0101000', 'name': 'TVs'}] * 10},
+    Recommendation: {'sku': 1000, 'names': {'title': 'TV'}, 'prices': {'currentPrice': 1.0},
+                     'customerReviews': {'averageScore': 4.5, 'count': 10}},
+    OpenBox: {'sku': 1000, 'names': {'title': 'TV'}, 'prices': {'currentPrice': 1.0},
+              'offers': [{'condition': 'excellent', 'prices': {'currentPrice': 0.5}}] * 3},
+    Offer: {'condition': 'excellent', 'prices': {'currentPrice': 0.5, 'regularPrice': 1.0}},
+    Image: {'rel': 'Front', 'href': 'https://example.com/a.jpg', 'width': 100, 'height': 100},
+}
+
+
+def synthetic_catalog(path):
+    parts = urlsplit(path)
+    params = parse_qs(parts.query)
+    request = unquote(parts.path)
+    if 'sku in(' in request:
+        skus = request[request.index('sku in(') + 7:request.index(')')].split(',')
+        body = {'products': [product(int(sku)) for sku in skus]}
+    else:
+        page = int(params.get('page', ['1'])[0])
+        body = {'currentPage': page, 'totalPages': PAGES,
+                'products': [product(sku) for sku in SKUS[(page - 1) * 100:page * 100]]}
+    return 200, {'Content-Type': 'application/json'}, json.dumps(body).encode('utf-8')
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('cassettes') / 'catalog.jsonl.gz')
+    with StubServer(responder=synthetic_catalog) as live:
+        best_buy = BestBuy(RecordingTransport(path, 'key', live.url))
+        list(best_buy.ProductAPI.iter_search())
+        best_buy.ProductAPI.get_many(SKUS)
+        best_buy.close()
+    with StubServer(responder=Cassette(path)) as replay:
+        yield replay
+
+
+@pytest.fixture(scope='module')
+def page():
+    return json.dumps({'products': [product(sku) for sku in SKUS[:100]]}).encode('utf-8')
+
+
+def test_query_compile(benchmark):
+    benchmark(lambda: (Q(sku__in=SKUS[:100]) & Q(onSale=True, regularPrice__lt=500)).compile())
+
+
+def test_search_query(benchmark):
+    benchmark(ProductAPI._search_query, 'oled tv', {'onSale': True, 'manufacturer': 'LG'})
+
+
+@pytest.mark.parametrize('name', sorted(DECODERS))
+def test_decode(benchmark, page, name):
+    try:
+        decoder = DECODERS[name]()
+    except ImportError:
+        pytest.skip('{0} is not installed'.format(name))
+    benchmark(decoder.loads, page)
+
+
+@pytest.mark.parametrize('model', list(SAMPLES), ids=lambda model: model.__name__)
+def test_model_construction(benchmark, model):
+    payloads = [SAMPLES[model]] * 1000
+    attributes = list(model.attributes())
+
+    def build():
+        for item in [model(payload) for payload in payloads]:
+            for attribute in attributes:
+                getattr(item, attribute)
+
+    benchmark(build)
+
+
+def test_pagination(benchmark, server):
+    best_buy = BestBuy(Transport('key', server.url))
+    result = benchmark(lambda: sum(1 for _ in best_buy.ProductAPI.iter_search()))
+    assert result == len(SKUS)
+
+
+def test_batching(benchmark, server):
+    best_buy = BestBuy(Transport('key', server.url))
+    result = benchmark(best_buy.ProductAPI.get_many, SKUS)
+    assert None not in result
+
+
+def test_cache_hit(benchmark, server):
+    transport = Transport('key', server.url, cache=ResponseCache(ttl=3600))
+    transport.get('/v1/products', {'page': 1, 'pageSize': 100})
+    benchmark(transport.get, '/v1/products', {'page': 1, 'pageSize': 100}, 'products')
+    assert transport.cache.stats['misses'] == 1
@@ -0,0 +1,456 @@
+import asyncio
+import inspect
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from client import (
+    MAX_BATCH_SIZE,
+    _count_facets,
+    _environment_keys,
+    _path,
+    _params,
+    _show,
+    _top_facets,
+    ProductAPI,
+    StoreAPI,
+    CategoryAPI,
+    OpenBoxAPI,
+    RecommendationAPI,
+    SmartListAPI)
+from categories import CategoryTree
+from decode import get_decoder
+from exceptions import APIError
+from hooks import ON_CACHE_HIT, RequestEvent
+from query import _filter
+from ratelimit import PRIORITY_BULK, PRIORITY_DEFAULT, PRIORITY_INTERACTIVE
+from retry import RetryPolicy
+from transport import BASE_URL, Transport, _Attempts, _add_response_timings, _connects
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+_CONNECTION_ERRORS = (
+    requests.ConnectionError, requests.Timeout, asyncio.TimeoutError) + (
+    (aiohttp.ClientConnectionError,) if aiohttp is not None else ())
+
+
+async def _connect_started(session, context, params):
+    context.connect_start = time.perf_counter()
+
+
+async def _connect_ended(session, context, params):
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx['connect'] += time.perf_counter() - context.connect_start
+
+
+class AsyncTransport:
+    """
+    Asynchronous HTTP transport shared by every API class of an AsyncBestBuy client.
+
+    Uses a pooled aiohttp session when aiohttp is installed, otherwise runs the
+    pooled sync Transport on a thread pool. Each endpoint gets its own semaphore
+    so a single event loop can keep many requests in flight without one
+    endpoint starving the others.
+    """
+
+    def __init__(
+            self,
+            api_key=None,
+            base_url=BASE_URL,
+            concurrency=100,
+            pool_maxsize=100,
+            timeout=30,
+            cache=None,
+            decoder=None,
+            rate_limiter=None,
+            retry=None,
+            hooks=None,
+            key_pool=None):
+        """
+        Args:
+            api_key (str): Best Buy API key sent with every request
+            base_url (str): Scheme and host of the API (useful for local stubs)
+            concurrency (int or dict): Maximum in-flight requests per endpoint, either
+                                       one limit for all or a dict of endpoint to limit
+                                       (the None key sets the default)
+            pool_maxsize (int): Maximum number of pooled connections
+            timeout (float): Total timeout of a request in seconds
+            cache (ResponseCache): Cache consulted before sending requests
+            decoder (object or str): JSON decoder or backend name (orjson, msgspec, json),
+                                     defaults to the fastest installed backend
+            rate_limiter (RateLimiter): Limiter every network request waits on
+            retry (RetryPolicy): Retry and backoff policy, defaults to RetryPolicy()
+            hooks (Hooks): Instrumentation callbacks, None to disable instrumentation
+            key_pool (KeyPool): Keys to spread the requests over, replaces api_key
+        """
+        self.api_key = api_key
+        self.key_pool = key_pool
+        self.base_url = base_url.rstrip('/')
+        self.hooks = hooks
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.decoder = get_decoder(decoder) if decoder is None or isinstance(
+            decoder, str) else decoder
+        if not isinstance(concurrency, dict):
+            concurrency = {None: concurrency}
+        self.concurrency = concurrency
+        self._semaphores = {}
+        self._session = None
+        self._sync = None
+        self._executor = None
+
+    def _semaphore(self, endpoint):
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            limit = self.concurrency.get(endpoint, self.concurrency.get(None, 100))
+            semaphore = self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def get(
+            self,
+            path,
+            params=None,
+            endpoint=None,
+            priority=PRIORITY_DEFAULT):
+        """
+        Sends a GET request
+
+        Args:
+            path (str): Path of the resource, including the filter expression
+            params (dict): Extra query string parameters
+            endpoint (str): API endpoint the request belongs to (products, stores, ...)
+            priority (int): Rate limiter priority class of the request
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        if self.cache is None:
+            return await self._fetch(path, params, endpoint, priority)
+        key = self.cache.key(path, params)
+        value, state = self.cache.lookup(key, endpoint)
+        if state == self.cache.STALE and self.cache.begin_refresh(key):
+            asyncio.ensure_future(self._refresh(key, path, params, endpoint))
+        if state is not None:
+            if self.hooks is not None:
+                event = RequestEvent(endpoint, path, params, priority)
+                event.cache_state = state
+                self.hooks.emit(ON_CACHE_HIT, event)
+            return value
+        value = await self._fetch(path, params, endpoint, priority)
+        self.cache.store(key, value)
+        return value
+
+    async def _refresh(self, key, path, params, endpoint):
+        try:
+            self.cache.store(
+                key, await self._fetch(path, params, endpoint, PRIORITY_BULK))
+        finally:
+            self.cache.end_refresh(key)
+
+    async def _fetch(self, path, params, endpoint, priority=PRIORITY_DEFAULT):
+        attempts = _Attempts(self, path, params, endpoint, priority)
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.rate_limiter is not None:
+                waited = await loop.run_in_executor(
+                    None, self.rate_limiter.acquire, priority)
+                if attempts.event is not None:
+                    attempts.event.add_timing('wait', waited)
+            query = attempts.query
+            if self.key_pool is not None:
+                key = await loop.run_in_executor(None, self.key_pool.acquire)
+                query = dict(query, apiKey=key)
+            try:
+                async with self._semaphore(endpoint):
+                    if aiohttp is None:
+                        status, headers, content = await self._get_threaded(
+                            path, query, attempts.event)
+                    else:
+                        status, headers, content = await self._get_aiohttp(
+                            path, query, attempts.event)
+            except _CONNECTION_ERRORS as error:
+                delay = attempts.failed(error=error)
+            else:
+                if self.key_pool is not None:
+                    self.key_pool.report(key, status, headers)
+                if status < 400:
+                    return attempts.decode(status, content)
+                delay = attempts.failed(status, headers, content)
+            await asyncio.sleep(delay)
+
+    async def _get_aiohttp(self, path, query, event=None):
+        if self._session is None:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_start.append(_connect_started)
+            trace.on_connection_create_end.append(_connect_ended)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace])
+        timing = {'connect': 0.0}
+        start = time.perf_counter()
+        async with self._session.get(
+                self.base_url + path, params=query, trace_request_ctx=timing) as response:
+            headers_at = time.perf_counter()
+            content = await response.read()
+        if event is not None:
+            _add_response_timings(
+                event, time.perf_counter() - start, headers_at - start, timing['connect'])
+        return response.status, response.headers, content
+
+    async def _get_threaded(self, path, query, event=None):
+        if self._sync is None:
+            self._sync = Transport(
+                self.api_key,
+                self.base_url,
+                pool_maxsize=self.pool_maxsize,
+                timeout=self.timeout)
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_maxsize)
+        start = time.perf_counter()
+        response, connect = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._get_sync, path, query)
+        if event is not None:
+            _add_response_timings(
+                event, time.perf_counter() - start, response.elapsed.total_seconds(), connect)
+        return response.status_code, response.headers, response.content
+
+    def _get_sync(self, path, query):
+        _connects.seconds = 0.0
+        response = self._sync.session.get(
+            self.base_url + path, params=query, timeout=self.timeout)
+        return response, _connects.seconds
+
+    async def close(self):
+        """
+        Closes every pooled connection.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._sync is not None:
+            self._executor.shutdown(wait=False)
+            self._sync.close()
+            self._sync = None
+
+
+async def _async_request(
+        query,
+        category,
+        sort=None,
+        version='v1',
+        params=None,
+        transport=None,
+        priority=PRIORITY_INTERACTIVE):
+    """
+    Makes an asynchronous request to Best Buy API
+
+    Args:
+        category (str): Refers to different APIs (products, categories, stores, openBox)
+        query (str): Query for the specific APIs
+        sort (str): Sort expression, e.g. "name.asc"
+        version (str): API version prefix (v1 or beta)
+        params (dict): Extra query string parameters
+        transport (AsyncTransport): Transport to send the request with
+        priority (int): Rate limiter priority class of the request
+
+    Returns:
+        dict: JSON response of request
+    """
+    return await transport.get(
+        _path(query, category, version),
+        _params(sort, params),
+        endpoint=category,
+        priority=priority)
+
+
+class _AsyncAPI:
+    """
+    Mixin turning a sync API class into an async one.
+
+    The public methods of the sync classes only build queries and return
+    _send, so overriding _send with a coroutine makes each of them awaitable
+    while the query building and model parsing stay shared.
+    """
+
+    async def _send(
+            self,
+            query,
+            category,
+            sort=None,
+            version='v1',
+            first=False,
+            params=None,
+            fields=None,
+            as_frame=False,
+            parse=None,
+            rejected=()):
+        query = _filter(query)
+        try:
+            response = await _async_request(
+                query,
+                category,
+                sort,
+                version,
+                _show(fields, params),
+                transport=self._transport)
+        except APIError as error:
+            if error.status_code not in rejected:
+                raise
+            response = None
+        if parse is not None:
+            # parse may go on with more requests, e.g. the client-side pass of facets
+            result = parse(response)
+            return await result if inspect.isawaitable(result) else result
+        return self._parse_timed(
+            response,
+            _path(query, category, version),
+            category,
+            first,
+            fields,
+            as_frame)
+
+    async def _stream(self, query, category, sort=None, version='v1', params=None, fields=None):
+        # AsyncTransport reads bodies whole, so the page is parsed once it has arrived
+        for item in await self._send(query, category, sort, version, params=params, fields=fields):
+            yield item
+
+    async def _send_many(self, calls, combine):
+        return combine(
+            await asyncio.gather(*[self._send(**call) for call in calls]))
+
+    async def _iter(
+            self,
+            query,
+            category,
+            sort=None,
+            params=None,
+            page_size=MAX_BATCH_SIZE,
+            prefetch=2,
+            fields=None):
+        query = _filter(query)
+
+        def fetch(page):
+            return asyncio.ensure_future(_async_request(
+                query,
+                category,
+                sort,
+                'v1',
+                _show(fields, dict(params or {}, page=page, pageSize=page_size)),
+                transport=self._transport,
+                priority=PRIORITY_BULK))
+
+        response = await fetch(1)
+        total_pages = response.get('totalPages', 1)
+        next_page = 2
+        pending = deque()
+        try:
+            while True:
+                while next_page <= total_pages and len(pending) < prefetch:
+                    pending.append(fetch(next_page))
+                    next_page += 1
+                for item in self._parse_timed(
+                        response, _path(query, category), category, fields=fields):
+                    yield item
+                if pending:
+                    response = await pending.popleft()
+                elif next_page <= total_pages:
+                    response = await fetch(next_page)
+                    next_page += 1
+                else:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class AsyncProductAPI(_AsyncAPI, ProductAPI):
+
+    async def _tally(self, query, field, limit, bins, prefetch):
+        counter = Counter()
+        async for product in self._iter(
+                query, 'products', prefetch=prefetch, fields=[field.split('.')[0]]):
+            _count_facets(counter, product.json, field, bins)
+        return _top_facets(counter, limit, bins)
+
+
+class AsyncStoreAPI(_AsyncAPI, StoreAPI):
+    pass
+
+
+class AsyncCategoryAPI(_AsyncAPI, CategoryAPI):
+
+    async def load_tree(self, tree=None, prefetch=2):
+        """
+        Keeps the category hierarchy in memory, see CategoryAPI.load_tree
+        """
+        if tree is None:
+            tree = CategoryTree()
+            async for category in self.iter_all(prefetch=prefetch):
+                tree.add(category)
+        self.tree = tree
+        return tree
+
+    async def search_category_name(self, name):
+        result = CategoryAPI.search_category_name(self, name)
+        return await result if inspect.isawaitable(result) else result
+
+
+class AsyncOpenBoxAPI(_AsyncAPI, OpenBoxAPI):
+    pass
+
+
+class AsyncRecommendationAPI(_AsyncAPI, RecommendationAPI):
+    pass
+
+
+class AsyncSmartListAPI(_AsyncAPI, SmartListAPI):
+    pass
+
+
+class AsyncBestBuy:
+    """
+    Asynchronous counterpart of BestBuy, every API method returns an awaitable.
+    """
+
+    def __init__(self, transport=None, **transport_options):
+        """
+        Initializes an instance depending on the API.
+
+        Args:
+            transport (AsyncTransport): Transport shared by every API class.
+                                        A new one is created when not given.
+            **transport_options: Options passed to AsyncTransport when creating one
+                                 (api_key, key_pool, concurrency, pool_maxsize, timeout,
+                                 base_url, cache, decoder, rate_limiter, retry, hooks).
+                                 Without api_key or key_pool the keys are read from the
+                                 API_KEYS / API_KEY environment variables.
+        """
+        if transport is None:
+            if 'api_key' not in transport_options and 'key_pool' not in transport_options:
+                transport_options.update(_environment_keys())
+            transport = AsyncTransport(**transport_options)
+        self.transport = transport
+        self.ProductAPI = AsyncProductAPI(transport)
+        self.StoreAPI = AsyncStoreAPI(transport)
+        self.RecommendationAPI = AsyncRecommendationAPI(transport)
+        self.CategoryAPI = AsyncCategoryAPI(transport)
+        self.OpenBoxAPI = AsyncOpenBoxAPI(transport)
+        self.SmartListAPI = AsyncSmartListAPI(transport)
+
+    async def close(self):
+        """
+        Closes the pooled connections of the shared transport.
+        """
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
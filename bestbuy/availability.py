@@ -0,0 +1,89 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class AvailabilityMatrix:
+    """
+    Dense sku × store in-store availability.
+
+    Rows follow skus and columns follow store_ids; available[i, j] is True
+    when skus[i] can be picked up at store_ids[j]. Labels are matched as
+    strings, so 5999 and '5999' address the same row.
+    """
+
+    def __init__(self, skus, store_ids, available):
+        """
+        Args:
+            skus (list): Row labels
+            store_ids (list): Column labels
+            available (numpy.ndarray): Boolean array of shape (len(skus), len(store_ids))
+        """
+        if np is None:
+            raise ImportError('AvailabilityMatrix requires numpy')
+        self.skus = skus
+        self.store_ids = store_ids
+        self.available = available
+        self._rows = {str(sku): i for i, sku in enumerate(skus)}
+        self._columns = {str(store_id): j for j, store_id in enumerate(store_ids)}
+
+    @classmethod
+    def from_stores(cls, skus, store_ids, stocked):
+        """
+        Args:
+            skus (list): Row labels
+            store_ids (list): Column labels
+            stocked (dict): Store id (str) to the set of skus (str) available there
+
+        Returns:
+            AvailabilityMatrix: The matrix
+        """
+        if np is None:
+            raise ImportError('AvailabilityMatrix requires numpy')
+        available = np.zeros((len(skus), len(store_ids)), dtype=bool)
+        rows = {str(sku): i for i, sku in enumerate(skus)}
+        for j, store_id in enumerate(store_ids):
+            for sku in stocked.get(str(store_id), ()):
+                i = rows.get(sku)
+                if i is not None:
+                    available[i, j] = True
+        return cls(skus, store_ids, available)
+
+    def __getitem__(self, key):
+        sku, store_id = key
+        return bool(self.available[self._rows[str(sku)], self._columns[str(store_id)]])
+
+    @property
+    def shape(self):
+        return self.available.shape
+
+    def stores_for(self, sku):
+        """
+        Args:
+            sku (str): Sku to look up
+
+        Returns:
+            list: Ids of the stores the sku is available at
+        """
+        row = self.available[self._rows[str(sku)]]
+        return [self.store_ids[j] for j in np.flatnonzero(row)]
+
+    def skus_at(self, store_id):
+        """
+        Args:
+            store_id (str): Store to look up
+
+        Returns:
+            list: Skus available at the store
+        """
+        column = self.available[:, self._columns[str(store_id)]]
+        return [self.skus[i] for i in np.flatnonzero(column)]
+
+    def to_pandas(self):
+        """
+        Returns:
+            pandas.DataFrame: Boolean frame indexed by sku with one column per store
+        """
+        import pandas as pd
+        return pd.DataFrame(self.available, index=self.skus, columns=self.store_ids)
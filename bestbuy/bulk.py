@@ -0,0 +1,151 @@
+import time
+from collections import namedtuple
+from concurrent.futures import CancelledError, FIRST_COMPLETED, wait
+from exceptions import BatchError
+
+
+CallResult = namedtuple('CallResult', ['index', 'value', 'error'])
+CallResult.__doc__ = """
+Outcome of one call of a batch: index is its position in the submitted
+calls, error the exception it raised (None on success).
+"""
+
+
+def _callable(call):
+    """
+    Turns one entry of a batch into a function taking no arguments
+
+    Args:
+        call (callable or tuple): Function, or (function, *args)
+
+    Returns:
+        callable: Function running the call
+    """
+    if callable(call):
+        return call
+    function, args = call[0], call[1:]
+    return lambda: function(*args)
+
+
+class BatchResult:
+    """
+    Results of a batch in call order, with the calls that failed.
+
+    values holds None for the failed calls, errors maps their index to the
+    exception raised (CancelledError when cancelled, TimeoutError when still
+    running at the deadline).
+    """
+
+    def __init__(self, values, errors):
+        self.values = values
+        self.errors = errors
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def raise_for_errors(self):
+        """
+        Raises:
+            BatchError: At least one call failed
+        """
+        if self.errors:
+            raise BatchError(self)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+
+class Batch:
+    """
+    Calls submitted together to a BestBuy thread pool.
+
+    The timeout of results and as_completed applies to the whole batch:
+    calls not started by then are cancelled, calls still running are
+    reported as TimeoutError and their results discarded.
+    """
+
+    def __init__(self, executor, calls):
+        """
+        Args:
+            executor (Executor): Pool running the calls
+            calls (iterable): Functions, or (function, *args) tuples
+        """
+        self.futures = [executor.submit(_callable(call)) for call in calls]
+
+    def cancel(self):
+        """
+        Cancels the calls that have not started yet
+
+        Returns:
+            int: Number of calls cancelled
+        """
+        return sum(future.cancel() for future in self.futures)
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def _outcome(self, index):
+        future = self.futures[index]
+        if not future.done():
+            return CallResult(index, None, TimeoutError('Batch timed out'))
+        try:
+            return CallResult(index, future.result(), None)
+        except (CancelledError, Exception) as error:
+            return CallResult(index, None, error)
+
+    def results(self, timeout=None):
+        """
+        Waits for every call and collects the results in call order
+
+        Args:
+            timeout (float): Seconds to wait for the whole batch, None for no limit
+
+        Returns:
+            BatchResult: Values and errors of the calls
+        """
+        wait(self.futures, timeout)
+        self.cancel()
+        values = [None] * len(self.futures)
+        errors = {}
+        for index in range(len(self.futures)):
+            outcome = self._outcome(index)
+            if outcome.error is None:
+                values[index] = outcome.value
+            else:
+                errors[index] = outcome.error
+        return BatchResult(values, errors)
+
+    def as_completed(self, timeout=None):
+        """
+        Yields the outcome of each call as soon as it finishes
+
+        Args:
+            timeout (float): Seconds to wait for the whole batch, None for no limit
+
+        Returns:
+            generator: CallResult per call, in completion order
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        indexes = {future: index for index, future in enumerate(self.futures)}
+        pending = set(self.futures)
+        try:
+            while pending:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                done, pending = wait(pending, remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._outcome(indexes[future])
+                if not done:
+                    break
+            self.cancel()
+            for future in pending:
+                yield self._outcome(indexes[future])
+        finally:
+            # Stopping the iteration early abandons the calls not started yet
+            self.cancel()
@@ -0,0 +1,260 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """
+    In-process LRU store bounded by number of entries.
+    """
+
+    def __init__(self, max_entries=1024):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Normalized request key
+
+        Returns:
+            tuple or None: (stored_at, value) if present
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, stored_at, value):
+        """
+        Stores a response, evicting least recently used entries when full
+
+        Args:
+            key (str): Normalized request key
+            stored_at (float): Time the response was fetched
+            value (dict): Decoded JSON response
+
+        Returns:
+            int: Number of evicted entries
+        """
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """
+    On-disk LRU store that several worker processes can share.
+    """
+
+    def __init__(self, path, max_entries=100000, timeout=30):
+        """
+        Args:
+            path (str): Database file, created if missing
+            max_entries (int): Entries kept before the least recently used is evicted
+            timeout (float): Seconds to wait for another process holding the database lock
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, stored_at REAL, used_at REAL, value TEXT)')
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)')
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT stored_at, value FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                'UPDATE cache SET used_at = ? WHERE key = ?', (time.time(), key))
+        return row[0], json.loads(row[1])
+
+    def set(self, key, stored_at, value):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                (key, stored_at, time.time(), json.dumps(value)))
+            count = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            evicted = max(0, count - self.max_entries)
+            if evicted:
+                self._db.execute(
+                    'DELETE FROM cache WHERE key IN '
+                    '(SELECT key FROM cache ORDER BY used_at LIMIT ?)', (evicted,))
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM cache')
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Response cache used by the transports in front of the network.
+
+    Responses are keyed on the normalized request (endpoint path with its
+    filter, sort, show, page, ...) and expire after a per-endpoint TTL.
+    Expired entries younger than ttl + stale_ttl are still served while the
+    transport refreshes them in the background (stale-while-revalidate).
+
+    Any object with get/set/delete/clear methods like MemoryBackend can be
+    used as the backend.
+    """
+
+    FRESH = 'fresh'
+    STALE = 'stale'
+
+    def __init__(self, backend=None, ttl=300, ttls=None, stale_ttl=0):
+        """
+        Args:
+            backend (object): Storage backend, defaults to a MemoryBackend
+            ttl (float): Default seconds a response stays fresh
+            ttls (dict): Per-endpoint TTLs, e.g. {'categories': 86400, 'products': 60}
+            stale_ttl (float): Extra seconds an expired response may be served while refreshing
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, params=None):
+        """
+        Builds the normalized key of a request
+
+        Args:
+            path (str): Path of the resource, including the filter expression
+            params (dict): Query string parameters
+
+        Returns:
+            str: Cache key
+        """
+        if not params:
+            return path
+        return path + '?' + '&'.join(
+            '{0}={1}'.format(k, params[k]) for k in sorted(params))
+
+    def lookup(self, key, endpoint=None):
+        """
+        Looks up a cached response
+
+        Args:
+            key (str): Normalized request key
+            endpoint (str): API endpoint used to pick the TTL
+
+        Returns:
+            tuple: (value, state) where state is FRESH, STALE or None on a miss
+        """
+        entry = self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            ttl = self.ttls.get(endpoint, self.ttl)
+            if age <= ttl:
+                with self._lock:
+                    self.hits += 1
+                return entry[1], self.FRESH
+            if age <= ttl + self.stale_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                return entry[1], self.STALE
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def store(self, key, value):
+        """
+        Stores a fetched response
+
+        Args:
+            key (str): Normalized request key
+            value (dict): Decoded JSON response
+        """
+        evicted = self.backend.set(key, time.time(), value)
+        with self._lock:
+            self.evictions += evicted
+
+    def begin_refresh(self, key):
+        """
+        Claims the background refresh of a stale entry
+
+        Returns:
+            bool: False if another refresh of this key is already running
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when key is None
+        """
+        if key is None:
+            self.backend.clear()
+        else:
+            self.backend.delete(key)
+
+    @property
+    def stats(self):
+        """
+        Returns:
+            dict: Hit, stale hit, miss and eviction counters
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
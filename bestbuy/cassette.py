@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from files import atomic_write
+from transport import Transport
+
+
+# Query string parameters left out of recorded requests
+IGNORED_PARAMS = ('apiKey',)
+
+# Response headers kept in recordings
+RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+
+def request_key(path):
+    """
+    Normalizes a raw request path so recordings match regardless of
+    parameter order and API key
+
+    Args:
+        path (str): Request path including the query string
+
+    Returns:
+        str: Path with the sorted query string, without the ignored parameters
+    """
+    parts = urlsplit(path)
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in IGNORED_PARAMS)
+    if not params:
+        return parts.path
+    return '{0}?{1}'.format(parts.path, urlencode(params))
+
+
+class Cassette:
+    """
+    Recorded API responses, stored as gzip-compressed JSON lines.
+
+    A cassette is also a StubServer responder: StubServer(responder=cassette)
+    replays the recordings over HTTP, with the server's latency and error
+    injection on top. Requests recorded several times are replayed in turn.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Cassette file, loaded if it exists
+        """
+        self.path = path
+        self.interactions = OrderedDict()
+        self._positions = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    interaction = json.loads(line)
+                    self.interactions.setdefault(
+                        interaction['request'], []).append(interaction)
+
+    def record(self, path, status, headers, body):
+        """
+        Args:
+            path (str): Request path including the query string
+            status (int): HTTP status of the response
+            headers (dict): Response headers
+            body (bytes): Response body
+        """
+        interaction = {
+            'request': request_key(path),
+            'status': status,
+            'headers': {
+                key: headers[key] for key in RECORDED_HEADERS if key in headers},
+            'body': body.decode('utf-8')}
+        with self._lock:
+            self.interactions.setdefault(interaction['request'], []).append(interaction)
+
+    def play(self, path):
+        """
+        Args:
+            path (str): Request path including the query string
+
+        Returns:
+            tuple: (status, headers, body bytes), a 404 when the request was not recorded
+        """
+        key = request_key(path)
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                return 404, {'Content-Type': 'application/json'}, json.dumps(
+                    {'errorMessage': 'Not recorded: {0}'.format(key)}).encode('utf-8')
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            interaction = recorded[position % len(recorded)]
+        return (
+            interaction['status'],
+            interaction['headers'],
+            interaction['body'].encode('utf-8'))
+
+    __call__ = play
+
+    def save(self, path=None):
+        """
+        Writes the cassette, replacing the file atomically
+
+        Args:
+            path (str): Destination file, defaults to the path the cassette was opened with
+        """
+        path = path or self.path
+        with self._lock:
+            lines = [
+                json.dumps(interaction) + '\n'
+                for recorded in self.interactions.values()
+                for interaction in recorded]
+        atomic_write(path, gzip.compress(''.join(lines).encode('utf-8')))
+
+    def __len__(self):
+        return sum(len(recorded) for recorded in self.interactions.values())
+
+
+class RecordingTransport(Transport):
+    """
+    Transport writing every response it receives to a cassette.
+
+    The cassette is saved when the transport is closed. Cached responses are
+    not sent, so they are not recorded either.
+    """
+
+    def __init__(self, cassette, *args, **kwargs):
+        """
+        Args:
+            cassette (Cassette or str): Cassette, or the path of the cassette file
+            *args, **kwargs: Transport arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+
+    def _get(self, path, query, priority, event=None, stream=False):
+        response = super()._get(path, query, priority, event, stream)
+        self.cassette.record(
+            response.request.path_url,
+            response.status_code,
+            response.headers,
+            response.content)
+        return response
+
+    def close(self):
+        super().close()
+        if self.cassette.path is not None:
+            self.cassette.save()
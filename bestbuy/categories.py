@@ -0,0 +1,276 @@
+import json
+from collections import deque
+from files import atomic_write
+
+
+class CategoryNode:
+    """
+    A category of a CategoryTree, linked to its parent and children.
+    """
+
+    __slots__ = ('id', 'name', 'parent', 'children')
+
+    def __init__(self, id, name=None):
+        self.id = id
+        self.name = name
+        self.parent = None
+        self.children = []
+
+    @property
+    def depth(self):
+        depth, node = 0, self.parent
+        while node is not None:
+            depth, node = depth + 1, node.parent
+        return depth
+
+    @property
+    def path(self):
+        """
+        Returns:
+            list[CategoryNode]: Nodes from the root down to this one
+        """
+        nodes, node = [], self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        return nodes[::-1]
+
+    def __repr__(self):
+        return 'CategoryNode({0!r}, {1!r})'.format(self.id, self.name)
+
+
+class CategoryTree:
+    """
+    The category hierarchy, indexed for lookups without network calls.
+
+    Parents come from each category's path and children from its
+    subCategories, so a single crawl of the categories endpoint links the
+    whole tree. Names are indexed in a case-insensitive prefix trie.
+    """
+
+    def __init__(self, categories=()):
+        """
+        Args:
+            categories (iterable): Category objects
+        """
+        self.nodes = {}
+        self._trie = {}
+        for category in categories:
+            self.add(category)
+
+    @classmethod
+    def from_api(cls, category_api, prefetch=2):
+        """
+        Builds the tree from a crawl of every category
+
+        Args:
+            category_api (CategoryAPI): API the categories are fetched with
+            prefetch (int): Pages downloaded ahead of the tree build
+
+        Returns:
+            CategoryTree: The tree
+        """
+        return cls(category_api.iter_all(prefetch=prefetch))
+
+    def _node(self, id, name=None):
+        node = self.nodes.get(id)
+        if node is None:
+            node = self.nodes[id] = CategoryNode(id)
+        if name is not None and node.name != name:
+            if node.name is not None:
+                self._unindex(node)
+            node.name = name
+            self._index(node)
+        return node
+
+    def _link(self, parent, child):
+        if child.parent is parent:
+            return
+        if child.parent is not None:
+            child.parent.children.remove(child)
+        child.parent = parent
+        parent.children.append(child)
+
+    def add(self, category):
+        """
+        Adds a category with its path and subcategories
+
+        Args:
+            category (Category): Category as returned by CategoryAPI
+        """
+        node = self._node(category.id, category.name)
+        parent = None
+        for entry in category.path or []:
+            current = self._node(entry.get('id'), entry.get('name'))
+            if current is node:
+                break
+            if parent is not None:
+                self._link(parent, current)
+            parent = current
+        if parent is not None:
+            self._link(parent, node)
+        for entry in category.subCategories:
+            self._link(node, self._node(entry.get('id'), entry.get('name')))
+
+    def _index(self, node):
+        level = self._trie
+        for char in node.name.lower():
+            level = level.setdefault(char, {})
+        level.setdefault(None, []).append(node.id)
+
+    def _unindex(self, node):
+        level = self._trie
+        for char in node.name.lower():
+            level = level.get(char, {})
+        if node.id in level.get(None, ()):
+            level[None].remove(node.id)
+
+    def __getitem__(self, id):
+        return self.nodes[id]
+
+    def __contains__(self, id):
+        return id in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, id, default=None):
+        return self.nodes.get(id, default)
+
+    @property
+    def roots(self):
+        """
+        Returns:
+            list[CategoryNode]: Nodes without a parent
+        """
+        return [node for node in self.nodes.values() if node.parent is None]
+
+    def ancestors(self, id):
+        """
+        Args:
+            id (str): Category id
+
+        Returns:
+            list[CategoryNode]: Parent, grandparent, ... up to the root
+        """
+        return self.nodes[id].path[-2::-1]
+
+    def descendants(self, id):
+        """
+        Enumerates a subtree breadth-first, without the category itself
+
+        Args:
+            id (str): Category id
+
+        Yields:
+            CategoryNode: Every node below the category
+        """
+        queue = deque(self.nodes[id].children)
+        while queue:
+            node = queue.popleft()
+            yield node
+            queue.extend(node.children)
+
+    def lowest_common_ancestor(self, first, second):
+        """
+        Args:
+            first (str): Category id
+            second (str): Category id
+
+        Returns:
+            CategoryNode or None: Deepest category containing both, None if they
+                                  are in different trees
+        """
+        a, b = self.nodes[first], self.nodes[second]
+        depth_a, depth_b = a.depth, b.depth
+        while depth_a > depth_b:
+            a, depth_a = a.parent, depth_a - 1
+        while depth_b > depth_a:
+            b, depth_b = b.parent, depth_b - 1
+        while a is not b:
+            a, b = a.parent, b.parent
+        return a
+
+    def search_name(self, prefix):
+        """
+        Finds the categories whose name starts with a prefix, like the
+        CategoryAPI name=prefix* query but locally and case-insensitively
+
+        Args:
+            prefix (str): Start of the name
+
+        Returns:
+            list[CategoryNode]: Matching nodes sorted by name
+        """
+        level = self._trie
+        for char in prefix.lower():
+            level = level.get(char)
+            if level is None:
+                return []
+        ids, stack = [], [level]
+        while stack:
+            level = stack.pop()
+            for key, value in level.items():
+                if key is None:
+                    ids.extend(value)
+                else:
+                    stack.append(value)
+        return sorted((self.nodes[id] for id in ids), key=lambda node: (node.name, node.id))
+
+    def dumps(self):
+        """
+        Serializes the tree as rows of [id, name, parent row], parents first
+
+        Returns:
+            str: Compact JSON
+        """
+        rows, positions = [], {}
+        queue = deque(self.roots)
+        while queue:
+            node = queue.popleft()
+            positions[node.id] = len(rows)
+            rows.append([
+                node.id,
+                node.name,
+                positions[node.parent.id] if node.parent is not None else -1])
+            queue.extend(node.children)
+        return json.dumps(rows, separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Args:
+            data (str): Output of dumps
+
+        Returns:
+            CategoryTree: The tree
+        """
+        tree = cls()
+        nodes = []
+        for id, name, parent in json.loads(data):
+            node = tree._node(id, name)
+            if parent >= 0:
+                tree._link(nodes[parent], node)
+            nodes.append(node)
+        return tree
+
+    def save(self, path):
+        """
+        Writes the tree to a file, replacing it atomically
+
+        Args:
+            path (str): Destination file
+        """
+        atomic_write(path, self.dumps())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Args:
+            path (str): File written by save
+
+        Returns:
+            CategoryTree: The tree
+        """
+        with open(path) as file:
+            return cls.loads(file.read())
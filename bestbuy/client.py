@@ -1,31 +1,273 @@
 import os
-import requests
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, deque
 from models import *
+from availability import AvailabilityMatrix
+from bulk import Batch
+from categories import CategoryTree
+from coalesce import SkuCoalescer
+from exceptions import APIError
+from frame import ProductFrame
+from hooks import AFTER_PARSE, RequestEvent
+from keys import KeyPool
+from query import Q, _filter
+from ratelimit import PRIORITY_BULK, PRIORITY_INTERACTIVE
+from transport import Transport, on_worker
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-api_key = os.environ.get("API_KEY")
+def _environment_keys():
+    """
+    Reads the API key(s) from the environment when a client is created
+
+    API_KEYS (comma separated) gives a KeyPool when it holds several keys,
+    otherwise API_KEY is used.
+
+    Returns:
+        dict: Transport options, either api_key or key_pool
+    """
+    keys = [key.strip() for key in os.environ.get('API_KEYS', '').split(',') if key.strip()]
+    if len(keys) > 1:
+        return {'key_pool': KeyPool(keys)}
+    return {'api_key': keys[0] if keys else os.environ.get('API_KEY')}
+
+# Largest number of identifiers sent in one "in(...)" filter (the API's max pageSize)
+MAX_BATCH_SIZE = 100
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def _get_default_transport():
+    """
+    Returns the module-level transport used by API classes created without one
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport(**_environment_keys())
+        return _default_transport
+
+
+def _path(query, category, version='v1'):
+    """
+    Builds the resource path of a request
+
+    Args:
+        query (str): Filter expression of the request
+        category (str): API endpoint (products, stores, products/openBox, ...)
+        version (str): API version prefix
+
+    Returns:
+        str: Path relative to the API host
+    """
+    return '/{version}/{category}{query}'.format(
+        version=version, category=category, query=query)
+
+
+def _params(sort=None, params=None):
+    """
+    Merges the sort expression into the extra query string parameters
+
+    Args:
+        sort (str): Sort expression
+        params (dict): Extra query string parameters
+
+    Returns:
+        dict or None: Query string parameters of the request
+    """
+    if sort:
+        return dict(params or {}, sort=sort)
+    return params
+
+
+def _chunks(items, size=MAX_BATCH_SIZE):
+    """
+    Splits identifiers into de-duplicated chunks of at most size items
+
+    Args:
+        items (iterable): Identifiers, in input order
+        size (int): Maximum chunk size
+
+    Returns:
+        list: List of lists of identifiers as strings
+    """
+    unique = list(dict.fromkeys(str(item) for item in items))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def _unique(items):
+    """
+    Drops repeated identifiers, comparing them as strings
+
+    Args:
+        items (iterable): Identifiers, in input order
+
+    Returns:
+        list: First occurrence of each identifier
+    """
+    unique = {}
+    for item in items:
+        unique.setdefault(str(item), item)
+    return list(unique.values())
+
+
+def _show(fields, params=None):
+    """
+    Adds the show= projection of the requested fields to the query string parameters
+
+    Args:
+        fields (iterable): API fields to return, None for every field
+        params (dict): Extra query string parameters
+
+    Returns:
+        dict or None: Query string parameters of the request
+    """
+    if fields is None:
+        return params
+    return dict(params or {}, show=','.join(fields))
+
+
+def _facet_params(field, limit):
+    """
+    Builds the query string of a facet request: the counts come back in the
+    facets object, the page itself is cut down to a single sku
+
+    Args:
+        field (str): Product field to count the values of
+        limit (int): Number of values to return
+
+    Returns:
+        dict: Query string parameters of the request
+    """
+    return {'facet': '{0},{1}'.format(field, limit), 'pageSize': 1, 'show': 'sku'}
+
+
+def _facet_counts(response, field, limit):
+    """
+    Reads the server-side facet counts of a response
+
+    Args:
+        response (dict): Decoded JSON response of a facet request
+        field (str): Faceted field
+        limit (int): Number of values to return
+
+    Returns:
+        list or None: (value, count) pairs by descending count, None when the
+                      response has no facets
+    """
+    counts = (response.get('facets') or {}).get(field)
+    if counts is None:
+        return None
+    return Counter(counts).most_common(limit)
+
+
+def _field_values(item, field):
+    """
+    Reads a dotted field of a JSON object, e.g. categoryPath.name
+
+    Args:
+        item (dict): Object as returned by the API
+        field (str): Dotted path of the field, lists along the path are flattened
 
+    Returns:
+        list: Values found, without missing ones
+    """
+    values = [item]
+    for key in field.split('.'):
+        found = []
+        for value in values:
+            value = value.get(key) if isinstance(value, dict) else None
+            if isinstance(value, list):
+                found.extend(value)
+            elif value is not None:
+                found.append(value)
+        values = found
+    return values
+
+
+def _band(value, bins):
+    """
+    Labels the band of bins a numeric value falls in
+
+    Args:
+        value (float): Value to place
+        bins (list): Sorted band edges, e.g. [0, 100, 500]
 
-def _request(query, category, sort=None):
+    Returns:
+        str: Label, e.g. "100-500", "<0" or "500+"
+    """
+    index = bisect_right(bins, value)
+    if index == 0:
+        return '<{0}'.format(bins[0])
+    if index == len(bins):
+        return '{0}+'.format(bins[-1])
+    return '{0}-{1}'.format(bins[index - 1], bins[index])
+
+
+def _count_facets(counter, item, field, bins=None):
+    """
+    Adds the values of one object to client-side facet counts
+
+    Args:
+        counter (Counter): Counts to update
+        item (dict): Object as returned by the API
+        field (str): Dotted path of the faceted field
+        bins (list): Sorted band edges to group numeric values by, None to count values
+    """
+    for value in _field_values(item, field):
+        counter[_band(value, bins) if bins is not None else value] += 1
+
+
+def _top_facets(counter, limit, bins=None):
+    """
+    Returns:
+        list: (value, count) pairs, by descending count or by band when bins are given
+    """
+    if bins is None:
+        return counter.most_common(limit)
+    labels = ['<{0}'.format(bins[0])] + [
+        '{0}-{1}'.format(low, high) for low, high in zip(bins, bins[1:])] + [
+        '{0}+'.format(bins[-1])]
+    return [(label, counter[label]) for label in labels if counter[label]]
+
+
+def _request(
+        query,
+        category,
+        sort=None,
+        version='v1',
+        params=None,
+        transport=None,
+        priority=PRIORITY_INTERACTIVE):
     """
     Makes request to Best Buy API
 
     Args:
         category (str): Refers to different APIs (products, categories, stores, openBox)
         query (str): Query for the specific APIs (https://bestbuyapis.github.io/bby-query-builder/#/productSearch)
-        sort (str): None
+        sort (str): Sort expression, e.g. "name.asc"
+        version (str): API version prefix (v1 or beta)
+        params (dict): Extra query string parameters
+        transport (Transport): Pooled transport to send the request with
+        priority (int): Rate limiter priority class, bulk crawls use PRIORITY_BULK
 
     Returns:
         str: JSON response of request
 
     """
-    return requests.get(
-        'https://api.bestbuy.com/v1/{category}{query}?apiKey={key}{sort}&format=json'.format(
-            category=category, query=query, key=api_key, sort=(
-                sort if sort else ""))).json()
+    if transport is None:
+        transport = _get_default_transport()
+    return transport.get(
+        _path(query, category, version),
+        _params(sort, params),
+        endpoint=category,
+        priority=priority)
 
 
 class BestBuy:
@@ -38,47 +280,428 @@ class BestBuy:
     2. Change key to api_key
     """
 
-    def __init__(self):
+    def __init__(
+            self,
+            transport=None,
+            coalesce_window=None,
+            max_workers=None,
+            **transport_options):
         """
         Initializes an instance depending on the API.
+
+        The API classes keep no per-request state, so one instance can be
+        shared by any number of threads, including the pool of map and submit.
+
+        Args:
+            transport (Transport): Pooled transport shared by every API class.
+                                   A new one is created when not given.
+            coalesce_window (float): When set, concurrent ProductAPI.search_sku calls arriving
+                                     within this many seconds are sent as one batched request
+            max_workers (int): Threads of the pool shared by map, submit and the
+                               parallel calls, defaults to the transport's pool_maxsize
+            **transport_options: Options passed to Transport when creating one
+                                 (api_key, key_pool, pool_connections, pool_maxsize, pool_block,
+                                 timeout, base_url, cache, decoder, rate_limiter, retry, hedge,
+                                 hooks). Without api_key or key_pool the keys are read from the
+                                 API_KEYS / API_KEY environment variables.
+        """
+        if transport is None:
+            if 'api_key' not in transport_options and 'key_pool' not in transport_options:
+                transport_options.update(_environment_keys())
+            transport = Transport(max_workers=max_workers, **transport_options)
+        elif max_workers is not None:
+            transport.max_workers = max_workers
+        self.transport = transport
+        self.ProductAPI = ProductAPI(transport)
+        self.StoreAPI = StoreAPI(transport)
+        self.RecommendationAPI = RecommendationAPI(transport)
+        self.CategoryAPI = CategoryAPI(transport)
+        self.OpenBoxAPI = OpenBoxAPI(transport)
+        self.SmartListAPI = SmartListAPI(transport)
+        if coalesce_window is not None:
+            self.ProductAPI.enable_coalescing(coalesce_window)
+
+    @property
+    def max_workers(self):
+        """
+        Returns:
+            int: Threads of the pool shared by map, submit and the parallel calls
+        """
+        return self.transport.max_workers
+
+    def _get_executor(self):
+        return self.transport.executor()
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Runs one API call on the shared thread pool
+
+        Args:
+            function (callable): API method, e.g. best_buy.ProductAPI.search_sku
+            *args, **kwargs: Arguments of the call
+
+        Returns:
+            Future: Future resolved with the return value of the call
+        """
+        return self._get_executor().submit(function, *args, **kwargs)
+
+    def submit_many(self, calls):
+        """
+        Runs many API calls on the shared thread pool
+
+        Args:
+            calls (iterable): Functions taking no arguments, or (function, *args)
+                              tuples, e.g. (best_buy.StoreAPI.search_store_id, 281)
+
+        Returns:
+            Batch: Handle to collect the results in order or as completed, or cancel
+        """
+        return Batch(self._get_executor(), calls)
+
+    def map(self, calls, timeout=None):
+        """
+        Runs many API calls on the shared thread pool and waits for them
+
+        A failing call does not stop the others, its exception is reported in
+        the errors of the result instead.
+
+        Args:
+            calls (iterable): Functions taking no arguments, or (function, *args) tuples
+            timeout (float): Seconds to wait for the whole batch, None for no limit
+
+        Returns:
+            BatchResult: Return values in call order, with the errors by call index
+        """
+        return self.submit_many(calls).results(timeout)
+
+    def close(self):
+        """
+        Stops the map/submit pool and closes the pooled connections of the shared transport.
+        """
+        self.transport.close()
+
+
+class _API:
+    """
+    Base class of the API classes, holding the shared transport.
+
+    Public methods only build the query and return the result of _send, so
+    the async client can reuse them unchanged by overriding _send.
+    """
+
+    _results = None
+    _model = None
+
+    def __init__(self, transport=None):
+        """
+        Args:
+            transport (Transport): Pooled transport used for every request of this API.
+                                   Falls back to the module-level transport when None.
+        """
+        self._transport = transport
+
+    def _get_transport(self):
+        return self._transport if self._transport is not None else _get_default_transport()
+
+    def _parse(self, response, first=False, fields=None, as_frame=False):
+        """
+        Converts a decoded response to model objects
+
+        Args:
+            response (dict): Decoded JSON response
+            first (bool): Return only the first object (or None)
+            fields (iterable): Fields the response was projected to with show=
+            as_frame (bool): Return the products as a ProductFrame
+
+        Returns:
+            list or object: Model object(s), or the raw response when the API has no model
+        """
+        if self._model is None:
+            return response
+        if as_frame:
+            return ProductFrame.from_records(response.get(self._results, []))
+        if fields is None:
+            items = [self._model(item) for item in response.get(self._results, [])]
+        else:
+            fields = frozenset(fields)
+            items = [self._model(item, fields)
+                     for item in response.get(self._results, [])]
+        if first:
+            return items[0] if items else None
+        return items
+
+    def _send(
+            self,
+            query,
+            category,
+            sort=None,
+            version='v1',
+            first=False,
+            params=None,
+            fields=None,
+            as_frame=False,
+            parse=None,
+            rejected=()):
         """
+        Sends the request and parses the response
 
-        global api_key
-        self.ProductAPI = ProductAPI()
-        self.StoreAPI = StoreAPI()
-        self.RecommendationAPI = RecommendationAPI()
-        self.CategoryAPI = CategoryAPI()
-        self.OpenBoxAPI = OpenBoxAPI()
-        self.StoreAPI = StoreAPI()
+        Args:
+            query (Q or str): Filter of the request
+            category (str): API endpoint
+            sort (str): Sort expression
+            version (str): API version prefix
+            first (bool): Return only the first object (or None)
+            params (dict): Extra query string parameters
+            fields (iterable): API fields to return (show=), None for every field
+            as_frame (bool): Return the products as a ProductFrame
+            parse (callable): Function turning the decoded response into the result
+                              instead of the model objects
+            rejected (tuple): Error statuses for which parse is called with None
+                              instead of raising APIError
 
+        Returns:
+            list or object: Model object(s), or the return value of parse
+        """
+        query = _filter(query)
+        try:
+            response = _request(
+                query,
+                category,
+                sort,
+                version,
+                _show(fields, params),
+                transport=self._transport)
+        except APIError as error:
+            if error.status_code not in rejected:
+                raise
+            response = None
+        if parse is not None:
+            return parse(response)
+        return self._parse_timed(
+            response,
+            _path(query, category, version),
+            category,
+            first,
+            fields,
+            as_frame)
+
+    def _parse_timed(self, response, path, category, first=False, fields=None, as_frame=False):
+        """
+        Parses the response, reporting the parse time to the AFTER_PARSE hooks
+        of the transport when it has any
+        """
+        transport = self._get_transport()
+        hooks = getattr(transport, 'hooks', None)
+        if hooks is None:
+            return self._parse(response, first, fields, as_frame)
+        start = time.perf_counter()
+        result = self._parse(response, first, fields, as_frame)
+        event = RequestEvent(category, path)
+        event.timings['parse'] = time.perf_counter() - start
+        event.items = len(result) if isinstance(result, list) else int(result is not None)
+        hooks.emit(AFTER_PARSE, event)
+        return result
+
+    def _stream(self, query, category, sort=None, version='v1', params=None, fields=None):
+        """
+        Sends the request and yields the model objects one at a time while the
+        response body is still arriving, see Transport.stream
 
-class ProductAPI:
+        Args:
+            query (Q or str): Filter of the request
+            category (str): API endpoint
+            sort (str): Sort expression
+            version (str): API version prefix
+            params (dict): Extra query string parameters
+            fields (iterable): API fields to return (show=), None for every field
+
+        Yields:
+            object: Model objects in result order
+        """
+        transport = self._get_transport()
+        query = _filter(query)
+        items = transport.stream(
+            _path(query, category, version),
+            self._results,
+            _params(sort, _show(fields, params)),
+            endpoint=category,
+            priority=PRIORITY_INTERACTIVE)
+        fields = None if fields is None else frozenset(fields)
+        hooks = getattr(transport, 'hooks', None)
+        if hooks is None:
+            for item in items:
+                yield self._model(item, fields)
+            return
+        event = RequestEvent(category, _path(query, category, version))
+        event.items = 0
+        parse = 0.0
+        for item in items:
+            start = time.perf_counter()
+            model = self._model(item, fields)
+            parse += time.perf_counter() - start
+            event.items += 1
+            yield model
+        # items is exhausted, so Transport.stream has closed its item parser
+        event.timings['parse'] = parse
+        hooks.emit(AFTER_PARSE, event)
+
+    def _send_many(self, calls, combine):
+        """
+        Sends several requests in parallel and combines their results
 
-    def _query(self, query, sort=None):
+        Args:
+            calls (list[dict]): Keyword arguments of each _send call
+            combine (callable): Function taking the list of results in call order
+
+        Returns:
+            object: Return value of combine
+        """
+        if len(calls) <= 1 or on_worker():
+            return combine([self._send(**call) for call in calls])
+        executor = self._get_transport().executor()
+        return combine(list(executor.map(lambda call: self._send(**call), calls)))
+
+    def _iter(
+            self,
+            query,
+            category,
+            sort=None,
+            params=None,
+            page_size=MAX_BATCH_SIZE,
+            prefetch=2,
+            fields=None):
+        """
+        Streams every result of a query page by page
+
+        Reads totalPages from the first page and keeps up to prefetch following
+        pages downloading while the caller consumes the current one, so memory
+        stays bounded by prefetch + 1 pages however large the result set is.
+
+        Args:
+            query (Q or str): Filter of the request
+            category (str): API endpoint
+            sort (str): Sort expression
+            params (dict): Extra query string parameters
+            page_size (int): Results per page
+            prefetch (int): Pages downloaded ahead of the consumer
+            fields (iterable): API fields to return (show=), None for every field
+
+        Yields:
+            object: Model objects in result order
+        """
+        query = _filter(query)
+
+        def fetch(page):
+            return _request(
+                query,
+                category,
+                sort,
+                'v1',
+                _show(fields, dict(params or {}, page=page, pageSize=page_size)),
+                transport=self._transport,
+                priority=PRIORITY_BULK)
+
+        if on_worker():
+            # Waiting on prefetched pages from a thread of the shared pool
+            # could wait forever once every thread of the pool does the same
+            prefetch = 0
+        response = fetch(1)
+        total_pages = response.get('totalPages', 1)
+        next_page = 2
+        pending = deque()
+        executor = self._get_transport().executor() if prefetch else None
+        try:
+            while True:
+                while next_page <= total_pages and len(pending) < prefetch:
+                    pending.append(executor.submit(fetch, next_page))
+                    next_page += 1
+                for item in self._parse_timed(
+                        response, _path(query, category), category, fields=fields):
+                    yield item
+                if pending:
+                    response = pending.popleft().result()
+                elif next_page <= total_pages:
+                    response = fetch(next_page)
+                    next_page += 1
+                else:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class ProductAPI(_API):
+
+    _results = 'products'
+    _model = Product
+    _coalescer = None
+
+    def enable_coalescing(self, window=0.005, max_items=MAX_BATCH_SIZE):
+        """
+        Batches concurrent search_sku calls into "sku in(...)" requests
+
+        Lookups of the same sku that are already waiting or in flight share
+        one upstream request.
+
+        Args:
+            window (float): Seconds to collect lookups before sending a batch
+            max_items (int): Batch size that triggers an immediate send
+
+        Returns:
+            SkuCoalescer: The dispatcher, exposing lookup/batch/deduplication counters
+        """
+        self._coalescer = SkuCoalescer(self.get_many, window, max_items)
+        return self._coalescer
+
+    def _query(self, query, sort=None, first=False, fields=None, as_frame=False, stream=False):
         """
         Private function to call API
 
         Args:
-            query (str): Query for API
+            query (Q): Filter of the request
+            sort (str): Product attribute to sort ascending by
+            first (bool): Return only the first Product (or None)
+            fields (list[str]): Product fields to fetch, None for every field
+            as_frame (bool): Return the products as a ProductFrame
+            stream (bool): Yield the products as the response arrives instead
 
         Returns:
-            list: Either a single or list of Product object(s)
+            list: Either a single or list of Product object(s), a generator when streaming
         """
-        product_list = _request(
+        if stream:
+            return self._stream(
+                query,
+                'products',
+                '{0}.asc'.format(sort) if sort else None,
+                fields=fields)
+        return self._send(
             query,
             'products',
-            '&sort={0}.asc'.format(sort) if sort else None).get(
-            'products',
-            [])
-        return [Product(product) for product in product_list]
+            '{0}.asc'.format(sort) if sort else None,
+            first=first,
+            fields=fields,
+            as_frame=as_frame)
 
-    def search(self, keyword=None, **kwargs):
+    def search(
+            self,
+            keyword=None,
+            fields=None,
+            as_frame=False,
+            where=None,
+            stream=False,
+            **kwargs):
         """
         Search Best Buy Product catalog based on search Keyword(s) and product attributes
 
         Args:
             keyword (str): search element
-            **kwargs (str): key, value pair (product attribute, search (any))
+            fields (list[str]): Product fields to fetch (show=), None for every field
+            as_frame (bool): Return a columnar ProductFrame instead of a list
+            where (Q): Additional filter, for conditions kwargs cannot express (OR, ...)
+            stream (bool): Yield the products one at a time as the response arrives,
+                           lowering the time to the first product and peak memory
+            **kwargs (str): key, value pair (product attribute, search (any)); a Q lookup
+                            suffix picks the operator, e.g. regularPrice__lt=100
 
         Options:
             bestSellingRank: str,
@@ -107,76 +730,235 @@ class ProductAPI:
             upc: str
 
         Returns:
-            list: List of all products based on criteria
+            list: List of all products based on criteria (ProductFrame when as_frame,
+                  a generator when streaming)
         """
 
-        if not keyword:
-            keyword = ""
-        else:
-            keyword = '(search={})'.format(keyword)
-        if kwargs:
-            keyword += '&'
-            for key, value in kwargs.items():
-                keyword = '{s}{k}={v}&'.format(s=keyword, k=key, v=value)
-            keyword = '({})'.format(keyword[:-1])
-        return self._query(keyword)
+        return self._query(
+            self._search_query(keyword, kwargs, where),
+            fields=fields,
+            as_frame=as_frame,
+            stream=stream)
 
-    def search_sku(self, sku, sort=None):
+    def iter_search(
+            self,
+            keyword=None,
+            sort=None,
+            prefetch=2,
+            fields=None,
+            where=None,
+            **kwargs):
+        """
+        Streams every product matching search Keyword(s) and product attributes
+
+        Unlike search, which returns the first page only, this walks all pages
+        at the maximum page size, downloading the next pages in the background.
+
+        Args:
+            keyword (str): search element
+            sort (str): Product attribute to sort ascending by
+            prefetch (int): Pages downloaded ahead of the consumer
+            fields (list[str]): Product fields to fetch (show=), None for every field
+            where (Q): Additional filter, see search
+            **kwargs (str): key, value pair (product attribute, search (any)), see search
+
+        Yields:
+            object: Product objects
+        """
+        return self._iter(
+            self._search_query(keyword, kwargs, where),
+            'products',
+            '{0}.asc'.format(sort) if sort else None,
+            prefetch=prefetch,
+            fields=fields)
+
+    @staticmethod
+    def _search_query(keyword, kwargs, where=None):
+        query = Q(*[Q(search=word) for word in (keyword or '').split()])
+        return query & Q(**kwargs) & (where or Q())
+
+    def search_sku(self, sku, sort=None, fields=None):
         """
         Search Best Buy Product catalog based on sku
 
         Args:
             sku (str): search element
+            fields (list[str]): Product fields to fetch (show=), None for every field
 
         Returns:
             object: Singular Product object
         """
 
-        try:
-            return self._query('(sku={0})'.format(str(sku)), sort)[0]
-        except IndexError:
-            return None
+        if self._coalescer is not None and sort is None and fields is None:
+            return self._coalescer.get(sku)
+        return self._query(Q(sku=sku), sort, first=True, fields=fields)
 
-    def search_upc(self, upc, sort=None):
+    def search_upc(self, upc, sort=None, fields=None):
         """
         Search Best Buy Product catalog based on upc
 
         Args:
             upc (str): search element
+            fields (list[str]): Product fields to fetch (show=), None for every field
 
         Returns:
             object: Singular Product object
         """
 
-        try:
-            return self._query('(upc={0})'.format(str(upc)), sort)[0]
-        except IndexError:
-            return None
+        return self._query(Q(upc=upc), sort, first=True, fields=fields)
+
+    def get_many(self, skus, fields=None, as_frame=False):
+        """
+        Looks up many products by sku with batched "sku in(...)" requests
+
+        Args:
+            skus (list[str]): Skus to look up
+            fields (list[str]): Product fields to fetch (show=), sku is always added
+            as_frame (bool): Return a ProductFrame of the products found, in input order
+
+        Returns:
+            list: Product objects in input order, None for skus that were not found
+        """
+        return self._get_many('sku', skus, fields, as_frame)
+
+    def get_many_upcs(self, upcs, fields=None, as_frame=False):
+        """
+        Looks up many products by upc with batched "upc in(...)" requests
+
+        Args:
+            upcs (list[str]): Upcs to look up
+            fields (list[str]): Product fields to fetch (show=), upc is always added
+            as_frame (bool): Return a ProductFrame of the products found, in input order
 
-    def search_description(self, description, sort=None):
+        Returns:
+            list: Product objects in input order, None for upcs that were not found
+        """
+        return self._get_many('upc', upcs, fields, as_frame)
+
+    def _get_many(self, attribute, identifiers, fields=None, as_frame=False):
+        identifiers = list(identifiers)
+        if fields is not None and attribute not in fields:
+            fields = [attribute] + list(fields)
+        calls = [
+            {'query': Q(**{attribute + '__in': chunk}),
+             'category': 'products',
+             'params': {'pageSize': len(chunk)},
+             'fields': fields}
+            for chunk in _chunks(identifiers)]
+
+        def combine(results):
+            found = {}
+            for products in results:
+                for product in products:
+                    found[str(getattr(product, attribute))] = product
+            products = [found.get(str(identifier)) for identifier in identifiers]
+            if as_frame:
+                return ProductFrame.from_products(
+                    product for product in products if product is not None)
+            return products
+
+        return self._send_many(calls, combine)
+
+    def search_description(self, description, sort=None, fields=None):
         """
         Search Best Buy Product catalog based on description
 
         Args:
             description (str): search element
+            fields (list[str]): Product fields to fetch (show=), None for every field
 
         Returns:
             object: Singular Product object
         """
-        return self._query('(description={0})'.format(description), sort=None)
+        return self._query(Q(description=description), sort=None, fields=fields)
 
+    def facets(
+            self,
+            field,
+            filters=None,
+            limit=10,
+            where=None,
+            bins=None,
+            fallback=True,
+            prefetch=2):
+        """
+        Counts the products per value of a field, e.g. per manufacturer
 
-class StoreAPI:
+        Asks the API for the counts with facet= in one request whose page is
+        cut down to a single sku. When the API rejects the facet (400) or
+        answers without it, the same counts are computed client-side in one
+        streaming pass over the matching products, fetching only the field.
+        Price bands (bins) are always counted client-side, since server facets
+        return exact values.
 
-    def _query(self, query):
-        store_list = _request(
-            'v1',
-            '({0})'.format(query),
-            'stores',
-            None).get(
-            'stores',
-            [])
-        return [Store(store) for store in store_list]
+        Args:
+            field (str): Product field to count the values of, e.g. manufacturer
+                         or categoryPath.name
+            filters (dict): Product attribute filters, as the keyword arguments of search
+            limit (int): Number of values to return, the most frequent first
+            where (Q): Additional filter, see search
+            bins (list[float]): Sorted band edges to group a numeric field by,
+                                e.g. [0, 100, 500, 1000] for salePrice
+            fallback (bool): Compute the counts client-side when the API cannot
+            prefetch (int): Pages downloaded ahead during the client-side pass
+
+        Returns:
+            list: (value, count) pairs, by descending count or in band order with bins
+        """
+        query = self._search_query(None, filters or {}, where)
+        if bins is not None:
+            return self._tally(query, field, limit, bins, prefetch)
+
+        def counts(response):
+            counts = _facet_counts(response, field, limit) if response is not None else None
+            if counts is None and fallback:
+                return self._tally(query, field, limit, None, prefetch)
+            return counts or []
+
+        return self._send(
+            query,
+            'products',
+            params=_facet_params(field, limit),
+            parse=counts,
+            rejected=(400,) if fallback else ())
+
+    def _tally(self, query, field, limit, bins, prefetch):
+        """
+        Counts the values of a field client-side in one streaming pass, see facets
+        """
+        counter = Counter()
+        for product in self._iter(
+                query, 'products', prefetch=prefetch, fields=[field.split('.')[0]]):
+            _count_facets(counter, product.json, field, bins)
+        return _top_facets(counter, limit, bins)
+
+
+class StoreAPI(_API):
+
+    _results = 'stores'
+    _model = Store
+
+    def _query(self, query, store_services=(), store_type=(), first=False, stream=False):
+        """
+        Sends a store search, narrowed by store services and type
+
+        Args:
+            query (Q): Location filter of the search
+            store_services (list[str]): Services every store must provide
+            store_type (list[str]): Store types, any of which matches
+            first (bool): Return only the first Store (or None)
+            stream (bool): Yield the stores as the response arrives instead
+
+        Returns:
+            list or object: Store object(s), a generator when streaming
+        """
+        types = Q()
+        for type_ in store_type:
+            types = types | Q(storeType=type_)
+        services = Q(*[Q(**{'services.service': service}) for service in store_services])
+        if stream:
+            return self._stream(query & types & services, 'stores')
+        return self._send(query & types & services, 'stores', first=first)
 
     def search_postal_code(
             self,
@@ -200,24 +982,11 @@ class StoreAPI:
         Returns:
             list[object]: A list of Store objects matching the specified criteria.
         """
-        query = ""
-        if store_type:
-            query = query + '&('
-            for storeType in store_type:
-                query = query + "(storeType={0})|".format(storeType)
-            query = query[:-1] + ")"
-        if store_services:
-            query = query + '&('
-            for service in store_services:
-                query = query + "(services.service=\"{0}\")&".format(service)
-            query = query[:-1] + ")"
         if distance:
-            return self._query(
-                '(area({0},{1}))'.format(
-                    str(postal_code),
-                    str(distance)))
-        return self._query(
-            '(postalCode={0}){1}'.format(str(postal_code, query)))
+            query = Q.area(postal_code, distance)
+        else:
+            query = Q(postalCode=postal_code)
+        return self._query(query, store_services, store_type)
 
     def search_city(self, city, store_services=[], store_type=[]):
         """
@@ -233,18 +1002,7 @@ class StoreAPI:
         Returns:
             list[object]: A list of Store objects matching the specified criteria.
         """
-        query = ""
-        if store_type:
-            query = query + '&('
-            for storeType in store_type:
-                query = query + "(storeType={0})|".format(storeType)
-            query = query[:-1] + ")"
-        if store_services:
-            query = query + '&('
-            for service in store_services:
-                query = query + "(services.service=\"{0}\")&".format(service)
-            query = query[:-1] + ")"
-        return self._query('(city={0}){1}'.format(city, query))
+        return self._query(Q(city=city), store_services, store_type)
 
     def search_lat_long(
             self,
@@ -269,23 +1027,8 @@ class StoreAPI:
         Returns:
             list[object]: A list of Store objects matching the specified criteria.
         """
-        query = ""
-        if store_type:
-            query = query + '&('
-            for storeType in store_type:
-                query = query + "(storeType={0})|".format(storeType)
-            query = query[:-1] + ")"
-        if store_services:
-            query = query + '&('
-            for service in store_services:
-                query = query + "(services.service=\"{0}\")&".format(service)
-            query = query[:-1] + ")"
         return self._query(
-            '(area({0},{1},{2}){3}'.format(
-                str(latitude),
-                str(longitude),
-                str(distance),
-                query))
+            Q.area(latitude, longitude, distance), store_services, store_type)
 
     def search_store_id(self, store_id, store_services=[], store_type=[]):
         """
@@ -301,23 +1044,8 @@ class StoreAPI:
         Returns:
             object or None: A Store object matching the specified criteria if found, else None.
         """
-        query = ""
-        if store_type:
-            query = query + '&('
-            for storeType in store_type:
-                query = query + "(storeType={0})|".format(storeType)
-            query = query[:-1] + ")"
-        if store_services:
-            query = query + '&('
-            for service in store_services:
-                query = query + "(services.service=\"{0}\")&".format(service)
-            query = query[:-1] + ")"
-        try:
-            return self._query(
-                '(storeId={0}){1}'.format(
-                    str(store_id), query))[0]
-        except IndexError:
-            return None
+        return self._query(
+            Q(storeId=store_id), store_services, store_type, first=True)
 
     def search_region_state(
             self,
@@ -335,40 +1063,134 @@ class StoreAPI:
         Returns:
             list: List of Store objects that match the search criteria.
         """
-        query = ""
-        if store_type:
-            query = query + '&('
-            for storeType in store_type:
-                query = query + "(storeType={0})|".format(storeType)
-            query = query[:-1] + ")"
-        if store_services:
-            query = query + '&('
-            for service in store_services:
-                query = query + "(services.service=\"{0}\")&".format(service)
-            query = query[:-1] + ")"
-        return self._query('(region={0}){1}'.format(region_state), query)
+        return self._query(Q(region=region_state), store_services, store_type)
 
+    def iter_all(self, prefetch=2):
+        """
+        Streams every Best Buy store.
+
+        Args:
+            prefetch (int): Pages downloaded ahead of the consumer
 
-class CategoryAPI:
+        Yields:
+            object: Store objects
+        """
+        return self._iter('', 'stores', prefetch=prefetch)
+
+    def iter_region_state(self, region_state, prefetch=2):
+        """
+        Streams every store in a region/state.
+
+        Args:
+            region_state (str): Name of the region/state to search stores in.
+            prefetch (int): Pages downloaded ahead of the consumer
+
+        Yields:
+            object: Store objects
+        """
+        return self._iter(Q(region=region_state), 'stores', prefetch=prefetch)
+
+    def availability(self, skus, store_ids=None, postal_code=None, distance=None):
+        """
+        Builds the in-store availability of many skus at many stores.
+
+        Uses the combined stores(...)+products(sku in(...)) query, so only one
+        request per block of 100 stores × 100 skus is sent, and the blocks are
+        sent concurrently. Either store_ids or postal_code and distance select
+        the stores; area searches return at most 100 stores.
+
+        Args:
+            skus (list[str]): Skus to check
+            store_ids (list[str]): Stores to check
+            postal_code (str): Center of the area to check when store_ids is not given
+            distance (int): Radius of the area in miles
+
+        Returns:
+            AvailabilityMatrix: sku × store boolean matrix
+        """
+        if store_ids is not None:
+            store_ids = _unique(store_ids)
+            stores = [Q(storeId__in=chunk) for chunk in _chunks(store_ids)]
+        elif postal_code is not None and distance is not None:
+            stores = [Q.area(postal_code, distance)]
+        else:
+            raise ValueError('Pass store_ids, or postal_code and distance')
+        skus = _unique(skus)
+        calls = [
+            {'query': '{0}+products({1})'.format(
+                _filter(store_query), Q(sku__in=chunk).compile()),
+             'category': 'stores',
+             'params': {'pageSize': MAX_BATCH_SIZE},
+             'fields': ['storeId', 'products.sku']}
+            for store_query in stores
+            for chunk in _chunks(skus)]
+
+        def combine(results):
+            stocked = {}
+            for found in results:
+                for store in found:
+                    stocked.setdefault(str(store.storeId), set()).update(
+                        str(product.get('sku'))
+                        for product in store.json.get('products') or [])
+            columns = store_ids
+            if columns is None:
+                columns = sorted(int(store_id) for store_id in stocked)
+            return AvailabilityMatrix.from_stores(skus, columns, stocked)
+
+        return self._send_many(calls, combine)
+
+
+def _tree_category(node):
+    """
+    Builds a Category object from a node of a CategoryTree
+
+    Args:
+        node (CategoryNode): Node of the tree
+
+    Returns:
+        Category: Category holding the fields the tree knows
+    """
+    return Category(
+        {'id': node.id,
+         'name': node.name,
+         'path': [{'id': entry.id, 'name': entry.name} for entry in node.path],
+         'subCategories': [{'id': child.id, 'name': child.name} for child in node.children]},
+        fields=('id', 'name', 'path', 'subCategories'))
+
+
+class CategoryAPI(_API):
+
+    _results = 'categories'
+    _model = Category
+    tree = None
+
+    def load_tree(self, tree=None, prefetch=2):
+        """
+        Keeps the category hierarchy in memory, so search_category_name is
+        answered from its name trie instead of a name=prefix* request.
+
+        Args:
+            tree (CategoryTree): Tree to use, e.g. from CategoryTree.load, None to
+                                 crawl every category once
+            prefetch (int): Pages downloaded ahead of the tree build when crawling
+
+        Returns:
+            CategoryTree: The loaded tree
+        """
+        self.tree = tree if tree is not None else CategoryTree.from_api(self, prefetch)
+        return self.tree
 
     def _query(self, query):
-        category_list = _request(
-            'v1',
-            '{0}'.format(query),
-            'categories',
-            None).get(
-            'categories',
-            [])
         """
         Send request with the specified query to the Best Buy API and parse the returned data to a list of Category objects.
 
         Args:
-            query (str): The query to send to the Best Buy API.
+            query (Q): The filter to send to the Best Buy API.
 
         Returns:
             list: List of Category objects that match the search criteria.
         """
-        return [Category(category) for category in category_list]
+        return self._send(query, 'categories')
 
     def search_all_categories(self):
         """
@@ -379,6 +1201,18 @@ class CategoryAPI:
         """
         return self._query('')
 
+    def iter_all(self, prefetch=2):
+        """
+        Streams every Category object available from Best Buy, across all pages.
+
+        Args:
+            prefetch (int): Pages downloaded ahead of the consumer
+
+        Yields:
+            object: Category objects
+        """
+        return self._iter('', 'categories', prefetch=prefetch)
+
     def search_top_level_categories(self):
         """
         Returns a list of all top level Category objects available from Best Buy.
@@ -386,7 +1220,7 @@ class CategoryAPI:
         Returns:
             list: List of all top level Category objects available from Best Buy.
         """
-        return self._query('(id=abcat*)')
+        return self._query(Q(id__startswith='abcat'))
 
     def search_category_name(self, name):
         """
@@ -397,8 +1231,12 @@ class CategoryAPI:
 
         Returns:
             list: List of all Category objects whose names match the provided search element.
+                  With a loaded tree (see load_tree) the match is case-insensitive and the
+                  objects only hold id, name, path and subCategories.
         """
-        return self._query('(name={0}*)'.format(str(name)))
+        if self.tree is not None:
+            return [_tree_category(node) for node in self.tree.search_name(name)]
+        return self._query(Q(name__startswith=name))
 
     def search_category_id(self, id):
         """
@@ -410,20 +1248,18 @@ class CategoryAPI:
         Returns:
             list: List of all Category objects whose IDs match the provided search element.
         """
-        return self._query('(id={0})'.format(str(id)))
+        return self._query(Q(id=id))
 
 
-class OpenBoxAPI:
+class OpenBoxAPI(_API):
 
-    def _query(self, query):
-        openBox_list = _request(
-            'beta/products',
-            query,
-            'openBox',
-            None).get(
-            'results',
-            [])
-        return [OpenBox(openBox) for openBox in openBox_list]
+    _results = 'results'
+    _model = OpenBox
+
+    def _query(self, query, stream=False):
+        if stream:
+            return self._stream(query, 'products/openBox', version='beta')
+        return self._send(query, 'products/openBox', version='beta')
 
     def all_open_box_offers(self):
         """
@@ -436,10 +1272,6 @@ class OpenBoxAPI:
         return self._query('')
 
     def open_box_offers_skus(self, skus):
-        query = ""
-        for sku in skus:
-            query = str(sku) + ", "
-        query = query[:-2]
         """
         Returns OpenBox offers by a list of SKUs.
 
@@ -449,8 +1281,15 @@ class OpenBoxAPI:
         Returns:
             list: List of OpenBox objects that match the search criteria.
         """
-
-        return self._query('(sku%20%in({0}))'.format(query))
+        calls = [
+            {'query': Q(sku__in=chunk),
+             'category': 'products/openBox',
+             'version': 'beta',
+             'params': {'pageSize': len(chunk)}}
+            for chunk in _chunks(skus)]
+        return self._send_many(
+            calls,
+            lambda results: [offer for offers in results for offer in offers])
 
     def open_box_offers_category_id(self, category_id):
         """
@@ -462,21 +1301,19 @@ class OpenBoxAPI:
         Returns:
             list: List of OpenBox objects that match the search criteria.
         """
-        return self._query('(categoryId={0})'.format(str(category_id)))
+        return self._query(Q(categoryId=category_id))
+
 
+class RecommendationAPI(_API):
 
-class RecommendationAPI:
+    _results = 'results'
+    _model = Recommendation
 
     def _query(self, query, endpoint):
-        recommendation_list = _request(
-            'beta/products',
-            '{0}'.format(query),
-            endpoint,
-            None).get(
-            'results',
-            [])
-        return [Recommendation(recommendation)
-                for recommendation in recommendation_list]
+        return self._send(
+            query,
+            'products/{0}'.format(endpoint),
+            version='beta')
 
     def most_popular_category_id(self, category_id):
         """
@@ -489,10 +1326,7 @@ class RecommendationAPI:
             list: A list of Recommendation objects.
         """
 
-        return self._query(
-            '(categoryId={0})'.format(
-                str(category_id)),
-            'mostViewed')
+        return self._query(Q(categoryId=category_id), 'mostViewed')
 
     def trending_category_id(self, category_id):
         """
@@ -505,16 +1339,25 @@ class RecommendationAPI:
             list: A list of Recommendation objects.
         """
 
-        return self._query(
-            '(categoryId={0})'.format(
-                str(category_id)),
-            'trendingViewed')
+        return self._query(Q(categoryId=category_id), 'trendingViewed')
+
 
+class SmartListAPI(_API):
 
-class SmartListAPI:
-    def connected_home_smart_list():
-        return _request('beta/products', '', 'connectedHome')
+    def connected_home_smart_list(self):
+        """
+        Returns the Connected Home smart list.
 
+        Returns:
+            dict: Raw JSON response of the smart list
+        """
+        return self._send('', 'products/connectedHome', version='beta')
 
-    def active_adventurer_smart_list():
-        return _request('beta/products', '', 'activeAdventurer')
+    def active_adventurer_smart_list(self):
+        """
+        Returns the Active Adventurer smart list.
+
+        Returns:
+            dict: Raw JSON response of the smart list
+        """
+        return self._send('', 'products/activeAdventurer', version='beta')
@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import Future
+
+
+class SkuCoalescer:
+    """
+    Collects single-sku lookups from many threads and sends them as one batch.
+
+    Lookups arriving within window seconds (or until max_items are pending)
+    are fetched with a single call to fetch. A sku that is already pending or
+    in flight is not requested again, its callers share the same result.
+    """
+
+    def __init__(self, fetch, window=0.005, max_items=100):
+        """
+        Args:
+            fetch (callable): Function taking a list of skus and returning the
+                              results in the same order (e.g. ProductAPI.get_many)
+            window (float): Seconds to wait for more lookups before sending a batch
+            max_items (int): Batch size that triggers an immediate send
+        """
+        self._fetch = fetch
+        self.window = window
+        self.max_items = max_items
+        self.lookups = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._in_flight = {}
+        self._timer = None
+
+    def get(self, sku, timeout=None):
+        """
+        Looks up a single sku, blocking until its batch completes
+
+        Args:
+            sku (str): Sku to look up
+            timeout (float): Seconds to wait for the result
+
+        Returns:
+            object: Result of fetch for this sku
+        """
+        return self.submit(sku).result(timeout)
+
+    def submit(self, sku):
+        """
+        Queues a single sku lookup
+
+        Args:
+            sku (str): Sku to look up
+
+        Returns:
+            Future: Future resolved with the result of fetch for this sku
+        """
+        key = str(sku)
+        batch = None
+        with self._lock:
+            self.lookups += 1
+            future = self._pending.get(key) or self._in_flight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            future = self._pending[key] = Future()
+            if len(self._pending) >= self.max_items:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._dispatch(batch)
+        return future
+
+    def flush(self):
+        """
+        Sends every pending lookup now.
+        """
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _take(self):
+        batch = self._pending
+        self._pending = {}
+        self._in_flight.update(batch)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _dispatch(self, batch):
+        keys = list(batch)
+        self.batches += 1
+        try:
+            results = self._fetch(keys)
+        except BaseException as error:
+            self._release(keys)
+            for key in keys:
+                batch[key].set_exception(error)
+            return
+        self._release(keys)
+        for key, result in zip(keys, results):
+            batch[key].set_result(result)
+
+    def _release(self, keys):
+        with self._lock:
+            for key in keys:
+                self._in_flight.pop(key, None)
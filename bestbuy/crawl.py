@@ -0,0 +1,408 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from client import BestBuy, MAX_BATCH_SIZE, _request, _show
+from files import atomic_write
+from query import Q, _filter
+from ratelimit import FileBucketState, PRIORITY_BULK, RateLimiter
+
+
+PENDING = 'pending'
+DONE = 'done'
+
+Partition = namedtuple('Partition', ['id', 'filter'])
+Partition.__doc__ = """
+A slice of the catalog crawled as one unit: id names it in the lease table
+(and in file names), filter is its compiled product filter.
+"""
+
+Lease = namedtuple('Lease', ['id', 'filter', 'page', 'total_pages'])
+Lease.__doc__ = """
+A partition leased to a worker, with the last page checkpointed (0 when
+none) and the page count seen so far (None before the first page).
+"""
+
+
+def category_partitions(category_api, category_ids=None):
+    """
+    Partitions the catalog by category
+
+    Args:
+        category_api (CategoryAPI): API the top-level categories are read from
+        category_ids (iterable): Categories to crawl, None for every top-level one
+
+    Returns:
+        list[Partition]: One partition per category
+    """
+    if category_ids is None:
+        category_ids = [category.id for category in category_api.search_top_level_categories()]
+    return [
+        Partition('category-{0}'.format(category_id),
+                  _filter(Q(**{'categoryPath.id': category_id})))
+        for category_id in category_ids]
+
+
+def sku_partitions(start, stop, size):
+    """
+    Partitions the catalog into sku ranges
+
+    Args:
+        start (int): First sku
+        stop (int): Sku the last range ends before
+        size (int): Skus per range
+
+    Returns:
+        list[Partition]: One partition per [low, high) range
+    """
+    return [
+        Partition('sku-{0}-{1}'.format(low, min(low + size, stop)),
+                  _filter(Q(sku__gte=low, sku__lt=min(low + size, stop))))
+        for low in range(start, stop, size)]
+
+
+def date_partitions(start, end, days=1, field='itemUpdateDate'):
+    """
+    Partitions the catalog into update time windows
+
+    Args:
+        start (datetime): Start of the first window
+        end (datetime): End of the last window
+        days (float): Length of each window
+        field (str): Timestamp field the windows apply to
+
+    Returns:
+        list[Partition]: One partition per [low, high) window
+    """
+    partitions = []
+    step = timedelta(days=days)
+    low = start
+    while low < end:
+        high = min(low + step, end)
+        bounds = (low.strftime('%Y-%m-%dT%H:%M:%S'), high.strftime('%Y-%m-%dT%H:%M:%S'))
+        partitions.append(Partition(
+            'updated-{0}'.format(bounds[0].replace(':', '')),
+            _filter(Q(**{field + '__gte': bounds[0], field + '__lt': bounds[1]}))))
+        low = high
+    return partitions
+
+
+class CrawlState:
+    """
+    Lease table of a crawl, in a sqlite file shared by every worker.
+
+    A worker leases one unfinished partition at a time and must checkpoint
+    before the lease expires; partitions of a worker that died are leased
+    again once their lease runs out, resuming after the last checkpointed
+    page. Leasing runs in an immediate transaction, so workers on several
+    machines can share the file over a network file system that supports
+    sqlite locking.
+    """
+
+    def __init__(self, path, timeout=30):
+        """
+        Args:
+            path (str): Database file, created if missing
+            timeout (float): Seconds to wait for another worker holding the database lock
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS partitions ('
+            'id TEXT PRIMARY KEY, filter TEXT, status TEXT, page INTEGER, '
+            'total_pages INTEGER, items INTEGER, owner TEXT, lease_until REAL)')
+
+    def add(self, partitions):
+        """
+        Adds partitions to crawl, keeping the progress of known ones
+
+        Args:
+            partitions (iterable): Partition objects
+
+        Returns:
+            int: Number of partitions added
+        """
+        with self._db:
+            cursor = self._db.executemany(
+                'INSERT OR IGNORE INTO partitions VALUES (?, ?, ?, 0, NULL, 0, NULL, 0)',
+                [(partition.id, partition.filter, PENDING) for partition in partitions])
+        return cursor.rowcount
+
+    def lease(self, owner, duration):
+        """
+        Leases an unfinished partition that no other worker holds
+
+        Args:
+            owner (str): Worker taking the lease
+            duration (float): Seconds the lease lasts without a checkpoint
+
+        Returns:
+            Lease or None: Partition to crawl, None when every partition is done or held
+        """
+        now = time.time()
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._db.execute(
+                'SELECT id, filter, page, total_pages FROM partitions '
+                'WHERE status = ? AND (owner IS NULL OR owner = ? OR lease_until < ?) '
+                'ORDER BY owner IS NOT NULL, id LIMIT 1',
+                (PENDING, owner, now)).fetchone()
+            if row is not None:
+                self._db.execute(
+                    'UPDATE partitions SET owner = ?, lease_until = ? WHERE id = ?',
+                    (owner, now + duration, row[0]))
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        return Lease(*row) if row is not None else None
+
+    def checkpoint(self, partition_id, owner, page, total_pages, items, duration):
+        """
+        Records a crawled page and renews the lease
+
+        Args:
+            partition_id (str): Leased partition
+            owner (str): Worker holding the lease
+            page (int): Page just crawled
+            total_pages (int): Page count of the partition
+            items (int): Products on the page
+            duration (float): Seconds the renewed lease lasts
+
+        Returns:
+            bool: False when the lease was lost to another worker
+        """
+        with self._db:
+            cursor = self._db.execute(
+                'UPDATE partitions SET page = ?, total_pages = ?, items = items + ?, '
+                'lease_until = ? WHERE id = ? AND owner = ? AND page = ?',
+                (page, total_pages, items, time.time() + duration,
+                 partition_id, owner, page - 1))
+        return cursor.rowcount == 1
+
+    def complete(self, partition_id, owner):
+        """
+        Marks a leased partition as done and releases it
+        """
+        with self._db:
+            self._db.execute(
+                'UPDATE partitions SET status = ?, owner = NULL WHERE id = ? AND owner = ?',
+                (DONE, partition_id, owner))
+
+    def release(self, partition_id, owner):
+        """
+        Gives a lease back so another worker can take the partition right away
+        """
+        with self._db:
+            self._db.execute(
+                'UPDATE partitions SET owner = NULL WHERE id = ? AND owner = ?',
+                (partition_id, owner))
+
+    @property
+    def progress(self):
+        """
+        Returns:
+            dict: Partitions pending and done, pages and products crawled
+        """
+        counts = dict(self._db.execute(
+            'SELECT status, COUNT(*) FROM partitions GROUP BY status'))
+        pages, items = self._db.execute(
+            'SELECT COALESCE(SUM(page), 0), COALESCE(SUM(items), 0) FROM partitions').fetchone()
+        return {
+            PENDING: counts.get(PENDING, 0),
+            DONE: counts.get(DONE, 0),
+            'pages': pages,
+            'items': items}
+
+    def close(self):
+        self._db.close()
+
+
+class JSONLinesSink:
+    """
+    Writes each crawled page to <directory>/<partition>/<page>.jsonl.
+
+    A page crawled again after a restart replaces its file, so the output
+    holds every product once however often the crawl resumed.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Output directory, created if missing
+        """
+        self.directory = directory
+
+    def __call__(self, partition_id, page, products):
+        directory = os.path.join(self.directory, partition_id)
+        os.makedirs(directory, exist_ok=True)
+        atomic_write(
+            os.path.join(directory, '{0:06d}.jsonl'.format(page)),
+            ''.join(json.dumps(product) + '\n' for product in products))
+
+
+def _work(crawler, owner):
+    return crawler.work(owner)
+
+
+class Crawler:
+    """
+    Resumable full-catalog crawl, split into partitions that run in
+    parallel across processes or machines.
+
+    Every page is handed to sink and then checkpointed in the CrawlState, so
+    a restarted crawl resumes after the last checkpointed page of each
+    partition. A page may reach sink twice when a worker dies between the
+    two, so sink should be idempotent (JSONLinesSink is). Pages are sorted
+    by sku so page cursors stay stable while the crawl runs.
+
+    The crawler is pickled to the worker processes: sink must be picklable,
+    and each worker builds its own BestBuy client from client_options. With
+    rate set, the workers share one token bucket in a file next to the state,
+    so the total throughput stays within the key quota however many workers
+    run.
+    """
+
+    def __init__(
+            self,
+            state_path,
+            sink,
+            fields=None,
+            page_size=MAX_BATCH_SIZE,
+            lease_seconds=300,
+            rate=None,
+            daily_limit=None,
+            client_options=None):
+        """
+        Args:
+            state_path (str): sqlite file of the lease table, shared by the workers
+            sink (callable): Function taking (partition id, page, list of product dicts)
+            fields (list[str]): Product fields to fetch (show=), None for every field
+            page_size (int): Products per page
+            lease_seconds (float): Seconds a worker may go without checkpointing
+                                   before its partition is given to another one
+            rate (float): Requests per second of all workers together, None for no limit
+            daily_limit (int): Requests per UTC day of all workers together
+            client_options (dict): Keyword arguments of the BestBuy client of each worker
+        """
+        self.state_path = state_path
+        self.sink = sink
+        self.fields = fields
+        self.page_size = page_size
+        self.lease_seconds = lease_seconds
+        self.rate = rate
+        self.daily_limit = daily_limit
+        self.client_options = client_options or {}
+
+    def plan(self, partitions):
+        """
+        Adds partitions to the crawl; partitions already known keep their progress
+
+        Args:
+            partitions (iterable): Partition objects, e.g. from sku_partitions
+
+        Returns:
+            int: Number of partitions added
+        """
+        state = CrawlState(self.state_path)
+        try:
+            return state.add(partitions)
+        finally:
+            state.close()
+
+    @property
+    def progress(self):
+        """
+        Returns:
+            dict: See CrawlState.progress
+        """
+        state = CrawlState(self.state_path)
+        try:
+            return state.progress
+        finally:
+            state.close()
+
+    def _client(self):
+        options = dict(self.client_options)
+        if self.rate is not None:
+            options['rate_limiter'] = RateLimiter(
+                self.rate,
+                daily_limit=self.daily_limit,
+                state=FileBucketState(self.state_path + '.ratelimit'))
+        return BestBuy(**options)
+
+    def work(self, owner=None):
+        """
+        Crawls partitions until none is left to lease
+
+        Args:
+            owner (str): Name of this worker in the lease table, defaults to host:pid
+
+        Returns:
+            int: Number of pages crawled
+        """
+        owner = owner or '{0}:{1}'.format(socket.gethostname(), os.getpid())
+        state = CrawlState(self.state_path)
+        client = self._client()
+        pages = 0
+        try:
+            while True:
+                lease = state.lease(owner, self.lease_seconds)
+                if lease is None:
+                    return pages
+                pages += self._crawl(state, client, owner, lease)
+        finally:
+            client.close()
+            state.close()
+
+    def _crawl(self, state, client, owner, lease):
+        page, total_pages = lease.page + 1, lease.total_pages
+        pages = 0
+        try:
+            while total_pages is None or page <= total_pages:
+                response = _request(
+                    lease.filter,
+                    'products',
+                    'sku.asc',
+                    'v1',
+                    _show(self.fields, {'page': page, 'pageSize': self.page_size}),
+                    transport=client.transport,
+                    priority=PRIORITY_BULK)
+                total_pages = response.get('totalPages', 0)
+                products = response.get('products', [])
+                if products:
+                    self.sink(lease.id, page, products)
+                if not state.checkpoint(
+                        lease.id, owner, page, total_pages, len(products), self.lease_seconds):
+                    # The lease expired and another worker took the partition over
+                    return pages
+                pages += 1
+                page += 1
+        except BaseException:
+            state.release(lease.id, owner)
+            raise
+        state.complete(lease.id, owner)
+        return pages
+
+    def run(self, workers=1):
+        """
+        Crawls every planned partition with a pool of worker processes
+
+        Args:
+            workers (int): Worker processes, 1 to crawl in this process
+
+        Returns:
+            int: Number of pages crawled
+        """
+        if workers <= 1:
+            return self.work()
+        owner = '{0}:{1}'.format(socket.gethostname(), os.getpid())
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_work, self, '{0}:{1}'.format(owner, index))
+                for index in range(workers)]
+            return sum(future.result() for future in futures)
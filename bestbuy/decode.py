@@ -0,0 +1,245 @@
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class JSONDecoder:
+    """
+    Standard library decoder, always available.
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        """
+        Args:
+            data (bytes): Raw response body
+
+        Returns:
+            object: Decoded JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonDecoder:
+    """
+    Decoder backed by orjson.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonDecoder requires orjson')
+        self.loads = orjson.loads
+
+
+class MsgspecDecoder:
+    """
+    Decoder backed by msgspec.
+    """
+
+    name = 'msgspec'
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError('MsgspecDecoder requires msgspec')
+        self.loads = msgspec.json.Decoder().decode
+
+
+DECODERS = {
+    'orjson': OrjsonDecoder,
+    'msgspec': MsgspecDecoder,
+    'json': JSONDecoder,
+}
+
+
+def get_decoder(name=None):
+    """
+    Returns a JSON decoder
+
+    Args:
+        name (str): orjson, msgspec or json. When None the fastest installed
+                    backend is used, falling back to the standard library.
+
+    Returns:
+        object: Decoder with a loads(bytes) method
+    """
+    if name is not None:
+        return DECODERS[name]()
+    for decoder in DECODERS.values():
+        try:
+            return decoder()
+        except ImportError:
+            continue
+
+
+# Whitespace and separators between the tokens the item parser decodes
+_SEPARATORS = re.compile(r'[\s,:]*')
+
+_START, _KEY, _VALUE, _ARRAY, _ITEMS, _DONE = range(6)
+
+
+class ArrayItemParser:
+    """
+    Incremental parser yielding the items of one top-level array of a JSON
+    object, e.g. the products of a page, while the body is still arriving.
+
+    Every other top-level value and each item are decoded whole with
+    json.JSONDecoder.raw_decode as soon as they are complete in the buffer,
+    so memory holds one item and one chunk rather than the whole body.
+    """
+
+    name = 'json'
+
+    def __init__(self, key):
+        """
+        Args:
+            key (str): Top-level field holding the array, e.g. products
+        """
+        self.key = key
+        self._json = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = _START
+
+    def feed(self, data):
+        """
+        Args:
+            data (bytes): Next chunk of the response body
+
+        Returns:
+            list: Items completed by this chunk
+        """
+        buffer = self._buffer + self._text.decode(data)
+        position = 0
+        items = []
+        while self._state != _DONE:
+            position = _SEPARATORS.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self._state == _START:
+                if char != '{':
+                    raise ValueError('Expected a JSON object at the start of the body')
+                self._state = _KEY
+                position += 1
+                continue
+            if self._state == _KEY and char == '}':
+                self._state = _DONE
+                position += 1
+                continue
+            if self._state == _ARRAY and char == '[':
+                self._state = _ITEMS
+                position += 1
+                continue
+            if self._state == _ITEMS and char == ']':
+                self._state = _KEY
+                position += 1
+                continue
+            try:
+                value, end = self._json.raw_decode(buffer, position)
+            except ValueError:
+                # Incomplete, wait for the next chunk
+                break
+            if not isinstance(value, (dict, list, str)) and (
+                    end == len(buffer) or buffer[end] in '.eE+-'):
+                # A number or literal may continue in the next chunk, e.g. "12." + "5"
+                break
+            position = end
+            if self._state == _KEY:
+                self._state = _ARRAY if value == self.key else _VALUE
+            elif self._state == _ITEMS:
+                items.append(value)
+            else:
+                self._state = _KEY
+        self._buffer = buffer[position:]
+        return items
+
+    def close(self):
+        """
+        Raises:
+            ValueError: The body ended before the JSON object was complete
+        """
+        if self._state != _DONE:
+            raise ValueError('Truncated JSON body')
+
+
+class IjsonItemParser:
+    """
+    Item parser backed by ijson's push interface.
+    """
+
+    name = 'ijson'
+
+    def __init__(self, key):
+        """
+        Args:
+            key (str): Top-level field holding the array, e.g. products
+        """
+        if ijson is None:
+            raise ImportError('IjsonItemParser requires ijson')
+        self.key = key
+        self._items = []
+        self._coroutine = ijson.items_coro(self._items, key + '.item', use_float=True)
+
+    def feed(self, data):
+        """
+        Args:
+            data (bytes): Next chunk of the response body
+
+        Returns:
+            list: Items completed by this chunk
+        """
+        self._coroutine.send(data)
+        items = self._items[:]
+        del self._items[:]
+        return items
+
+    def close(self):
+        try:
+            self._coroutine.close()
+        except ijson.IncompleteJSONError as error:
+            raise ValueError('Truncated JSON body') from error
+
+
+ITEM_PARSERS = {
+    'ijson': IjsonItemParser,
+    'json': ArrayItemParser,
+}
+
+
+def get_item_parser(key, name=None):
+    """
+    Returns an incremental parser of a top-level array
+
+    Args:
+        key (str): Top-level field holding the array, e.g. products
+        name (str): ijson or json. When None ijson is used if installed,
+                    falling back to the standard library.
+
+    Returns:
+        object: Parser with feed(bytes) returning the completed items, and close()
+    """
+    if name is not None:
+        return ITEM_PARSERS[name](key)
+    for parser in ITEM_PARSERS.values():
+        try:
+            return parser(key)
+        except ImportError:
+            continue
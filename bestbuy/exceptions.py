@@ -0,0 +1,62 @@
+class BestBuyError(Exception):
+    """
+    Base class of the errors raised by this package.
+    """
+
+
+class FieldNotFetchedError(BestBuyError, AttributeError):
+    """
+    Raised when reading a model attribute whose field was left out of the
+    fields= projection of the request.
+    """
+
+    def __init__(self, attribute, field):
+        """
+        Args:
+            attribute (str): Attribute that was read
+            field (str): API field backing the attribute
+        """
+        super().__init__(
+            "'{0}' was not fetched, add '{1}' to fields= to request it".format(
+                attribute, field))
+        self.attribute = attribute
+        self.field = field
+
+
+class QuotaExceededError(BestBuyError):
+    """
+    Raised by the rate limiter when the daily request budget is used up.
+    """
+
+
+class APIError(BestBuyError):
+    """
+    Raised when the API answers with an error status that is not (or no longer) retried.
+    """
+
+    def __init__(self, status_code, message, response=None):
+        """
+        Args:
+            status_code (int): HTTP status of the response
+            message (str): Error message returned by the API, or the raw body
+            response (object): The HTTP response
+        """
+        super().__init__('{0}: {1}'.format(status_code, message))
+        self.status_code = status_code
+        self.message = message
+        self.response = response
+
+
+class BatchError(BestBuyError):
+    """
+    Raised by BatchResult.raise_for_errors when calls of a bulk batch failed.
+    """
+
+    def __init__(self, result):
+        """
+        Args:
+            result (BatchResult): Results of the batch, with the errors by call index
+        """
+        super().__init__('{0} of {1} calls failed'.format(len(result.errors), len(result)))
+        self.result = result
+        self.errors = result.errors
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+
+def atomic_write(path, data):
+    """
+    Writes a file atomically: the data goes to a temporary file in the same
+    directory, which then replaces path, so readers see either the old or the
+    new content, never a partial write. The temporary file is removed when
+    the write fails.
+
+    Args:
+        path (str): Destination file
+        data (str or bytes): Content of the file
+    """
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
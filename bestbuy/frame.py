@@ -0,0 +1,225 @@
+import sys
+from models import Product
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+NUMERIC_FIELDS = (
+    'sku',
+    'regularPrice',
+    'salePrice',
+    'dollarSavings',
+    'percentSavings',
+    'customerReviewAverage',
+    'customerReviewCount',
+    'bestSellingRank',
+    'salesRankShortTerm',
+    'salesRankMediumTerm',
+    'salesRankLongTerm',
+)
+
+STRING_FIELDS = (
+    'name',
+    'manufacturer',
+    'modelNumber',
+    'upc',
+    'type',
+    'url',
+)
+
+
+def _number(value):
+    if value is None or value == '':
+        return np.nan
+    return float(value)
+
+
+def _string(value):
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+class ProductFrame:
+    """
+    Columnar view of many products.
+
+    Numeric fields are stored as float64 NumPy arrays (missing values are NaN)
+    and string fields as object arrays of interned strings, so filters, sorts
+    and top-k selections run vectorized instead of attribute by attribute.
+    Indexing with an integer still returns a Product.
+    """
+
+    def __init__(self, columns, records=None):
+        """
+        Args:
+            columns (dict): Field name to equally long NumPy array
+            records (list[dict]): Source JSON of each row, used to build Product rows
+        """
+        if np is None:
+            raise ImportError('ProductFrame requires numpy')
+        self.columns = columns
+        self.records = records
+
+    @classmethod
+    def from_records(cls, records, numeric=NUMERIC_FIELDS, strings=STRING_FIELDS):
+        """
+        Builds a frame from decoded product JSON
+
+        Args:
+            records (list[dict]): Products as returned by the Products API
+            numeric (iterable): Fields stored as float64 columns
+            strings (iterable): Fields stored as interned string columns
+
+        Returns:
+            ProductFrame: Frame with one row per record
+        """
+        if np is None:
+            raise ImportError('ProductFrame requires numpy')
+        records = list(records)
+        columns = {}
+        for field in numeric:
+            columns[field] = np.fromiter(
+                (_number(record.get(field)) for record in records),
+                dtype=np.float64,
+                count=len(records))
+        for field in strings:
+            column = np.empty(len(records), dtype=object)
+            column[:] = [_string(record.get(field)) for record in records]
+            columns[field] = column
+        return cls(columns, records)
+
+    @classmethod
+    def from_products(cls, products, numeric=NUMERIC_FIELDS, strings=STRING_FIELDS):
+        """
+        Builds a frame from Product objects
+
+        Args:
+            products (iterable): Product objects
+            numeric (iterable): Fields stored as float64 columns
+            strings (iterable): Fields stored as interned string columns
+
+        Returns:
+            ProductFrame: Frame with one row per product
+        """
+        return cls.from_records(
+            (product.json for product in products), numeric, strings)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0 if self.records is None else len(self.records)
+
+    def __getitem__(self, key):
+        """
+        Args:
+            key (str, int, slice or array): Column name, row position, or row selection
+
+        Returns:
+            ndarray, Product or ProductFrame: Column, row or selected rows
+        """
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, (int, np.integer)):
+            if self.records is not None:
+                return Product(self.records[key])
+            return Product({
+                name: _value(column[key]) for name, column in self.columns.items()})
+        return self.take(key)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def take(self, index):
+        """
+        Selects rows
+
+        Args:
+            index (slice, int array or bool mask): Rows to keep
+
+        Returns:
+            ProductFrame: Frame with the selected rows
+        """
+        columns = {name: column[index] for name, column in self.columns.items()}
+        records = None
+        if self.records is not None:
+            positions = np.arange(len(self.records))[index]
+            records = [self.records[position] for position in positions]
+        return ProductFrame(columns, records)
+
+    def filter(self, mask):
+        """
+        Keeps the rows where mask is true, e.g. frame.filter(frame['percentSavings'] > 20)
+
+        Args:
+            mask (ndarray): Boolean array as long as the frame
+
+        Returns:
+            ProductFrame: Frame with the matching rows
+        """
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def sort(self, by, descending=False):
+        """
+        Sorts rows by a numeric column, NaN last
+
+        Args:
+            by (str): Column to sort by
+            descending (bool): Largest values first
+
+        Returns:
+            ProductFrame: Sorted frame
+        """
+        column = self.columns[by]
+        order = np.argsort(-column if descending else column, kind='stable')
+        return self.take(order)
+
+    def top_k(self, by, k, largest=True):
+        """
+        Selects the k rows with the largest (or smallest) values of a numeric column
+
+        Args:
+            by (str): Column to rank by
+            k (int): Number of rows to keep
+            largest (bool): Keep the largest values instead of the smallest
+
+        Returns:
+            ProductFrame: The k rows, sorted
+        """
+        column = self.columns[by]
+        keys = np.where(np.isnan(column), np.inf, -column if largest else column)
+        k = min(k, len(keys))
+        if k <= 0:
+            return self.take(slice(0, 0))
+        index = np.argpartition(keys, k - 1)[:k]
+        return self.take(index[np.argsort(keys[index], kind='stable')])
+
+    def to_pandas(self):
+        """
+        Returns:
+            pandas.DataFrame: DataFrame sharing the numeric column buffers
+        """
+        import pandas
+        return pandas.DataFrame(self.columns, copy=False)
+
+    def to_arrow(self):
+        """
+        Returns:
+            pyarrow.Table: Table whose numeric columns wrap the NumPy buffers
+        """
+        import pyarrow
+        return pyarrow.table({
+            name: pyarrow.array(column, from_pandas=column.dtype == object)
+            for name, column in self.columns.items()})
+
+
+def _value(value):
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,274 @@
+import heapq
+import json
+import math
+from files import atomic_write
+from models import Store
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """
+    Great-circle distance between two points
+
+    Args:
+        latitude1 (float): Latitude of the first point in degrees
+        longitude1 (float): Longitude of the first point in degrees
+        latitude2 (float): Latitude of the second point in degrees
+        longitude2 (float): Longitude of the second point in degrees
+
+    Returns:
+        float: Distance in kilometers
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2)
+         * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit(latitude, longitude):
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord(distance):
+    """
+    Straight-line distance on the unit sphere of a great-circle distance in km
+    """
+    return 2 * math.sin(min(math.pi, distance / EARTH_RADIUS_KM) / 2)
+
+
+class StoreIndex:
+    """
+    In-memory spatial index of the stores, answering nearest and radius
+    queries without network calls.
+
+    Store positions are kept as unit vectors in a KD-tree: the straight-line
+    distance between two unit vectors grows with their great-circle distance,
+    so nearest neighbours in the tree are nearest on the globe and subtrees
+    can be pruned exactly. Distances are reported with haversine.
+    """
+
+    def __init__(self, stores=()):
+        """
+        Args:
+            stores (iterable): Store objects, stores without coordinates are skipped
+        """
+        self._stores = {}
+        self._build()
+        self.update(stores)
+
+    @classmethod
+    def from_api(cls, store_api, prefetch=2):
+        """
+        Builds the index from a full crawl of the stores endpoint
+
+        Args:
+            store_api (StoreAPI): API the stores are fetched with
+            prefetch (int): Pages downloaded ahead of the index build
+
+        Returns:
+            StoreIndex: The index
+        """
+        return cls(store_api.iter_all(prefetch=prefetch))
+
+    def update(self, stores):
+        """
+        Adds or replaces stores, keyed on storeId
+
+        Args:
+            stores (iterable): Store objects
+
+        Returns:
+            int: Number of stores added or changed
+        """
+        changed = 0
+        for store in stores:
+            if store.latitude is None or store.longitude is None:
+                continue
+            old = self._stores.get(store.storeId)
+            if old is None or old.json != store.json:
+                self._stores[store.storeId] = store
+                changed += 1
+        if changed:
+            self._build()
+        return changed
+
+    def remove(self, store_ids):
+        """
+        Args:
+            store_ids (iterable): Ids of the stores to drop
+
+        Returns:
+            int: Number of stores removed
+        """
+        removed = sum(
+            self._stores.pop(store_id, None) is not None for store_id in store_ids)
+        if removed:
+            self._build()
+        return removed
+
+    def refresh(self, store_api, prefetch=2):
+        """
+        Re-crawls the stores, applying new, changed and closed stores
+
+        Args:
+            store_api (StoreAPI): API the stores are fetched with
+            prefetch (int): Pages downloaded ahead of the update
+
+        Returns:
+            tuple: Number of stores added or changed, number of stores removed
+        """
+        stores = list(store_api.iter_all(prefetch=prefetch))
+        current = set(store.storeId for store in stores)
+        removed = self.remove(
+            [store_id for store_id in self._stores if store_id not in current])
+        return self.update(stores), removed
+
+    def _build(self):
+        self._ids = list(self._stores)
+        self._points = [
+            _unit(self._stores[store_id].latitude, self._stores[store_id].longitude)
+            for store_id in self._ids]
+        self._order = list(range(len(self._ids)))
+        self._split(0, len(self._order), 0)
+
+    def _split(self, lo, hi, depth):
+        if hi - lo <= 1:
+            return
+        axis = depth % 3
+        self._order[lo:hi] = sorted(
+            self._order[lo:hi], key=lambda i: self._points[i][axis])
+        mid = (lo + hi) // 2
+        self._split(lo, mid, depth + 1)
+        self._split(mid + 1, hi, depth + 1)
+
+    def _search(self, lo, hi, depth, target, visit, bound):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        i = self._order[mid]
+        point = self._points[i]
+        visit(i, sum((a - b) ** 2 for a, b in zip(point, target)))
+        diff = target[depth % 3] - point[depth % 3]
+        if diff < 0:
+            near, far = (lo, mid), (mid + 1, hi)
+        else:
+            near, far = (mid + 1, hi), (lo, mid)
+        self._search(near[0], near[1], depth + 1, target, visit, bound)
+        if diff * diff <= bound():
+            self._search(far[0], far[1], depth + 1, target, visit, bound)
+
+    @staticmethod
+    def _matcher(store_services, store_type):
+        services = frozenset(store_services or ())
+        types = frozenset(store_type or ())
+
+        def matches(store):
+            if types and store.storeType not in types:
+                return False
+            return not services or services.issubset(store.services)
+
+        return matches
+
+    def _results(self, hits, latitude, longitude):
+        stores = [self._stores[self._ids[i]] for i in hits]
+        return sorted(
+            ((store, haversine(latitude, longitude, store.latitude, store.longitude))
+             for store in stores),
+            key=lambda result: result[1])
+
+    def nearest(self, latitude, longitude, k=1, store_services=(), store_type=()):
+        """
+        Finds the stores closest to a location
+
+        Args:
+            latitude (float): Latitude of the location
+            longitude (float): Longitude of the location
+            k (int): Number of stores to return
+            store_services (list[str]): Services every store must provide
+            store_type (list[str]): Store types, any of which matches
+
+        Returns:
+            list[tuple]: (Store, distance in km) pairs, closest first
+        """
+        if not self._stores or k <= 0:
+            return []
+        matches = self._matcher(store_services, store_type)
+        heap = []
+
+        def visit(i, distance):
+            if len(heap) == k and -heap[0][0] <= distance:
+                return
+            if not matches(self._stores[self._ids[i]]):
+                return
+            if len(heap) == k:
+                heapq.heapreplace(heap, (-distance, i))
+            else:
+                heapq.heappush(heap, (-distance, i))
+
+        def bound():
+            return -heap[0][0] if len(heap) == k else float('inf')
+
+        self._search(
+            0, len(self._order), 0, _unit(latitude, longitude), visit, bound)
+        return self._results([i for _, i in heap], latitude, longitude)
+
+    def within(self, latitude, longitude, distance, store_services=(), store_type=()):
+        """
+        Finds the stores within a distance of a location
+
+        Args:
+            latitude (float): Latitude of the location
+            longitude (float): Longitude of the location
+            distance (float): Radius in kilometers
+            store_services (list[str]): Services every store must provide
+            store_type (list[str]): Store types, any of which matches
+
+        Returns:
+            list[tuple]: (Store, distance in km) pairs, closest first
+        """
+        if not self._stores:
+            return []
+        matches = self._matcher(store_services, store_type)
+        # Slack for float rounding, the exact check is done with haversine below
+        radius = _chord(distance) ** 2 + 1e-12
+        hits = []
+
+        def visit(i, chord):
+            if chord <= radius and matches(self._stores[self._ids[i]]):
+                hits.append(i)
+
+        self._search(
+            0, len(self._order), 0, _unit(latitude, longitude), visit, lambda: radius)
+        return [result for result in self._results(hits, latitude, longitude)
+                if result[1] <= distance]
+
+    def save(self, path):
+        """
+        Writes the indexed stores to a file, replacing it atomically
+
+        Args:
+            path (str): Destination file
+        """
+        atomic_write(path, json.dumps([store.json for store in self._stores.values()]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Args:
+            path (str): File written by save
+
+        Returns:
+            StoreIndex: The index
+        """
+        with open(path) as file:
+            return cls(Store(store) for store in json.load(file))
+
+    def __len__(self):
+        return len(self._stores)
+
+    def __contains__(self, store_id):
+        return store_id in self._stores
@@ -0,0 +1,250 @@
+import re
+import time
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+BEFORE_REQUEST = 'before_request'
+AFTER_RESPONSE = 'after_response'
+ON_RETRY = 'on_retry'
+ON_CACHE_HIT = 'on_cache_hit'
+AFTER_PARSE = 'after_parse'
+
+EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, ON_RETRY, ON_CACHE_HIT, AFTER_PARSE)
+
+_VALUES = re.compile(r'(!=|>=|<=|=|>|<)("[^"]*"|[^&|()]*)')
+_LISTS = re.compile(r'\b(in|area)\([^)]*\)')
+
+
+def query_template(path):
+    """
+    Replaces the values of a request path's filter with ?, so requests of
+    the same shape share one label
+
+    Args:
+        path (str): Request path, e.g. /v1/products(sku in(1,2)&onSale=true)
+
+    Returns:
+        str: Template, e.g. /v1/products(sku in(?)&onSale=?)
+    """
+    return _VALUES.sub(r'\1?', _LISTS.sub(r'\1(?)', path))
+
+
+class RequestEvent:
+    """
+    What the hooks receive about one request.
+
+    timings holds the seconds spent per phase: wait (rate limiter), connect
+    (DNS lookup, TCP connect and TLS handshake of a new pooled connection, 0
+    on a reused one), ttfb (server time, until the response headers),
+    download, decode, backoff (sleeping between retries) and total;
+    AFTER_PARSE events carry parse (model construction) instead, streamed
+    responses included. Adapters may keep per-request data
+    in context between BEFORE_REQUEST and AFTER_RESPONSE.
+    """
+
+    __slots__ = (
+        'endpoint',
+        'path',
+        'params',
+        'priority',
+        'attempt',
+        'status',
+        'error',
+        'request_bytes',
+        'response_bytes',
+        'items',
+        'cache_state',
+        'timings',
+        'context',
+        '_start',
+        '_template')
+
+    def __init__(self, endpoint, path, params=None, priority=None):
+        self.endpoint = endpoint
+        self.path = path
+        self.params = params
+        self.priority = priority
+        self.attempt = 0
+        self.status = None
+        self.error = None
+        self.request_bytes = len(path)
+        self.response_bytes = 0
+        self.items = None
+        self.cache_state = None
+        self.timings = {}
+        self.context = {}
+        self._start = time.perf_counter()
+        self._template = None
+
+    @property
+    def template(self):
+        """
+        Returns:
+            str: Request path with the filter values replaced by ?
+        """
+        if self._template is None:
+            self._template = query_template(self.path)
+        return self._template
+
+    def add_timing(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def finish(self, status=None, response_bytes=0, error=None):
+        """
+        Records the outcome of the request and its total time
+        """
+        self.status = status
+        self.response_bytes = response_bytes
+        self.error = error
+        self.timings['total'] = time.perf_counter() - self._start
+
+
+class Hooks:
+    """
+    Callbacks notified about requests: BEFORE_REQUEST, AFTER_RESPONSE
+    (also after a final failure, with error set), ON_RETRY, ON_CACHE_HIT and
+    AFTER_PARSE. Each callback receives a RequestEvent.
+
+    Transports created without hooks skip all of this, so instrumentation
+    costs nothing when it is not used.
+    """
+
+    def __init__(self, **callbacks):
+        """
+        Args:
+            **callbacks: Event name to a callback, e.g. after_response=print
+        """
+        self._callbacks = {event: [] for event in EVENTS}
+        for event, callback in callbacks.items():
+            self.add(event, callback)
+
+    def add(self, event, callback):
+        """
+        Args:
+            event (str): One of EVENTS
+            callback (callable): Function taking a RequestEvent
+        """
+        if event not in self._callbacks:
+            raise ValueError('Unknown event: {0}'.format(event))
+        self._callbacks[event].append(callback)
+
+    def remove(self, event, callback):
+        self._callbacks[event].remove(callback)
+
+    def emit(self, event, request_event):
+        for callback in self._callbacks[event]:
+            callback(request_event)
+
+
+class PrometheusHooks:
+    """
+    Exports request metrics with prometheus_client:
+
+        bestbuy_requests_total{endpoint, status}
+        bestbuy_retries_total{endpoint}
+        bestbuy_cache_hits_total{endpoint, state}
+        bestbuy_request_seconds{endpoint, phase}   (histogram)
+        bestbuy_response_bytes{endpoint}           (histogram)
+    """
+
+    def __init__(self, hooks, registry=None, prefix='bestbuy'):
+        """
+        Args:
+            hooks (Hooks): Hooks the metrics are collected from
+            registry (CollectorRegistry): Registry of the metrics, defaults to the global one
+            prefix (str): Metric name prefix
+        """
+        if prometheus_client is None:
+            raise ImportError('PrometheusHooks requires prometheus_client')
+        options = {'registry': registry} if registry is not None else {}
+        self.requests = prometheus_client.Counter(
+            prefix + '_requests', 'Best Buy API requests', ['endpoint', 'status'], **options)
+        self.retries = prometheus_client.Counter(
+            prefix + '_retries', 'Best Buy API retries', ['endpoint'], **options)
+        self.cache_hits = prometheus_client.Counter(
+            prefix + '_cache_hits', 'Responses served from the cache',
+            ['endpoint', 'state'], **options)
+        self.seconds = prometheus_client.Histogram(
+            prefix + '_request_seconds', 'Time per request phase',
+            ['endpoint', 'phase'], **options)
+        self.bytes = prometheus_client.Histogram(
+            prefix + '_response_bytes', 'Response body size', ['endpoint'],
+            buckets=(1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6), **options)
+        hooks.add(AFTER_RESPONSE, self.after_response)
+        hooks.add(ON_RETRY, self.on_retry)
+        hooks.add(ON_CACHE_HIT, self.on_cache_hit)
+        hooks.add(AFTER_PARSE, self.after_parse)
+
+    def after_response(self, event):
+        status = str(event.status) if event.status is not None else 'error'
+        self.requests.labels(event.endpoint, status).inc()
+        for phase, seconds in event.timings.items():
+            self.seconds.labels(event.endpoint, phase).observe(seconds)
+        self.bytes.labels(event.endpoint).observe(event.response_bytes)
+
+    def on_retry(self, event):
+        self.retries.labels(event.endpoint).inc()
+
+    def on_cache_hit(self, event):
+        self.cache_hits.labels(event.endpoint, event.cache_state).inc()
+
+    def after_parse(self, event):
+        self.seconds.labels(event.endpoint, 'parse').observe(event.timings['parse'])
+
+
+class OpenTelemetryHooks:
+    """
+    Records every request as an OpenTelemetry client span, with the phase
+    timings, sizes and retries as attributes.
+    """
+
+    def __init__(self, hooks, tracer=None):
+        """
+        Args:
+            hooks (Hooks): Hooks the spans are created from
+            tracer (Tracer): Tracer to use, defaults to one from the global provider
+        """
+        if otel_trace is None:
+            raise ImportError('OpenTelemetryHooks requires opentelemetry-api')
+        self.tracer = tracer if tracer is not None else otel_trace.get_tracer('bestbuy')
+        hooks.add(BEFORE_REQUEST, self.before_request)
+        hooks.add(ON_RETRY, self.on_retry)
+        hooks.add(AFTER_RESPONSE, self.after_response)
+
+    def before_request(self, event):
+        event.context['span'] = self.tracer.start_span(
+            'bestbuy {0}'.format(event.endpoint),
+            kind=otel_trace.SpanKind.CLIENT,
+            attributes={
+                'bestbuy.endpoint': event.endpoint or '',
+                'bestbuy.query_template': event.template})
+
+    def on_retry(self, event):
+        span = event.context.get('span')
+        if span is not None:
+            span.add_event('retry', {
+                'attempt': event.attempt,
+                'status': event.status or 0})
+
+    def after_response(self, event):
+        span = event.context.pop('span', None)
+        if span is None:
+            return
+        if event.status is not None:
+            span.set_attribute('http.status_code', event.status)
+        span.set_attribute('http.response_content_length', event.response_bytes)
+        for phase, seconds in event.timings.items():
+            span.set_attribute('bestbuy.seconds.{0}'.format(phase), seconds)
+        if event.error is not None:
+            span.record_exception(event.error)
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        span.end()
@@ -0,0 +1,151 @@
+import threading
+import time
+from exceptions import QuotaExceededError
+from ratelimit import MemoryBucketState, _today
+from retry import _parse_retry_after
+
+
+# Statuses meaning the key itself is throttled or over quota
+THROTTLED_STATUSES = (403, 429)
+
+
+class _Key:
+
+    __slots__ = (
+        'key',
+        'rate',
+        'capacity',
+        'daily_limit',
+        'state',
+        'cooling_until',
+        'requests',
+        'errors',
+        'throttled')
+
+    def __init__(self, key, rate, capacity, daily_limit):
+        self.key = key
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.daily_limit = daily_limit
+        self.state = MemoryBucketState()
+        self.cooling_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def remaining(self):
+        if self.daily_limit is None:
+            return float('inf')
+        if self.state.day != _today():
+            return self.daily_limit
+        return self.daily_limit - self.state.used_today
+
+
+class KeyPool:
+    """
+    Several API keys used as one, each with its own QPS and daily budget.
+
+    Every request takes a token from the key with the most daily budget left
+    that has one available, so the aggregate throughput grows with the
+    number of keys. A key answered with 403 or 429 is cooled down for the
+    Retry-After delay (or cooldown seconds) while the others keep serving.
+    """
+
+    def __init__(self, keys, rate=5, capacity=None, daily_limit=50000, cooldown=60):
+        """
+        Args:
+            keys (iterable): API keys, either strings or dicts with a "key" and
+                             optional "rate", "capacity" and "daily_limit" overriding
+                             the defaults below
+            rate (float): Requests per second of each key
+            capacity (float): Burst size of each key, defaults to rate
+            daily_limit (int): Requests per UTC day of each key, None for no limit
+            cooldown (float): Seconds a throttled key is left out when the response
+                              has no Retry-After header
+        """
+        self.cooldown = cooldown
+        self._keys = []
+        for key in keys:
+            options = key if isinstance(key, dict) else {'key': key}
+            self._keys.append(_Key(
+                options['key'],
+                options.get('rate', rate),
+                options.get('capacity', capacity),
+                options.get('daily_limit', daily_limit)))
+        if not self._keys:
+            raise ValueError('KeyPool needs at least one key')
+        self._by_key = {key.key: key for key in self._keys}
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def acquire(self):
+        """
+        Blocks until one of the keys may send a request
+
+        Returns:
+            str: The key to send the request with
+
+        Raises:
+            QuotaExceededError: Every key used up its daily budget
+        """
+        with self._condition:
+            while True:
+                now = time.time()
+                usable = [key for key in self._keys if key.remaining() > 0]
+                if not usable:
+                    raise QuotaExceededError(
+                        'Daily limit of all {0} keys reached'.format(len(self._keys)))
+                ready = [key for key in usable if key.cooling_until <= now]
+                if not ready:
+                    self._condition.wait(
+                        min(key.cooling_until for key in usable) - now)
+                    continue
+                ready.sort(key=lambda key: key.remaining(), reverse=True)
+                waits = []
+                for key in ready:
+                    wait = key.state.take(key.rate, key.capacity, key.daily_limit, now)
+                    if not wait:
+                        key.requests += 1
+                        return key.key
+                    waits.append(wait)
+                self._condition.wait(min(waits))
+
+    def report(self, key, status, headers=None):
+        """
+        Records the outcome of a request, cooling the key down when throttled
+
+        Args:
+            key (str): Key the request was sent with
+            status (int): HTTP status of the response
+            headers (dict): Response headers, for Retry-After
+        """
+        with self._condition:
+            entry = self._by_key[key]
+            if status in THROTTLED_STATUSES:
+                entry.throttled += 1
+                delay = _parse_retry_after((headers or {}).get('Retry-After'))
+                entry.cooling_until = time.time() + (
+                    delay if delay is not None else self.cooldown)
+                self._condition.notify_all()
+            elif status >= 400:
+                entry.errors += 1
+
+    @property
+    def stats(self):
+        """
+        Returns:
+            dict: Key to requests, errors, throttled responses, daily budget left
+                  and cooling (seconds until usable again)
+        """
+        now = time.time()
+        with self._condition:
+            return {
+                key.key: {
+                    'requests': key.requests,
+                    'errors': key.errors,
+                    'throttled': key.throttled,
+                    'remaining_today': key.remaining(),
+                    'cooling': max(0.0, key.cooling_until - now)}
+                for key in self._keys}
@@ -0,0 +1,258 @@
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+from models import Product
+from query import Q
+
+
+# Update timestamps the mirror keeps a watermark of, oldest changes first
+WATERMARK_FIELDS = ('itemUpdateDate', 'priceUpdateDate', 'onlineAvailabilityUpdateDate')
+
+# Fields the change detection reads, always fetched
+TRACKED_FIELDS = ('sku', 'regularPrice', 'salePrice', 'onlineAvailability') + WATERMARK_FIELDS
+
+NEW = 'new'
+PRICE_DROP = 'price_drop'
+PRICE_INCREASE = 'price_increase'
+BACK_IN_STOCK = 'back_in_stock'
+OUT_OF_STOCK = 'out_of_stock'
+
+ChangeEvent = namedtuple('ChangeEvent', ['type', 'sku', 'old', 'new'])
+ChangeEvent.__doc__ = """
+A change of a mirrored product: type is one of NEW, PRICE_DROP,
+PRICE_INCREASE, BACK_IN_STOCK and OUT_OF_STOCK, old and new are the
+Product before and after the sync (old is None for NEW).
+"""
+
+
+def _changes(old, new):
+    """
+    Args:
+        old (dict): Stored product JSON, None if the product is new
+        new (dict): Fetched product JSON
+
+    Returns:
+        list[str]: Event types of the change
+    """
+    if old is None:
+        return [NEW]
+    types = []
+    old_price, new_price = old.get('salePrice'), new.get('salePrice')
+    if old_price is not None and new_price is not None:
+        if new_price < old_price:
+            types.append(PRICE_DROP)
+        elif new_price > old_price:
+            types.append(PRICE_INCREASE)
+    old_available, new_available = old.get('onlineAvailability'), new.get('onlineAvailability')
+    if not old_available and new_available:
+        types.append(BACK_IN_STOCK)
+    elif old_available and new_available is False:
+        types.append(OUT_OF_STOCK)
+    return types
+
+
+class CatalogMirror:
+    """
+    Local sqlite copy of the product catalog, kept current incrementally.
+
+    bulk_load copies the products once; sync then only fetches products whose
+    itemUpdateDate, priceUpdateDate or onlineAvailabilityUpdateDate is newer
+    than the latest one seen, and reports what changed as ChangeEvents.
+    Lookups are served from the local database.
+    """
+
+    def __init__(self, product_api, path=':memory:', fields=None, timeout=30):
+        """
+        Args:
+            product_api (ProductAPI): API the products are fetched with
+            path (str): Database file, created if missing
+            fields (list[str]): Product fields to mirror, None for every field.
+                                TRACKED_FIELDS are always added.
+            timeout (float): Seconds to wait for another process holding the database lock
+        """
+        self.product_api = product_api
+        self.path = path
+        self.fields = None
+        if fields is not None:
+            self.fields = list(TRACKED_FIELDS) + [
+                field for field in fields if field not in TRACKED_FIELDS]
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS products (sku TEXT PRIMARY KEY, json TEXT)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS watermarks (field TEXT PRIMARY KEY, value TEXT)')
+
+    def subscribe(self, callback, types=None):
+        """
+        Registers a callback called with each ChangeEvent found by sync
+
+        Args:
+            callback (callable): Function taking a ChangeEvent
+            types (iterable): Event types to receive, None for every type
+        """
+        self._subscribers.append(
+            (callback, frozenset(types) if types is not None else None))
+
+    @property
+    def watermarks(self):
+        """
+        Returns:
+            dict: Watermark field to the latest timestamp mirrored
+        """
+        with self._lock:
+            return dict(self._db.execute('SELECT field, value FROM watermarks'))
+
+    def bulk_load(self, prefetch=4, **kwargs):
+        """
+        Copies every matching product into the mirror
+
+        Args:
+            prefetch (int): Pages downloaded ahead of the database writes
+            **kwargs: Product filters, see ProductAPI.search (e.g. categoryPath.id)
+
+        Returns:
+            int: Number of products loaded
+        """
+        return self._apply(
+            self.product_api.iter_search(
+                sort='sku', prefetch=prefetch, fields=self.fields, **kwargs),
+            emit=False)[0]
+
+    def sync(self, prefetch=2, **kwargs):
+        """
+        Fetches the products updated since the watermarks and stores them
+
+        Products updated exactly at a watermark are fetched again, so updates
+        landing in the same second as the previous sync are not missed; they
+        only produce events if something actually changed.
+
+        Args:
+            prefetch (int): Pages downloaded ahead of the database writes
+            **kwargs: Product filters, normally the ones given to bulk_load
+
+        Returns:
+            list[ChangeEvent]: Changes found, also sent to the subscribers
+        """
+        watermarks = self.watermarks
+        where = Q()
+        for field in WATERMARK_FIELDS:
+            if field in watermarks:
+                where = where | Q(**{field + '__gte': watermarks[field]})
+        if not where:
+            return []
+        events = self._apply(
+            self.product_api.iter_search(
+                sort='sku', prefetch=prefetch, fields=self.fields, where=where, **kwargs))[1]
+        for event in events:
+            for callback, types in self._subscribers:
+                if types is None or event.type in types:
+                    callback(event)
+        return events
+
+    def _apply(self, products, emit=True, batch_size=500):
+        events = []
+        latest = {}
+        batch = []
+
+        def flush():
+            with self._lock:
+                self._db.execute('BEGIN')
+                try:
+                    for product in batch:
+                        sku = str(product.json['sku'])
+                        if emit:
+                            row = self._db.execute(
+                                'SELECT json FROM products WHERE sku = ?', (sku,)).fetchone()
+                            old = json.loads(row[0]) if row is not None else None
+                            for type_ in _changes(old, product.json):
+                                events.append(ChangeEvent(
+                                    type_,
+                                    sku,
+                                    Product(old, product.fields) if old is not None else None,
+                                    product))
+                        self._db.execute(
+                            'INSERT OR REPLACE INTO products VALUES (?, ?)',
+                            (sku, json.dumps(product.json)))
+                    self._db.execute('COMMIT')
+                except BaseException:
+                    self._db.execute('ROLLBACK')
+                    raise
+            del batch[:]
+
+        count = 0
+        for product in products:
+            batch.append(product)
+            for field in WATERMARK_FIELDS:
+                value = product.json.get(field)
+                if value is not None and value > latest.get(field, ''):
+                    latest[field] = value
+            if len(batch) >= batch_size:
+                count += len(batch)
+                flush()
+        count += len(batch)
+        flush()
+        # Pages are not ordered by update date, so the watermarks only move
+        # once every page is stored; a pass failing halfway is fetched again
+        with self._lock:
+            with self._db:
+                for field, value in latest.items():
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO watermarks VALUES (?, MAX(?, COALESCE('
+                        '(SELECT value FROM watermarks WHERE field = ?), \'\')))',
+                        (field, value, field))
+        return count, events
+
+    def search_sku(self, sku):
+        """
+        Looks up a mirrored product by sku
+
+        Args:
+            sku (str): Sku to look up
+
+        Returns:
+            object: Product object, None if the sku is not mirrored
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT json FROM products WHERE sku = ?', (str(sku),)).fetchone()
+        if row is None:
+            return None
+        return Product(json.loads(row[0]), self._projection())
+
+    def get_many(self, skus):
+        """
+        Looks up many mirrored products by sku
+
+        Args:
+            skus (list[str]): Skus to look up
+
+        Returns:
+            list: Product objects in input order, None for skus that are not mirrored
+        """
+        skus = [str(sku) for sku in skus]
+        found = {}
+        with self._lock:
+            for i in range(0, len(skus), 500):
+                chunk = skus[i:i + 500]
+                found.update(self._db.execute(
+                    'SELECT sku, json FROM products WHERE sku IN ({0})'.format(
+                        ','.join('?' * len(chunk))), chunk))
+        fields = self._projection()
+        return [Product(json.loads(found[sku]), fields) if sku in found else None
+                for sku in skus]
+
+    def _projection(self):
+        return frozenset(self.fields) if self.fields is not None else None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+    def close(self):
+        self._db.close()
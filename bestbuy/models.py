@@ -1,331 +1,387 @@
 '''
 https://bestbuyapis.github.io/api-documentation/
 Provides description of each of the differenty categories for the Best Buy API
+
+Models are thin views over the decoded JSON: attributes are descriptors that
+read from the underlying dict on access, and instances use __slots__, so
+building one costs a single object no matter how many fields the payload has.
 '''
+from exceptions import FieldNotFetchedError
 
 
-class Image:
+class _Field:
+    """
+    Descriptor reading a model attribute from the underlying JSON on access.
+    """
 
-    def __init__(self, json) -> str:
-        self.json = json
-        self.rel = json.get('rel', None)
-        self.unitOfMeasure = json.get('unitOfMeasure', None)
-        self.width = json.get('width', None)
-        self.height = json.get('height', None)
-        self.href = json.get('href', None)
-        self.primary = json.get('primary', None)
-
-
-class Product:
-
-    def __init__(self, json) -> str:
-        self.relatedProductsSKUs = []
-        self.categoryPath = []
-        self.alternateCategories = []
-        self.lists = []
-        self.buybackPlans = []
-        self.protectionPlans = []
-        self.protectionPlanDetails = []
-        self.productFamilies = []
-        self.productVariations = []
-        self.members = []
-        self.bundledIn = []
-        self.includedItemList = []
-        self.images = []
-        self.json = json
-        self.sku = json.get('sku', None)
-        self.score = json.get('score', None)
-        self.productId = json.get('productId', None)
-        self.name = json.get('name', None)
-        self.source = json.get('source', None)
-        self.type = json.get('type', None)
-        self.startDate = json.get('startDate', None)
-        self.new = json.get('new', None)
-        self.active = json.get('active', None)
-        self.lowPriceGuarantee = json.get('lowPriceGuarantee', None)
-        self.active_Update_Date = json.get('activeUpdateDate', None)
-        self.regularPrice = json.get('regularPrice', None)
-        self.salePrice = json.get('salePrice', None)
-        self.clearance = json.get('clearance', None)
-        self.onSale = json.get('onSale', None)
-        self.planPrice = json.get('planPrice', None)
-        self.priceWithPlan = json.get('priceWithPlan', None)
-        self.contracts = json.get('contracts', None)
-        self.priceRestriction = json.get('priceRestriction', None)
-        self.priceUpdateDate = json.get('priceUpdateDate', None)
-        self.digital = json.get('digital', None)
-        self.preowned = json.get('preowned', None)
-        self.carriers = json.get('carriers', None)
-        self.planFeatures = json.get('planFeatures', None)
-        self.devices = json.get('devices', None)
-        self.carrierPlans = json.get('carrierPlans', None)
-        self.technologyCode = json.get('technologyCode', None)
-        self.carrierModelNumber = json.get('carrierModelNumber', None)
-        self.earlyTerminationFees = json.get('earlyTerminationFees', None)
-        self.monthlyRecurringCharge = json.get('monthlyRecurringCharge', None)
-        self.monthlyRecurringChargeGrandTotal = json.get(
-            'monthlyRecurringChargeGrandTotal', None)
-        self.activationCharge = json.get('activationCharge', None)
-        self.minutePrice = json.get('minutePrice', None)
-        self.planCategory = json.get('planCategory', None)
-        self.planType = json.get('planType', None)
-        self.familyIndividualCode = json.get('familyIndividualCode', None)
-        self.validFrom = json.get('validFrom', None)
-        self.validUntil = json.get('validUntil', None)
-        self.carrierPlan = json.get('carrierModelNumber', None)
-        self.outletCenter = json.get('outletCenter', None)
-        self.secondaryMarket = json.get('secondaryMarket', None)
-        self.frequentlyPurchasedWith = json.get(
-            'frequentlyPurchasedWith', None)
-        self.accessories = json.get('accessories', None)
-        for item in json.get('relatedProducts', []):
-            self.relatedProductsSKUs.append(item.get('sku', None))
-        self.requiredParts = json.get('requiredParts', None)
-        self.techSupportPlans = json.get('techSupportPlans', None)
-        self.crossSell = json.get('crossSell', None)
-        self.salesRankShortTerm = json.get('salesRankShortTerm', None)
-        self.salesRankMediumTerm = json.get('salesRankMediumTerm', None)
-        self.salesRankLongTerm = json.get('salesRankLongTerm', None)
-        self.bestSellingRank = json.get('bestSellingRank', None)
-        self.url = json.get('url', None)
-        self.spin360Url = json.get('spin360Url', None)
-        self.mobileUrl = json.get('mobileUrl', None)
-        self.affiliateUrl = json.get('affiliateUrl', None)
-        self.addToCartUrl = json.get('addToCartUrl', None)
-        self.affiliateAddToCartUrl = json.get('affiliateAddToCartUrl', None)
-        self.linkShareAffiliateUrl = json.get('linkShareAffiliateUrl', None)
-        self.linkShareAffiliateAddToCartUrl = json.get(
-            'linkShareAffiliateAddToCartUrl', None)
-        self.upc = json.get('upc', None)
-        self.productTemplate = json.get('productTemplate', None)
-        self.categoryPath = json.get('categoryPath', None)
-        self.alternateCategories = json.get('alternateCategories', None)
-        self.lists = json.get('lists', None)
-        self.customerReviewCount = json.get('customerReviewCount', None)
-        self.customerReviewAverage = json.get('customerReviewAverage', None)
-        self.customerTopRated = json.get('customerTopRated', None)
-        self.format = json.get('format', None)
-        self.freeShipping = json.get('freeShipping', None)
-        self.freeShippingEligible = json.get('freeShippingEligible', None)
-        self.inStoreAvailability = json.get('inStoreAvailability', None)
-        self.inStoreAvailabilityText = json.get(
-            'inStoreAvailabilityText', None)
-        self.inStoreAvailabilityUpdateDate = json.get(
-            'inStoreAvailabilityUpdateDate', None)
-        self.itemUpdateDate = json.get('itemUpdateDate', None)
-        self.onlineAvailability = json.get('onlineAvailability', None)
-        self.onlineAvailabilityText = json.get('onlineAvailabilityText', None)
-        self.onlineAvailabilityUpdateDate = json.get(
-            'onlineAvailabilityUpdateDate', None)
-        self.releaseDate = json.get('releaseDate', None)
-        self.shippingCost = json.get('shippingCost', None)
-        self.shipping = json.get('shipping', None)
-        self.shippingLevelsOfService = json.get(
-            'shippingLevelsOfService', None)
-        self.specialOrder = json.get('specialOrder', None)
-        self.shortDescription = json.get('shortDescription', None)
-        self.longDescription = json.get('longDescription', None)
-        self.itemClass = json.get('class', None)
-        self.itemClassId = json.get('classId', None)
-        self.itemSubclass = json.get('subclass', None)
-        self.itemSubclassId = json.get('subclassId', None)
-        self.department = json.get('department', None)
-        self.departmentId = json.get('departmentId', None)
-        self.protectionPlanTerm = json.get('protectionPlanTerm', None)
-        self.protectionPlanType = json.get('protectionPlanType', None)
-        self.protectionPlanLowPrice = json.get('protectionPlanLowPrice', None)
-        self.protectionPlanHighPrice = json.get(
-            'protectionPlanHighPrice', None)
-        self.buybackPlans = json.get('buybackPlans', None)
-        self.protectionPlans = json.get('protectionPlans', None)
-        self.protectionPlanDetails = json.get('protectionPlanDetails', None)
-        self.productFamilies = json.get('productFamilies', None)
-        self.productVariations = json.get('productVariations', None)
-        self.aspectRatio = json.get('aspectRatio', None)
-        self.screenFormat = json.get('screenFormat', None)
-        self.lengthInMinutes = json.get('lengthInMinutes', None)
-        self.mpaaRating = json.get('mpaaRating', None)
-        self.plot = json.get('plot', None)
-        self.studio = json.get('studio', None)
-        self.theatricalReleaseDate = json.get('theatricalReleaseDate', None)
-        self.description = json.get('description', None)
-        self.manufacturer = json.get('manufacturer', None)
-        self.modelNumber = json.get('modelNumber', None)
-        for image in json.get('images', []):
-            self.images.append(Image(image))
-        self.image = json.get('image', None)
-        self.largeFrontImage = json.get('largeFrontImage', None)
-        self.mediumImage = json.get('mediumImage', None)
-        self.thumbnailImage = json.get('thumbnailImage', None)
-        self.largeImage = json.get('largeImage', None)
-        self.alternateViewsImage = json.get('alternateViewsImage', None)
-        self.angleImage = json.get('angleImage', None)
-        self.backViewImage = json.get('backViewImage', None)
-        self.energyGuideImage = json.get('energyGuideImage', None)
-        self.leftViewImage = json.get('leftViewImage', None)
-        self.accessoriesImage = json.get('accessoriesImage', None)
-        self.remoteControlImage = json.get('remoteControlImage', None)
-        self.rightViewImage = json.get('rightViewImage', None)
-        self.topViewImage = json.get('topViewImage', None)
-        self.albumTitle = json.get('albumTitle', None)
-        self.artistName = json.get('artistName', None)
-        self.artistId = json.get('artistId', None)
-        self.originalReleaseDate = json.get('originalReleaseDate', None)
-        self.parentalAdvisory = json.get('parentalAdvisory', None)
-        self.mediaCount = json.get('mediaCount', None)
-        self.monoStereo = json.get('monoStereo', None)
-        self.studioLive = json.get('studioLive', None)
-        self.condition = json.get('condition', None)
-        self.inStorePickup = json.get('inStorePickup', None)
-        self.friendsAndFamilyPickup = json.get('friendsAndFamilyPickup', None)
-        self.homeDelivery = json.get('homeDelivery', None)
-        self.quantityLimit = json.get('quantityLimit', None)
-        self.fulfilledBy = json.get('fulfilledBy', None)
-        self.members = json.get('members', None)
-        self.bundledIn = json.get('bundledIn', None)
-        self.albumLabel = json.get('albumLabel', None)
-        self.genre = json.get('genre', None)
-        self.color = json.get('color', None)
-        self.depth = json.get('depth', None)
-        self.dollarSavings = json.get('dollarSavings', None)
-        self.percentSavings = json.get('percentSavings', None)
-        self.tradeInValue = json.get('tradeInValue', None)
-        self.height = json.get('height', None)
-        self.orderable = json.get('orderable', None)
-        self.weight = json.get('weight', None)
-        self.shippingWeight = json.get('shippingWeight', None)
-        self.width = json.get('width', None)
-        self.warrantyLabor = json.get('warrantyLabor', None)
-        self.warrantyParts = json.get('warrantyParts', None)
-        self.softwareAge = json.get('softwareAge', None)
-        self.softwareGrade = json.get('softwareGrade', None)
-        self.platform = json.get('platform', None)
-        self.numberOfPlayers = json.get('numberOfPlayers', None)
-        self.softwareNumberOfPlayers = json.get(
-            'softwareNumberOfPlayers', None)
-        self.esrbRating = json.get('esrbRating', None)
-        for it in json.get('includedItemList', []):
-            self.includedItemList.append(it.get('includedItem', None))
-        self.marketplace = json.get('marketplace', None)
-        self.listingId = json.get('listingId', None)
-        self.sellerId = json.get('sellerId', None)
-        self.shippingRestrictions = json.get('shippingRestrictions', None)
-        self.proposition65WarningMessage = json.get(
-            'proposition65WarningMessage', None)
-        self.proposition65WarningType = json.get(
-            'proposition65WarningType', None)
-        self.coaxialDigitalAudioOutputs = json.get(
-            'coaxialDigitalAudioOutputs', None)
-        self.componentVideoOutputs = json.get('componentVideoOutputs', None)
-        self.compositeVideoOutputs = json.get('compositeVideoOutputs', None)
-        self.energyStarQualified = json.get('energyStarQualified', None)
-        self.hdmiOutputs = json.get('hdmiOutputs', None)
-        self.maximumOutputResolution = json.get(
-            'maximumOutputResolution', None)
-        self.mediaCardSlot = json.get('mediaCardSlot', None)
-        self.numberOfCoaxialDigitalAudioOutputs = json.get(
-            'numberOfCoaxialDigitalAudioOutputs', None)
-        self.numberOfOpticalDigitalAudioOutputs = json.get(
-            'numberOfOpticalDigitalAudioOutputs', None)
-        self.opticalDigitalAudioOutputs = json.get(
-            'opticalDigitalAudioOutputs', None)
-        self.playerType = json.get('playerType', None)
-        self.smartCapable = json.get('smartCapable', None)
-        self.usbPort = json.get('usbPort', None)
-
-
-class Category:
-
-    def __init__(self, json) -> str:
-        self.json = json
-        self.id = json.get('id', None)
-        self.name = json.get('name', None)
-        self.active = json.get('active', None)
-        self.url = json.get('url', None)
-        self.path = json.get('path', None)
-        self.subCategories = json.get('subCategories', [])
+    __slots__ = ('path', 'convert', 'name')
 
+    def __init__(self, *path, convert=None):
+        """
+        Args:
+            *path (str): Keys leading to the value, the first one is the API field
+            convert (callable): Function applied to the raw value, its result is
+                                cached on the instance
+        """
+        self.path = path
+        self.convert = convert
+        self.name = None
 
-class Recommendation:
+    def __set_name__(self, owner, name):
+        self.name = name
 
-    def __init__(self, json) -> str:
-        self.json = json
-        self.sku = json.get('sku', None)
-        self.customerReviewAverage = json.get(
-            'customerReviews', []).get(
-            'averageScore', None)
-        self.customerReviewCount = json.get(
-            'customerReviews', []).get(
-            'count', None)
-        self.description = json.get('descriptions', None).get('short', None)
-        self.images = json.get('images', None)
-        self.name = json.get('names', None).get('title', None)
-        self.regularPrice = json.get('prices', None).get('regularPrice', None)
-        self.currentPrice = json.get('prices', None).get('currentPrice', None)
-        self.productUrl = json.get('links', None).get('product', None)
-        self.webUrl = json.get('links', None).get('web', None)
-        self.addToCartUrl = json.get('links', None).get('addToCart', None)
-        self.rank = json.get('rank', None)
-
-
-class Store:
-
-    def __init__(self, json) -> str:
-        self.json = json
-        self.storeId = json.get('storeId', None)
-        self.storeType = json.get('storeType', None)
-        self.tradeIn = json.get('tradeIn', None)
-        self.brand = json.get('brand', None)
-        self.name = json.get('name', None)
-        self.longName = json.get('longName', None)
-        self.address = json.get('address', None) + json.get('address2', None)
-        self.city = json.get('city', None)
-        self.region = json.get('region', None)
-        self.postalCode = json.get('fullPostalCode', None)
-        self.country = json.get('country', None)
-        self.latitude = json.get('lat', None)
-        self.longitude = json.get('lng', None)
-        self.hours = json.get('hours', None)
-        self.gmtOffset = json.get('gmtOffset', None)
-        self.language = json.get('language', None)
-        self.phone = json.get('phone', None)
-        self.services = []
-        for service in json.get('services', []):
-            self.services.append(service.get('service', ""))
-
-
-class Offer:
-
-    def __init__(self, json) -> str:
-        self.json = json
-        self.currentPrice = json.get('prices', None).get('currentPrice', None)
-        self.regularPrice = json.get('prices', None).get('regularPrice', None)
-        self.condition = json.get('condition', None)
-        self.onlineAvailability = json.get('onlineAvailability', None)
-        self.inStoreAvailability = json.get('inStoreAvailability', None)
-        self.listingId = json.get('listingId', None)
-        self.sellerId = json.get('sellerId', None)
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        cache = instance._cache
+        if cache is not None and self.name in cache:
+            return cache[self.name]
+        fields = instance.fields
+        if fields is not None and self.path[0] not in fields:
+            raise FieldNotFetchedError(self.name, self.path[0])
+        value = instance.json.get(self.path[0], None)
+        for key in self.path[1:]:
+            value = value.get(key, None) if isinstance(value, dict) else None
+        if self.convert is not None:
+            value = self.convert(value)
+            if cache is None:
+                cache = instance._cache = {}
+            cache[self.name] = value
+        return value
+
+    def __set__(self, instance, value):
+        if instance._cache is None:
+            instance._cache = {}
+        instance._cache[self.name] = value
 
 
-class OpenBox:
+class _Model:
+    """
+    Base class of the models, holding the JSON the attributes are read from.
+    """
 
-    def __init__(self, json) -> str:
+    __slots__ = ('json', 'fields', '_cache')
+
+    def __init__(self, json, fields=None) -> str:
+        """
+        Args:
+            json (dict): Object as returned by the API
+            fields (iterable): API fields requested with show=, None when the full
+                               object was fetched. Reading an attribute whose field
+                               was not requested raises FieldNotFetchedError.
+        """
         self.json = json
-        self.sku = json.get('sku', None)
-        self.customerReviewAverage = json.get(
-            'customerReviews', None).get(
-            'averageScore', None)
-        self.customerReviewCount = json.get(
-            'customerReviews', None).get(
-            'count', None)
-        self.description = json.get('descriptions', None).get('short', None)
-        self.images = json.get('images', None)
-        self.name = json.get('names', None).get('title', None)
-        self.regularPrice = json.get('prices', None).get('regularPrice', None)
-        self.currentPrice = json.get('prices', None).get('currentPrice', None)
-        self.productUrl = json.get('links', None).get('product', None)
-        self.webUrl = json.get('links', None).get('web', None)
-        self.addToCartUrl = json.get('links', None).get('addToCart', None)
-        self.offers = []
-        for offer in json.get('offers', None):
-            self.offers.append(Offer(offer))
+        self.fields = None if fields is None else frozenset(fields)
+        self._cache = None
+
+    @classmethod
+    def attributes(cls):
+        """
+        Returns:
+            dict: Attribute name to API field of every JSON-backed attribute
+        """
+        return {
+            name: field.path[0]
+            for klass in reversed(cls.__mro__)
+            for name, field in vars(klass).items()
+            if isinstance(field, _Field)}
+
+
+class Image(_Model):
+
+    __slots__ = ()
+
+    rel = _Field('rel')
+    unitOfMeasure = _Field('unitOfMeasure')
+    width = _Field('width')
+    height = _Field('height')
+    href = _Field('href')
+    primary = _Field('primary')
+
+
+class Product(_Model):
+
+    __slots__ = ()
+
+    sku = _Field('sku')
+    score = _Field('score')
+    productId = _Field('productId')
+    name = _Field('name')
+    source = _Field('source')
+    type = _Field('type')
+    startDate = _Field('startDate')
+    new = _Field('new')
+    active = _Field('active')
+    lowPriceGuarantee = _Field('lowPriceGuarantee')
+    active_Update_Date = _Field('activeUpdateDate')
+    regularPrice = _Field('regularPrice')
+    salePrice = _Field('salePrice')
+    clearance = _Field('clearance')
+    onSale = _Field('onSale')
+    planPrice = _Field('planPrice')
+    priceWithPlan = _Field('priceWithPlan')
+    contracts = _Field('contracts')
+    priceRestriction = _Field('priceRestriction')
+    priceUpdateDate = _Field('priceUpdateDate')
+    digital = _Field('digital')
+    preowned = _Field('preowned')
+    carriers = _Field('carriers')
+    planFeatures = _Field('planFeatures')
+    devices = _Field('devices')
+    carrierPlans = _Field('carrierPlans')
+    technologyCode = _Field('technologyCode')
+    carrierModelNumber = _Field('carrierModelNumber')
+    earlyTerminationFees = _Field('earlyTerminationFees')
+    monthlyRecurringCharge = _Field('monthlyRecurringCharge')
+    monthlyRecurringChargeGrandTotal = _Field('monthlyRecurringChargeGrandTotal')
+    activationCharge = _Field('activationCharge')
+    minutePrice = _Field('minutePrice')
+    planCategory = _Field('planCategory')
+    planType = _Field('planType')
+    familyIndividualCode = _Field('familyIndividualCode')
+    validFrom = _Field('validFrom')
+    validUntil = _Field('validUntil')
+    carrierPlan = _Field('carrierModelNumber')
+    outletCenter = _Field('outletCenter')
+    secondaryMarket = _Field('secondaryMarket')
+    frequentlyPurchasedWith = _Field('frequentlyPurchasedWith')
+    accessories = _Field('accessories')
+    relatedProductsSKUs = _Field(
+        'relatedProducts',
+        convert=lambda items: [item.get('sku', None) for item in items or []])
+    requiredParts = _Field('requiredParts')
+    techSupportPlans = _Field('techSupportPlans')
+    crossSell = _Field('crossSell')
+    salesRankShortTerm = _Field('salesRankShortTerm')
+    salesRankMediumTerm = _Field('salesRankMediumTerm')
+    salesRankLongTerm = _Field('salesRankLongTerm')
+    bestSellingRank = _Field('bestSellingRank')
+    url = _Field('url')
+    spin360Url = _Field('spin360Url')
+    mobileUrl = _Field('mobileUrl')
+    affiliateUrl = _Field('affiliateUrl')
+    addToCartUrl = _Field('addToCartUrl')
+    affiliateAddToCartUrl = _Field('affiliateAddToCartUrl')
+    linkShareAffiliateUrl = _Field('linkShareAffiliateUrl')
+    linkShareAffiliateAddToCartUrl = _Field('linkShareAffiliateAddToCartUrl')
+    upc = _Field('upc')
+    productTemplate = _Field('productTemplate')
+    categoryPath = _Field('categoryPath')
+    alternateCategories = _Field('alternateCategories')
+    lists = _Field('lists')
+    customerReviewCount = _Field('customerReviewCount')
+    customerReviewAverage = _Field('customerReviewAverage')
+    customerTopRated = _Field('customerTopRated')
+    format = _Field('format')
+    freeShipping = _Field('freeShipping')
+    freeShippingEligible = _Field('freeShippingEligible')
+    inStoreAvailability = _Field('inStoreAvailability')
+    inStoreAvailabilityText = _Field('inStoreAvailabilityText')
+    inStoreAvailabilityUpdateDate = _Field('inStoreAvailabilityUpdateDate')
+    itemUpdateDate = _Field('itemUpdateDate')
+    onlineAvailability = _Field('onlineAvailability')
+    onlineAvailabilityText = _Field('onlineAvailabilityText')
+    onlineAvailabilityUpdateDate = _Field('onlineAvailabilityUpdateDate')
+    releaseDate = _Field('releaseDate')
+    shippingCost = _Field('shippingCost')
+    shipping = _Field('shipping')
+    shippingLevelsOfService = _Field('shippingLevelsOfService')
+    specialOrder = _Field('specialOrder')
+    shortDescription = _Field('shortDescription')
+    longDescription = _Field('longDescription')
+    itemClass = _Field('class')
+    itemClassId = _Field('classId')
+    itemSubclass = _Field('subclass')
+    itemSubclassId = _Field('subclassId')
+    department = _Field('department')
+    departmentId = _Field('departmentId')
+    protectionPlanTerm = _Field('protectionPlanTerm')
+    protectionPlanType = _Field('protectionPlanType')
+    protectionPlanLowPrice = _Field('protectionPlanLowPrice')
+    protectionPlanHighPrice = _Field('protectionPlanHighPrice')
+    buybackPlans = _Field('buybackPlans')
+    protectionPlans = _Field('protectionPlans')
+    protectionPlanDetails = _Field('protectionPlanDetails')
+    productFamilies = _Field('productFamilies')
+    productVariations = _Field('productVariations')
+    aspectRatio = _Field('aspectRatio')
+    screenFormat = _Field('screenFormat')
+    lengthInMinutes = _Field('lengthInMinutes')
+    mpaaRating = _Field('mpaaRating')
+    plot = _Field('plot')
+    studio = _Field('studio')
+    theatricalReleaseDate = _Field('theatricalReleaseDate')
+    description = _Field('description')
+    manufacturer = _Field('manufacturer')
+    modelNumber = _Field('modelNumber')
+    images = _Field(
+        'images', convert=lambda items: [Image(image) for image in items or []])
+    image = _Field('image')
+    largeFrontImage = _Field('largeFrontImage')
+    mediumImage = _Field('mediumImage')
+    thumbnailImage = _Field('thumbnailImage')
+    largeImage = _Field('largeImage')
+    alternateViewsImage = _Field('alternateViewsImage')
+    angleImage = _Field('angleImage')
+    backViewImage = _Field('backViewImage')
+    energyGuideImage = _Field('energyGuideImage')
+    leftViewImage = _Field('leftViewImage')
+    accessoriesImage = _Field('accessoriesImage')
+    remoteControlImage = _Field('remoteControlImage')
+    rightViewImage = _Field('rightViewImage')
+    topViewImage = _Field('topViewImage')
+    albumTitle = _Field('albumTitle')
+    artistName = _Field('artistName')
+    artistId = _Field('artistId')
+    originalReleaseDate = _Field('originalReleaseDate')
+    parentalAdvisory = _Field('parentalAdvisory')
+    mediaCount = _Field('mediaCount')
+    monoStereo = _Field('monoStereo')
+    studioLive = _Field('studioLive')
+    condition = _Field('condition')
+    inStorePickup = _Field('inStorePickup')
+    friendsAndFamilyPickup = _Field('friendsAndFamilyPickup')
+    homeDelivery = _Field('homeDelivery')
+    quantityLimit = _Field('quantityLimit')
+    fulfilledBy = _Field('fulfilledBy')
+    members = _Field('members')
+    bundledIn = _Field('bundledIn')
+    albumLabel = _Field('albumLabel')
+    genre = _Field('genre')
+    color = _Field('color')
+    depth = _Field('depth')
+    dollarSavings = _Field('dollarSavings')
+    percentSavings = _Field('percentSavings')
+    tradeInValue = _Field('tradeInValue')
+    height = _Field('height')
+    orderable = _Field('orderable')
+    weight = _Field('weight')
+    shippingWeight = _Field('shippingWeight')
+    width = _Field('width')
+    warrantyLabor = _Field('warrantyLabor')
+    warrantyParts = _Field('warrantyParts')
+    softwareAge = _Field('softwareAge')
+    softwareGrade = _Field('softwareGrade')
+    platform = _Field('platform')
+    numberOfPlayers = _Field('numberOfPlayers')
+    softwareNumberOfPlayers = _Field('softwareNumberOfPlayers')
+    esrbRating = _Field('esrbRating')
+    includedItemList = _Field(
+        'includedItemList',
+        convert=lambda items: [it.get('includedItem', None) for it in items or []])
+    marketplace = _Field('marketplace')
+    listingId = _Field('listingId')
+    sellerId = _Field('sellerId')
+    shippingRestrictions = _Field('shippingRestrictions')
+    proposition65WarningMessage = _Field('proposition65WarningMessage')
+    proposition65WarningType = _Field('proposition65WarningType')
+    coaxialDigitalAudioOutputs = _Field('coaxialDigitalAudioOutputs')
+    componentVideoOutputs = _Field('componentVideoOutputs')
+    compositeVideoOutputs = _Field('compositeVideoOutputs')
+    energyStarQualified = _Field('energyStarQualified')
+    hdmiOutputs = _Field('hdmiOutputs')
+    maximumOutputResolution = _Field('maximumOutputResolution')
+    mediaCardSlot = _Field('mediaCardSlot')
+    numberOfCoaxialDigitalAudioOutputs = _Field('numberOfCoaxialDigitalAudioOutputs')
+    numberOfOpticalDigitalAudioOutputs = _Field('numberOfOpticalDigitalAudioOutputs')
+    opticalDigitalAudioOutputs = _Field('opticalDigitalAudioOutputs')
+    playerType = _Field('playerType')
+    smartCapable = _Field('smartCapable')
+    usbPort = _Field('usbPort')
+
+
+class Category(_Model):
+
+    __slots__ = ()
+
+    id = _Field('id')
+    name = _Field('name')
+    active = _Field('active')
+    url = _Field('url')
+    path = _Field('path')
+    subCategories = _Field(
+        'subCategories', convert=lambda value: [] if value is None else value)
+
+
+class Recommendation(_Model):
+
+    __slots__ = ()
+
+    sku = _Field('sku')
+    customerReviewAverage = _Field('customerReviews', 'averageScore')
+    customerReviewCount = _Field('customerReviews', 'count')
+    description = _Field('descriptions', 'short')
+    images = _Field('images')
+    name = _Field('names', 'title')
+    regularPrice = _Field('prices', 'regularPrice')
+    currentPrice = _Field('prices', 'currentPrice')
+    productUrl = _Field('links', 'product')
+    webUrl = _Field('links', 'web')
+    addToCartUrl = _Field('links', 'addToCart')
+    rank = _Field('rank')
+
+
+class Store(_Model):
+
+    __slots__ = ()
+
+    storeId = _Field('storeId')
+    storeType = _Field('storeType')
+    tradeIn = _Field('tradeIn')
+    brand = _Field('brand')
+    name = _Field('name')
+    longName = _Field('longName')
+    city = _Field('city')
+    region = _Field('region')
+    postalCode = _Field('fullPostalCode')
+    country = _Field('country')
+    latitude = _Field('lat')
+    longitude = _Field('lng')
+    hours = _Field('hours')
+    gmtOffset = _Field('gmtOffset')
+    language = _Field('language')
+    phone = _Field('phone')
+    services = _Field(
+        'services',
+        convert=lambda items: [
+            service.get('service', "") for service in items or []])
+
+    @property
+    def address(self):
+        parts = [
+            part for part in (self.json.get('address', None),
+                              self.json.get('address2', None))
+            if part is not None]
+        return ''.join(parts) if parts else None
+
+
+class Offer(_Model):
+
+    __slots__ = ()
+
+    currentPrice = _Field('prices', 'currentPrice')
+    regularPrice = _Field('prices', 'regularPrice')
+    condition = _Field('condition')
+    onlineAvailability = _Field('onlineAvailability')
+    inStoreAvailability = _Field('inStoreAvailability')
+    listingId = _Field('listingId')
+    sellerId = _Field('sellerId')
+
+
+class OpenBox(_Model):
+
+    __slots__ = ()
+
+    sku = _Field('sku')
+    customerReviewAverage = _Field('customerReviews', 'averageScore')
+    customerReviewCount = _Field('customerReviews', 'count')
+    description = _Field('descriptions', 'short')
+    images = _Field('images')
+    name = _Field('names', 'title')
+    regularPrice = _Field('prices', 'regularPrice')
+    currentPrice = _Field('prices', 'currentPrice')
+    productUrl = _Field('links', 'product')
+    webUrl = _Field('links', 'web')
+    addToCartUrl = _Field('links', 'addToCart')
+    offers = _Field(
+        'offers', convert=lambda items: [Offer(offer) for offer in items or []])
@@ -0,0 +1,182 @@
+import re
+import threading
+from urllib.parse import quote
+
+
+# Lookup suffix to filter operator, e.g. Q(regularPrice__lt=100) -> regularPrice<100
+_OPERATORS = {
+    'eq': '{field}={value}',
+    'ne': '{field}!={value}',
+    'gt': '{field}>{value}',
+    'gte': '{field}>={value}',
+    'lt': '{field}<{value}',
+    'lte': '{field}<={value}',
+    'startswith': '{field}={value}*',
+}
+
+_NEEDS_QUOTES = re.compile(r'[\s(),&|=<>!*]')
+
+_templates = {}
+_templates_lock = threading.Lock()
+_MAX_TEMPLATES = 4096
+
+
+def _encode(value, wildcard=False):
+    """
+    Renders a filter value: booleans as true/false, strings with spaces or
+    filter syntax characters double quoted, then percent-encoded. The prefix
+    of a wildcard is never quoted, since the API matches a quoted value
+    literally, so every special character is percent-encoded instead.
+    """
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if wildcard:
+        return quote(text.replace('"', ''), safe='')
+    if _NEEDS_QUOTES.search(text):
+        text = '"{0}"'.format(text.replace('"', ''))
+    return quote(text, safe='"')
+
+
+class Q:
+    """
+    Composable filter of the Best Buy query syntax.
+
+    Keyword arguments are field lookups joined with AND; a double underscore
+    suffix picks the operator (in, ne, gt, gte, lt, lte, startswith):
+
+        Q(sku__in=[1, 2, 3]) & Q(onSale=True)
+        Q(storeType='Big Box') | Q(storeType='Outlet Center')
+
+    The filter shape (fields, operators, number of values) is compiled to a
+    template once and cached, so repeated queries only substitute values.
+    """
+
+    AND = '&'
+    OR = '|'
+
+    def __init__(self, *children, **lookups):
+        """
+        Args:
+            *children (Q): Filters joined with AND
+            **lookups: field[__operator]=value lookups joined with AND
+        """
+        self.connector = Q.AND
+        self.children = [child for child in children if child]
+        for lookup, value in lookups.items():
+            field, _, operator = lookup.partition('__')
+            operator = operator or 'eq'
+            if operator == 'in':
+                values = tuple(value)
+            elif operator in _OPERATORS:
+                values = (value,)
+            else:
+                raise ValueError('Unknown lookup operator: {0}'.format(operator))
+            self.children.append((field, operator, values))
+
+    @classmethod
+    def area(cls, *location):
+        """
+        Filters stores around a location
+
+        Args:
+            *location: (postal_code, distance) or (latitude, longitude, distance)
+
+        Returns:
+            Q: The area(...) filter
+        """
+        q = cls()
+        q.children.append(('area', 'area', tuple(location)))
+        return q
+
+    def __and__(self, other):
+        return self._combine(other, Q.AND)
+
+    def __or__(self, other):
+        return self._combine(other, Q.OR)
+
+    def _combine(self, other, connector):
+        if not other:
+            return self
+        if not self:
+            return other
+        q = Q()
+        q.connector = connector
+        q.children = [self, other]
+        return q
+
+    def __bool__(self):
+        return bool(self.children)
+
+    def __str__(self):
+        return self.compile()
+
+    def __repr__(self):
+        return 'Q({0!r})'.format(self.compile())
+
+    def _signature(self):
+        return (self.connector, tuple(
+            child._signature() if isinstance(child, Q)
+            else (child[0], child[1], len(child[2]))
+            for child in self.children))
+
+    def _values(self, values):
+        for child in self.children:
+            if isinstance(child, Q):
+                child._values(values)
+            else:
+                values.extend(
+                    _encode(value, child[1] == 'startswith') for value in child[2])
+        return values
+
+    def _template(self, parent=None):
+        parts = []
+        for child in self.children:
+            if isinstance(child, Q):
+                parts.append(child._template(self.connector))
+                continue
+            field, operator, values = child
+            if operator == 'area':
+                parts.append('area({0})'.format(','.join(['{}'] * len(values))))
+            elif operator == 'in':
+                parts.append('{0} in({1})'.format(field, ','.join(['{}'] * len(values))))
+            else:
+                parts.append(_OPERATORS[operator].format(field=field, value='{}'))
+        text = self.connector.join(parts)
+        if parent is not None and parent != self.connector and len(parts) > 1:
+            return '({0})'.format(text)
+        return text
+
+    def compile(self):
+        """
+        Returns:
+            str: Filter in the Best Buy query syntax, without the outer parentheses
+        """
+        signature = self._signature()
+        template = _templates.get(signature)
+        if template is None:
+            template = self._template()
+            with _templates_lock:
+                if len(_templates) >= _MAX_TEMPLATES:
+                    _templates.clear()
+                _templates[signature] = template
+        return template.format(*self._values([]))
+
+
+def _filter(query):
+    """
+    Renders the filter part of a request path
+
+    Args:
+        query (Q or str): Filter, strings are used as they are
+
+    Returns:
+        str: "(filter)", or "" for an empty Q
+    """
+    if isinstance(query, Q):
+        return '({0})'.format(query.compile()) if query else ''
+    return query
@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import os
+import struct
+import threading
+import time
+from exceptions import QuotaExceededError
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Lower values are served first when callers wait for tokens
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BULK = 10
+
+
+def _today():
+    return int(time.time() // 86400)
+
+
+class MemoryBucketState:
+    """
+    Token bucket state shared by the threads of one process.
+    """
+
+    def __init__(self):
+        self.tokens = None
+        self.updated_at = None
+        self.day = None
+        self.used_today = 0
+
+    def take(self, rate, capacity, daily_limit, now):
+        """
+        Refills the bucket and takes one token if available
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum tokens in the bucket (burst size)
+            daily_limit (int): Maximum tokens per UTC day, None for no limit
+            now (float): Current time.time()
+
+        Returns:
+            float: 0 if a token was taken, else seconds until the next one
+        """
+        if self.tokens is None:
+            self.tokens, self.updated_at = capacity, now
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        today = _today()
+        if self.day != today:
+            self.day, self.used_today = today, 0
+        if daily_limit is not None and self.used_today >= daily_limit:
+            raise QuotaExceededError(
+                'Daily limit of {0} requests reached'.format(daily_limit))
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.used_today += 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class FileBucketState(MemoryBucketState):
+    """
+    Token bucket state stored in a small file, shared by every process using it.
+
+    Each take locks the file (flock), so several workers on one host stay
+    within the same QPS and daily budget.
+    """
+
+    _format = 'dddd'
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): State file, created if missing
+        """
+        if fcntl is None:
+            raise ImportError('FileBucketState requires fcntl (POSIX)')
+        super().__init__()
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def take(self, rate, capacity, daily_limit, now):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            data = os.pread(self._fd, struct.calcsize(self._format), 0)
+            if data:
+                self.tokens, self.updated_at, day, used = struct.unpack(
+                    self._format, data)
+                self.day, self.used_today = int(day), int(used)
+            try:
+                return super().take(rate, capacity, daily_limit, now)
+            finally:
+                os.pwrite(self._fd, struct.pack(
+                    self._format,
+                    self.tokens,
+                    self.updated_at,
+                    self.day,
+                    self.used_today), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the request rate of a transport.
+
+    Callers block in acquire until a token is available. Waiting callers are
+    served by priority (PRIORITY_INTERACTIVE before PRIORITY_BULK), then in
+    arrival order, and the time each one waited is recorded per priority.
+    """
+
+    def __init__(self, rate, capacity=None, daily_limit=None, state=None):
+        """
+        Args:
+            rate (float): Requests per second
+            capacity (float): Burst size, defaults to rate
+            daily_limit (int): Maximum requests per UTC day, None for no limit
+            state (MemoryBucketState): Bucket state, pass a FileBucketState to share
+                                       the budget between processes
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.daily_limit = daily_limit
+        self.state = state if state is not None else MemoryBucketState()
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._stats = {}
+
+    def acquire(self, priority=PRIORITY_DEFAULT):
+        """
+        Blocks until a request may be sent
+
+        Args:
+            priority (int): Priority class of the request, lower is served first
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            QuotaExceededError: The daily limit is used up
+        """
+        start = time.monotonic()
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == entry:
+                        wait = self.state.take(
+                            self.rate, self.capacity, self.daily_limit, time.time())
+                        if not wait:
+                            break
+                    self._condition.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+            waited = time.monotonic() - start
+            stats = self._stats.setdefault(
+                priority, {'count': 0, 'wait_total': 0.0, 'wait_max': 0.0})
+            stats['count'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+        return waited
+
+    @property
+    def stats(self):
+        """
+        Returns:
+            dict: Priority to request count, total and maximum queue wait in seconds
+        """
+        with self._condition:
+            return {priority: dict(stats) for priority, stats in self._stats.items()}
@@ -0,0 +1,167 @@
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request.
+
+    Connection errors, timeouts and the statuses in status_forcelist are
+    retried with exponential backoff and full jitter. A Retry-After header
+    on the response takes precedence over the computed delay.
+    """
+
+    def __init__(
+            self,
+            total=3,
+            backoff_factor=0.5,
+            max_backoff=30,
+            jitter=True,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after=True):
+        """
+        Args:
+            total (int): Maximum number of retries, 0 disables retrying
+            backoff_factor (float): Base delay in seconds, doubled on every attempt
+            max_backoff (float): Upper bound of a single delay in seconds
+            jitter (bool): Pick a random delay between 0 and the backoff (full jitter)
+            status_forcelist (iterable): HTTP statuses that are retried
+            respect_retry_after (bool): Honor the Retry-After response header
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.respect_retry_after = respect_retry_after
+
+    def retries_status(self, status):
+        """
+        Args:
+            status (int): HTTP status of the response
+
+        Returns:
+            bool: True if the status is retried
+        """
+        return status in self.status_forcelist
+
+    def backoff(self, attempt, status=None, headers=None, throttled=False):
+        """
+        Decides whether a failed attempt is retried, and after how long
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 0
+            status (int): HTTP status of the response, None for a connection error or timeout
+            headers (dict): Headers of the failed response, if any
+            throttled (bool): The response throttled the API key, which a KeyPool has
+                              set aside, so the retry goes out right away with another key
+
+        Returns:
+            float or None: Seconds to wait before the next attempt, None to give up
+        """
+        if attempt >= self.total:
+            return None
+        if status is None:
+            return self.delay(attempt)
+        if throttled:
+            return 0
+        if not self.retries_status(status):
+            return None
+        return self.delay(attempt, headers)
+
+    def delay(self, attempt, headers=None):
+        """
+        Args:
+            attempt (int): Number of the failed attempt, starting at 0
+            headers (dict): Headers of the failed response, if any
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        if self.respect_retry_after and headers:
+            retry_after = _parse_retry_after(headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        backoff = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+
+def _parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(date) - time.time())
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow idempotent GET.
+
+    The hedge fires after a fixed delay, or after the given percentile of the
+    recently observed latencies once min_samples have been recorded,
+    counted from the moment the primary is sent. The first response to
+    arrive wins and the other one is discarded; a failed request (dropped
+    connection, timeout or a retried status) only wins when both fail.
+    """
+
+    def __init__(self, delay=None, percentile=0.95, min_samples=20, window=500):
+        """
+        Args:
+            delay (float): Fixed hedge delay in seconds, None to derive it from latencies
+            percentile (float): Latency percentile used as the delay (0-1)
+            min_samples (int): Latencies needed before hedging with a derived delay
+            window (int): Number of recent latencies kept
+        """
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedges = 0
+        self.wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add_hedge(self):
+        """
+        Counts a hedge sent
+        """
+        with self._lock:
+            self.hedges += 1
+
+    def add_win(self):
+        """
+        Counts a hedge whose response was used instead of the primary's
+        """
+        with self._lock:
+            self.wins += 1
+
+    def record(self, latency):
+        """
+        Args:
+            latency (float): Seconds a request took
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def delay(self):
+        """
+        Returns:
+            float or None: Seconds to wait before hedging, None to not hedge yet
+        """
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile))]
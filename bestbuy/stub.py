@@ -0,0 +1,142 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        status, headers, body = self.server.stub.respond(self.path)
+        if status is None:
+            self.close_connection = True
+            return
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for api.bestbuy.com in tests and benchmarks.
+
+    Connections are kept alive (HTTP/1.1), so it can be used to compare
+    pooled and unpooled transports. Latency and failures can be injected to
+    exercise retries and hedging.
+    """
+
+    def __init__(
+            self,
+            payload=None,
+            responder=None,
+            host='127.0.0.1',
+            port=0,
+            latency=0,
+            error_rate=0,
+            error_status=503):
+        """
+        Args:
+            payload (dict): JSON body returned for every request
+            responder (callable): Function taking the request path and returning
+                                  (status, headers, body) - overrides payload
+            host (str): Interface to bind to
+            port (int): Port to bind to, 0 picks a free one
+            latency (float): Seconds every response is delayed by
+            error_rate (float): Probability (0-1) of answering with error_status
+            error_status (int): Status of the randomly injected errors
+        """
+        self.payload = payload if payload is not None else {}
+        self.responder = responder
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = []
+        self._faults = deque()
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        Returns:
+            str: Base URL of the running server
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def respond(self, path):
+        """
+        Builds the response for a request path
+
+        Args:
+            path (str): Raw request path including the query string
+
+        Returns:
+            tuple: (status, headers, body bytes)
+        """
+        self.requests.append(path)
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            fault = self._faults.popleft()
+        except IndexError:
+            fault = None
+        if fault is not None:
+            time.sleep(fault['delay'])
+            if fault['status'] != 200:
+                return fault['status'], fault['headers'], fault['body']
+        elif self.error_rate and random.random() < self.error_rate:
+            return self.error_status, {}, b'{"errorMessage": "Injected error"}'
+        if self.responder is not None:
+            return self.responder(path)
+        return 200, {'Content-Type': 'application/json'}, json.dumps(
+            self.payload).encode('utf-8')
+
+    def inject(self, status=503, headers=None, body=b'', delay=0, count=1):
+        """
+        Queues faults served to the next requests, before the normal responses
+
+        Args:
+            status (int): Status to answer with; None drops the connection, 200
+                          serves the normal response (useful with delay)
+            headers (dict): Headers of the faulty response, e.g. Retry-After
+            body (bytes): Body of the faulty response
+            delay (float): Seconds to wait before answering
+            count (int): Number of requests the fault applies to
+        """
+        for _ in range(count):
+            self._faults.append({
+                'status': status,
+                'headers': headers or {},
+                'body': body,
+                'delay': delay})
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={'poll_interval': 0.05},
+            daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,472 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from decode import get_decoder, get_item_parser
+from exceptions import APIError
+from hooks import AFTER_RESPONSE, BEFORE_REQUEST, ON_CACHE_HIT, ON_RETRY, RequestEvent
+from keys import THROTTLED_STATUSES
+from ratelimit import PRIORITY_BULK, PRIORITY_DEFAULT
+from retry import RetryPolicy
+
+
+BASE_URL = 'https://api.bestbuy.com'
+
+
+class Transport:
+    """
+    Pooled HTTP transport shared by every API class of a BestBuy client.
+
+    A single keep-alive requests.Session is reused for all calls, so the
+    TCP/TLS handshake to the API host is paid once per pooled connection
+    instead of once per request.
+    """
+
+    def __init__(
+            self,
+            api_key=None,
+            base_url=BASE_URL,
+            pool_connections=10,
+            pool_maxsize=10,
+            pool_block=False,
+            timeout=(3.05, 30),
+            session=None,
+            cache=None,
+            decoder=None,
+            rate_limiter=None,
+            retry=None,
+            hedge=None,
+            hooks=None,
+            key_pool=None,
+            max_workers=None):
+        """
+        Args:
+            api_key (str): Best Buy API key sent with every request
+            base_url (str): Scheme and host of the API (useful for local stubs)
+            pool_connections (int): Number of per-host connection pools to cache
+            pool_maxsize (int): Maximum number of keep-alive connections per host
+            pool_block (bool): Block when the pool is exhausted instead of opening extra connections
+            timeout (float or tuple): (connect, read) timeout in seconds
+            session (requests.Session): Existing session to use instead of creating one
+            cache (ResponseCache): Cache consulted before sending requests
+            decoder (object or str): JSON decoder or backend name (orjson, msgspec, json),
+                                     defaults to the fastest installed backend
+            rate_limiter (RateLimiter): Limiter every network request waits on
+            retry (RetryPolicy): Retry and backoff policy, defaults to RetryPolicy()
+            hedge (HedgePolicy): Send a duplicate of slow requests, None to never hedge
+            hooks (Hooks): Instrumentation callbacks, None to disable instrumentation
+            key_pool (KeyPool): Keys to spread the requests over, replaces api_key
+            max_workers (int): Threads of the pool shared by bulk and parallel calls,
+                               defaults to pool_maxsize
+        """
+        self.api_key = api_key
+        self.key_pool = key_pool
+        self.pool_maxsize = pool_maxsize
+        self.max_workers = max_workers or pool_maxsize
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.hedge = hedge
+        self.hooks = hooks
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.decoder = get_decoder(decoder) if decoder is None or isinstance(
+            decoder, str) else decoder
+        self.session = session if session is not None else requests.Session()
+        adapter = _TimedAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(
+            self,
+            path,
+            params=None,
+            endpoint=None,
+            priority=PRIORITY_DEFAULT):
+        """
+        Sends a GET request over the pooled session
+
+        Args:
+            path (str): Path of the resource, including the filter expression
+            params (dict): Extra query string parameters
+            endpoint (str): API endpoint the request belongs to (products, stores, ...)
+            priority (int): Rate limiter priority class of the request
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        if self.cache is None:
+            return self._fetch(path, params, priority, endpoint)
+        key = self.cache.key(path, params)
+        value, state = self.cache.lookup(key, endpoint)
+        if state == self.cache.STALE and self.cache.begin_refresh(key):
+            threading.Thread(
+                target=self._refresh,
+                args=(key, path, params, endpoint),
+                daemon=True).start()
+        if state is not None:
+            if self.hooks is not None:
+                event = RequestEvent(endpoint, path, params, priority)
+                event.cache_state = state
+                self.hooks.emit(ON_CACHE_HIT, event)
+            return value
+        value = self._fetch(path, params, priority, endpoint)
+        self.cache.store(key, value)
+        return value
+
+    def stream(
+            self,
+            path,
+            results,
+            params=None,
+            endpoint=None,
+            priority=PRIORITY_DEFAULT,
+            chunk_size=65536):
+        """
+        Sends a GET request and yields the items of one array of the response
+        as the body arrives, without waiting for or holding the whole body
+
+        Failed attempts are retried like get until the response headers are
+        in. Streamed responses are neither cached nor hedged, and the
+        AFTER_RESPONSE hooks run once the headers are received.
+
+        Args:
+            path (str): Path of the resource, including the filter expression
+            results (str): Top-level field holding the array (products, stores, results)
+            params (dict): Extra query string parameters
+            endpoint (str): API endpoint the request belongs to
+            priority (int): Rate limiter priority class of the request
+            chunk_size (int): Bytes read from the socket at a time
+
+        Yields:
+            dict: Items of the array, in response order
+        """
+        response = self._fetch(path, params, priority, endpoint, stream=True)
+        parser = get_item_parser(results)
+        with response:
+            for chunk in response.iter_content(chunk_size):
+                for item in parser.feed(chunk):
+                    yield item
+        parser.close()
+
+    def _refresh(self, key, path, params, endpoint=None):
+        try:
+            self.cache.store(
+                key, self._fetch(path, params, PRIORITY_BULK, endpoint))
+        finally:
+            self.cache.end_refresh(key)
+
+    def _fetch(self, path, params=None, priority=PRIORITY_DEFAULT, endpoint=None, stream=False):
+        attempts = _Attempts(self, path, params, endpoint, priority)
+        while True:
+            try:
+                if stream:
+                    response = self._get(path, attempts.query, priority, attempts.event, stream=True)
+                else:
+                    response = self._send(path, attempts.query, priority, attempts.event)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                delay = attempts.failed(error=error)
+            else:
+                if response.status_code < 400:
+                    if stream:
+                        attempts.finish(response.status_code)
+                        return response
+                    return attempts.decode(response.status_code, response.content)
+                delay = attempts.failed(
+                    response.status_code, response.headers, response.content, response)
+                response.close()
+            time.sleep(delay)
+
+    def _send(self, path, query, priority, event=None):
+        delay = self.hedge.delay() if self.hedge is not None else None
+        if delay is None:
+            return self._get(path, query, priority, event)
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.pool_maxsize, thread_name_prefix='bestbuy-hedge')
+        sent = threading.Event()
+        primary = self._hedge_executor.submit(self._get, path, query, priority, event, sent=sent)
+        primary.add_done_callback(lambda future: sent.set())
+        # The hedge delay counts from the moment the primary goes out, not
+        # from the time it spent waiting for a worker, the rate limiter or a key
+        sent.wait()
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        self.hedge.add_hedge()
+        hedge = self._hedge_executor.submit(self._get, path, query, priority)
+        winner = self._first_response(primary, hedge)
+        loser = hedge if winner is primary else primary
+        loser.cancel()
+        loser.add_done_callback(_discard_hedge)
+        if winner is hedge:
+            self.hedge.add_win()
+        return winner.result()
+
+    def _first_response(self, primary, hedge):
+        """
+        Waits for the first of the primary and the hedge to answer
+
+        A dropped connection, a timeout or a retried status does not count as
+        an answer while the other request is still in flight.
+
+        Returns:
+            Future: Request whose response is used
+        """
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and not (
+                        future.result().status_code >= 400
+                        and self.retry.retries_status(future.result().status_code)):
+                    return future
+            if not pending:
+                return primary
+
+    def _get(self, path, query, priority, event=None, stream=False, sent=None):
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire(priority)
+            if event is not None:
+                event.add_timing('wait', waited)
+        if self.key_pool is not None:
+            key = self.key_pool.acquire()
+            query = dict(query, apiKey=key)
+        if sent is not None:
+            sent.set()
+        _connects.seconds = 0.0
+        start = time.monotonic()
+        response = self.session.get(
+            self.base_url + path,
+            params=query,
+            timeout=self.timeout,
+            stream=stream)
+        elapsed = time.monotonic() - start
+        if self.key_pool is not None:
+            self.key_pool.report(key, response.status_code, response.headers)
+        if self.hedge is not None:
+            self.hedge.record(elapsed)
+        if event is not None:
+            _add_response_timings(event, elapsed, response.elapsed.total_seconds(), _connects.seconds)
+        return response
+
+    def executor(self):
+        """
+        Thread pool shared by every parallel call over this transport
+
+        Created on first use with max_workers threads, so the concurrency of
+        map, submit, the parallel batches and the page prefetch together stays
+        bounded by the size of the connection pool.
+
+        Returns:
+            ThreadPoolExecutor: The shared pool
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='bestbuy',
+                    initializer=_mark_worker)
+            return self._executor
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Attempts:
+    """
+    Retry bookkeeping of one request, shared by Transport and AsyncTransport
+    so they only differ in how an attempt is sent and the backoff awaited:
+    the query string, when to retry (see RetryPolicy.backoff), decoding and
+    the hook events.
+    """
+
+    def __init__(self, transport, path, params, endpoint, priority):
+        """
+        Args:
+            transport (Transport or AsyncTransport): Transport sending the request
+            path (str): Path of the resource, including the filter expression
+            params (dict): Extra query string parameters
+            endpoint (str): API endpoint the request belongs to
+            priority (int): Rate limiter priority class of the request
+        """
+        self.transport = transport
+        self.query = {'apiKey': transport.api_key, 'format': 'json'}
+        if params:
+            self.query.update(params)
+        self.attempt = 0
+        self.event = None
+        if transport.hooks is not None:
+            self.event = RequestEvent(endpoint, path, params, priority)
+            transport.hooks.emit(BEFORE_REQUEST, self.event)
+
+    def finish(self, status, size=0, error=None):
+        if self.event is not None:
+            self.event.finish(status, size, error)
+            self.transport.hooks.emit(AFTER_RESPONSE, self.event)
+
+    def decode(self, status, content):
+        """
+        Returns:
+            object: Decoded body of a successful response
+        """
+        if self.event is None:
+            return self.transport.decoder.loads(content)
+        start = time.perf_counter()
+        value = self.transport.decoder.loads(content)
+        self.event.add_timing('decode', time.perf_counter() - start)
+        self.finish(status, len(content))
+        return value
+
+    def failed(self, status=None, headers=None, content=b'', response=None, error=None):
+        """
+        Records a failed attempt
+
+        Args:
+            status (int): HTTP status of the response, None when error is set
+            headers (dict): Headers of the response
+            content (bytes): Body of the response
+            response (object): The HTTP response
+            error (Exception): Connection error or timeout of the attempt
+
+        Returns:
+            float: Seconds to wait before the next attempt
+
+        Raises:
+            Exception: The error, or the APIError of the response, when not retried
+        """
+        throttled = (self.transport.key_pool is not None
+                     and status in THROTTLED_STATUSES)
+        delay = self.transport.retry.backoff(self.attempt, status, headers, throttled)
+        if delay is None:
+            if error is None:
+                error = _api_error(status, content, response)
+            self.finish(status, len(content), error)
+            raise error
+        self.attempt += 1
+        if self.event is not None:
+            self.event.attempt = self.attempt
+            self.event.status = status
+            self.event.add_timing('backoff', delay)
+            self.transport.hooks.emit(ON_RETRY, self.event)
+        return delay
+
+
+_connects = threading.local()
+
+
+class _ConnectTimer:
+    """
+    Connection mixin adding the time spent in connect (DNS lookup, TCP
+    connect and TLS handshake) to a per-thread total, which _get reads to
+    tell it apart from server time. Reused connections never connect.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connects.seconds = getattr(_connects, 'seconds', 0.0) + time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_ConnectTimer, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_ConnectTimer, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections record the time spent connecting.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool}
+
+
+def _add_response_timings(event, elapsed, headers_after, connect):
+    """
+    Splits the time of a request into connect, ttfb and download
+
+    Args:
+        event (RequestEvent): Event the timings are added to
+        elapsed (float): Seconds until the request returned
+        headers_after (float): Seconds until the response headers were in
+        connect (float): Seconds spent opening a connection, 0 on a reused one
+    """
+    headers_after = min(elapsed, headers_after)
+    connect = min(connect, headers_after)
+    event.add_timing('connect', connect)
+    event.add_timing('ttfb', headers_after - connect)
+    event.add_timing('download', elapsed - headers_after)
+
+
+_worker = threading.local()
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def on_worker():
+    """
+    Returns:
+        bool: True on a thread of a Transport.executor pool, where waiting on
+              another task of the pool could wait forever once it is full
+    """
+    return getattr(_worker, 'active', False)
+
+
+def _discard_hedge(future):
+    if not future.cancelled() and future.exception() is None and future.result() is not None:
+        future.result().close()
+
+
+def _api_error(status_code, content, response=None):
+    """
+    Builds the APIError of an error response, using the API's errorMessage when present
+    """
+    message = content.decode('utf-8', 'replace')
+    try:
+        message = json.loads(message).get('errorMessage', message)
+    except (ValueError, AttributeError):
+        pass
+    return APIError(status_code, message, response)
@@ -0,0 +1,342 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from client import MAX_BATCH_SIZE
+from files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+SALE_PRICE = 'salePrice'
+OPEN_BOX_PRICE = 'openBoxPrice'
+
+PriceChange = namedtuple('PriceChange', ['sku', 'field', 'old', 'new'])
+PriceChange.__doc__ = """
+A watched price that changed: field is SALE_PRICE, or OPEN_BOX_PRICE for
+the lowest current price of the sku's open-box offers (None when there
+are no offers).
+"""
+
+
+class PriceWatcher:
+    """
+    Polls the prices of watched skus, each on its own adaptive interval.
+
+    Skus are kept in a priority queue by next poll time. A sku whose price
+    changed is polled twice as often, one that did not is polled backoff
+    times less often, within [min_interval, max_interval]. Due skus are sent
+    in batched "sku in(...)" requests, and a batch that is not full is topped
+    up with the skus due soonest, since they cost no extra request.
+
+    The state (intervals, next poll times, last prices) is written to
+    state_path after every poll so a restarted watcher resumes where it
+    stopped. Skus whose poll failed are retried after min_interval.
+    """
+
+    def __init__(
+            self,
+            product_api,
+            open_box_api=None,
+            min_interval=60,
+            max_interval=86400,
+            initial_interval=900,
+            backoff=1.5,
+            state_path=None):
+        """
+        Args:
+            product_api (ProductAPI): API the sale prices are polled with,
+                                      an AsyncProductAPI for run_async
+            open_box_api (OpenBoxAPI): API the open-box offers are polled with, None to
+                                       only watch sale prices
+            min_interval (float): Shortest poll interval in seconds
+            max_interval (float): Longest poll interval in seconds
+            initial_interval (float): Poll interval of newly watched skus
+            backoff (float): Factor the interval grows by after a poll without change
+            state_path (str): JSON file the state is persisted to, None to keep it in memory
+        """
+        self.product_api = product_api
+        self.open_box_api = open_box_api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.state_path = state_path
+        self.polls = 0
+        self.requests = 0
+        self.errors = 0
+        self._state = {}
+        self._heap = []
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as file:
+                self._state = json.load(file)
+            self._heap = [(state['due'], sku) for sku, state in self._state.items()]
+            heapq.heapify(self._heap)
+
+    def watch(self, skus, now=None):
+        """
+        Starts watching skus, polling them at the next tick
+
+        Args:
+            skus (iterable): Skus to watch
+            now (float): Current time.time(), for tests
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for sku in skus:
+                sku = str(sku)
+                if sku not in self._state:
+                    self._state[sku] = {
+                        'interval': self.initial_interval,
+                        'due': now,
+                        SALE_PRICE: None,
+                        OPEN_BOX_PRICE: None}
+                    heapq.heappush(self._heap, (now, sku))
+
+    def unwatch(self, skus):
+        """
+        Args:
+            skus (iterable): Skus to stop watching
+        """
+        with self._lock:
+            for sku in skus:
+                self._state.pop(str(sku), None)
+
+    def on_change(self, callback):
+        """
+        Registers a callback called with each PriceChange
+
+        Args:
+            callback (callable): Function taking a PriceChange
+        """
+        self._callbacks.append(callback)
+
+    def _take_due(self, now):
+        """
+        Pops the due skus, topped up to full batches with the next ones
+        """
+        due = []
+        with self._lock:
+            while self._heap:
+                when, sku = self._heap[0]
+                state = self._state.get(sku)
+                if state is None or state['due'] != when:
+                    # Unwatched, or superseded by a later entry
+                    heapq.heappop(self._heap)
+                    continue
+                if when > now and (not due or len(due) % MAX_BATCH_SIZE == 0):
+                    break
+                heapq.heappop(self._heap)
+                due.append(sku)
+        return due
+
+    def _apply(self, skus, products, offers, now):
+        changes = []
+        open_box = {}
+        if offers is not None:
+            for item in offers:
+                prices = [offer.currentPrice for offer in item.offers]
+                if prices:
+                    open_box[str(item.sku)] = min(prices)
+        with self._lock:
+            for sku, product in zip(skus, products):
+                state = self._state.get(sku)
+                if state is None:
+                    continue
+                current = {SALE_PRICE: product.salePrice if product is not None else None}
+                if offers is not None:
+                    current[OPEN_BOX_PRICE] = open_box.get(sku)
+                changed = False
+                for field, value in current.items():
+                    old = state[field]
+                    if value != old:
+                        state[field] = value
+                        if 'polled' in state:
+                            changes.append(PriceChange(sku, field, old, value))
+                            changed = True
+                if changed:
+                    state['interval'] = max(self.min_interval, state['interval'] / 2)
+                elif 'polled' in state:
+                    state['interval'] = min(
+                        self.max_interval, state['interval'] * self.backoff)
+                state['polled'] = now
+                state['due'] = now + state['interval']
+                heapq.heappush(self._heap, (state['due'], sku))
+            self.polls += len(skus)
+        self._save()
+        for change in changes:
+            for callback in self._callbacks:
+                callback(change)
+        return changes
+
+    def _requeue(self, skus, now):
+        """
+        Puts back skus whose poll failed, due again after min_interval
+        """
+        with self._lock:
+            self.errors += 1
+            for sku in skus:
+                state = self._state.get(sku)
+                if state is not None:
+                    state['due'] = now + self.min_interval
+                    heapq.heappush(self._heap, (state['due'], sku))
+        self._save()
+
+    def _save(self):
+        if self.state_path is None:
+            return
+        with self._lock:
+            data = json.dumps(self._state)
+        atomic_write(self.state_path, data)
+
+    def _batches(self, skus):
+        return -(-len(skus) // MAX_BATCH_SIZE) * (2 if self.open_box_api else 1)
+
+    def tick(self, now=None):
+        """
+        Polls the skus that are due
+
+        Args:
+            now (float): Current time.time(), for tests
+
+        Returns:
+            list[PriceChange]: Changes found, also sent to the callbacks
+        """
+        now = time.time() if now is None else now
+        skus = self._take_due(now)
+        if not skus:
+            return []
+        try:
+            if self.open_box_api is None:
+                products, offers = self.product_api.get_many(
+                    skus, fields=['sku', SALE_PRICE]), None
+            else:
+                # Sale and open-box prices are polled side by side
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2)
+                products = self._executor.submit(
+                    self.product_api.get_many, skus, fields=['sku', SALE_PRICE])
+                offers = self._executor.submit(self.open_box_api.open_box_offers_skus, skus)
+                products, offers = products.result(), offers.result()
+        except Exception:
+            self._requeue(skus, now)
+            raise
+        self.requests += self._batches(skus)
+        return self._apply(skus, products, offers, now)
+
+    async def tick_async(self, now=None):
+        """
+        Polls the skus that are due with the async APIs
+
+        Args:
+            now (float): Current time.time(), for tests
+
+        Returns:
+            list[PriceChange]: Changes found, also sent to the callbacks
+        """
+        now = time.time() if now is None else now
+        skus = self._take_due(now)
+        if not skus:
+            return []
+        calls = [self.product_api.get_many(skus, fields=['sku', SALE_PRICE])]
+        if self.open_box_api is not None:
+            calls.append(self.open_box_api.open_box_offers_skus(skus))
+        try:
+            results = await asyncio.gather(*calls)
+        except Exception:
+            self._requeue(skus, now)
+            raise
+        self.requests += self._batches(skus)
+        return self._apply(
+            skus, results[0], results[1] if len(results) > 1 else None, now)
+
+    def next_due(self):
+        """
+        Returns:
+            float or None: time.time() of the next poll, None when nothing is watched
+        """
+        with self._lock:
+            while self._heap:
+                when, sku = self._heap[0]
+                state = self._state.get(sku)
+                if state is not None and state['due'] == when:
+                    return when
+                heapq.heappop(self._heap)
+        return None
+
+    def _sleep_time(self, poll_interval):
+        due = self.next_due()
+        if due is None:
+            return poll_interval
+        return max(0, min(poll_interval, due - time.time()))
+
+    def run(self, poll_interval=1.0):
+        """
+        Polls until stop is called, sleeping until the next sku is due
+
+        Args:
+            poll_interval (float): Longest sleep between checks for due skus
+        """
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception('Price poll failed, retrying in %s seconds', self.min_interval)
+            self._stop.wait(self._sleep_time(poll_interval))
+
+    def start(self, poll_interval=1.0):
+        """
+        Runs the watcher in a background thread
+
+        Args:
+            poll_interval (float): Longest sleep between checks for due skus
+
+        Returns:
+            PriceWatcher: self
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, args=(poll_interval,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops run/run_async after the current poll
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def run_async(self, poll_interval=1.0):
+        """
+        Polls with the async APIs until stop is called
+
+        Args:
+            poll_interval (float): Longest sleep between checks for due skus
+        """
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await self.tick_async()
+            except Exception:
+                logger.exception('Price poll failed, retrying in %s seconds', self.min_interval)
+            await asyncio.sleep(self._sleep_time(poll_interval))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._state)
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from async_client import AsyncBestBuy
+from stub import StubServer
+
+
+class TestAsyncBestBuy(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = StubServer(responder=self.respond).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def respond(self, path):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        sku = path.split('sku=')[1].split(')')[0]
+        body = json.dumps({'products': [{'sku': int(sku), 'regularPrice': 9.99}]})
+        return 200, {'Content-Type': 'application/json'}, body.encode('utf-8')
+
+    async def test_search_sku_fan_out(self):
+        async with AsyncBestBuy(api_key='key', base_url=self.server.url, concurrency=4) as bb:
+            products = await asyncio.gather(
+                *[bb.ProductAPI.search_sku(sku) for sku in range(1, 21)])
+        self.assertEqual([product.sku for product in products], list(range(1, 21)))
+        self.assertLessEqual(self.max_in_flight, 4)
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_missing_sku_returns_none(self):
+        self.server.responder = None
+        self.server.payload = {'products': []}
+        async with AsyncBestBuy(api_key='key', base_url=self.server.url) as bb:
+            self.assertIsNone(await bb.ProductAPI.search_sku(1))
+
+    async def test_facets_fall_back_on_rejected_facet(self):
+        self.server.responder = None
+        self.server.payload = {'totalPages': 1, 'products': [
+            {'manufacturer': 'LG'}, {'manufacturer': 'Sony'}, {'manufacturer': 'LG'}]}
+        self.server.inject(400, body=b'{"errorMessage": "Invalid facet"}')
+        async with AsyncBestBuy(api_key='key', base_url=self.server.url) as bb:
+            counts = await bb.ProductAPI.facets('manufacturer')
+        self.assertEqual(counts, [('LG', 2), ('Sony', 1)])
+        self.assertEqual(len(self.server.requests), 2)
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def respond(query, category, sort, version, params, **kwargs):
+    stores = query[len('(storeId in('):query.index(')')].split(',')
+    skus = query[query.index('products(sku in(') + len('products(sku in('):-2].split(',')
+    # Even stores stock even skus
+    return {'stores': [
+        {'storeId': int(store), 'products': [{'sku': int(sku)} for sku in skus if int(sku) % 2 == int(store) % 2]}
+        for store in stores if int(store) % 2 == 0]}
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class TestAvailability(unittest.TestCase):
+
+    @patch('client._request', side_effect=respond)
+    def test_matrix_from_batched_calls(self, mock_request):
+        skus = list(range(1000, 1250))
+        stores = list(range(1, 151))
+        matrix = BestBuy().StoreAPI.availability(skus + [1000], stores)
+        self.assertEqual(mock_request.call_count, 6)
+        self.assertEqual(matrix.shape, (250, 150))
+        self.assertTrue(matrix[1002, 4])
+        self.assertFalse(matrix['1002', '3'])
+        self.assertFalse(matrix[1003, 4])
+        self.assertEqual(int(matrix.available.sum()), 125 * 75)
+        self.assertEqual(matrix.stores_for(1000)[:3], [2, 4, 6])
+        self.assertEqual(matrix.skus_at(150)[:2], [1000, 1002])
+        self.assertEqual(mock_request.call_args[0][4]['show'], 'storeId,products.sku')
+
+    @patch('client._request')
+    def test_area_columns_are_the_stores_found(self, mock_request):
+        mock_request.return_value = {'stores': [
+            {'storeId': 281, 'products': [{'sku': 5}]}, {'storeId': 12, 'products': []}]}
+        matrix = BestBuy().StoreAPI.availability([5, 6], postal_code=55423, distance=10)
+        self.assertEqual(mock_request.call_args[0][0], '(area(55423,10))+products(sku in(5,6))')
+        self.assertEqual(matrix.store_ids, [12, 281])
+        self.assertEqual(matrix.available.tolist(), [[False, True], [False, False]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+from client import BestBuy
+from exceptions import APIError, BatchError
+from stub import StubServer
+from transport import Transport
+
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'products': [{'sku': 1}], 'stores': [{'storeId': 281}]}).start()
+        self.best_buy = BestBuy(api_key='key', base_url=self.server.url, max_workers=4)
+
+    def tearDown(self):
+        self.best_buy.close()
+        self.server.stop()
+
+    def test_map_keeps_call_order(self):
+        calls = [(self.best_buy.ProductAPI.search_sku, sku) for sku in range(20)]
+        calls.append((self.best_buy.StoreAPI.search_store_id, 281))
+        result = self.best_buy.map(calls)
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result), 21)
+        self.assertEqual(result[0].sku, 1)
+        self.assertEqual(result[20].storeId, 281)
+        self.assertEqual(len(self.server.requests), 21)
+
+    def test_partial_failures_are_reported(self):
+        self.server.inject(404, body=b'{"errorMessage": "Not found"}')
+        result = self.best_buy.map([lambda: self.best_buy.ProductAPI.search_sku(1)])
+        self.assertFalse(result.ok)
+        self.assertIsNone(result[0])
+        self.assertIsInstance(result.errors[0], APIError)
+        with self.assertRaises(BatchError) as raised:
+            result.raise_for_errors()
+        self.assertEqual(list(raised.exception.errors), [0])
+
+    def test_timeout_cancels_pending_calls(self):
+        release = threading.Event()
+        calls = [release.wait] * 4 + [lambda: 'never']
+        result = self.best_buy.map(calls, timeout=0.05)
+        release.set()
+        self.assertIsInstance(result.errors[0], TimeoutError)
+        self.assertIsInstance(result.errors[4], CancelledError)
+
+    def test_as_completed(self):
+        calls = [(time.sleep, 0.1), lambda: 'fast']
+        outcomes = list(self.best_buy.submit_many(calls).as_completed())
+        self.assertEqual([outcome.index for outcome in outcomes], [1, 0])
+        self.assertEqual(outcomes[0].value, 'fast')
+
+    def test_submit(self):
+        future = self.best_buy.submit(self.best_buy.ProductAPI.search_sku, 1)
+        self.assertEqual(future.result(5).sku, 1)
+
+    def test_max_workers_of_given_transport(self):
+        self.assertEqual(self.best_buy.max_workers, 4)
+        best_buy = BestBuy(Transport('key', pool_maxsize=50))
+        self.assertEqual(best_buy.max_workers, 50)
+        best_buy.close()
+
+    def test_parallel_calls_share_the_pool(self):
+        skus = list(range(250))
+        before = set(threading.enumerate())
+
+        def pool_threads():
+            return [thread for thread in threading.enumerate()
+                    if thread.name.startswith('bestbuy_') and thread not in before]
+
+        result = self.best_buy.map(
+            [(self.best_buy.ProductAPI.get_many, skus)] * 8, timeout=5)
+        self.assertTrue(result.ok)
+        self.assertEqual(len(self.server.requests), 8 * 3)
+        self.assertEqual(len(pool_threads()), 4)
+        self.assertEqual(len(self.best_buy.ProductAPI.get_many(skus)), 250)
+        self.assertEqual(len(pool_threads()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
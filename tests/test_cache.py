@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from cache import MemoryBackend, ResponseCache, SqliteBackend
+from client import BestBuy
+from stub import StubServer
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(MemoryBackend(max_entries=2))
+        cache.store('a', 1)
+        cache.store('b', 2)
+        cache.lookup('a')
+        cache.store('c', 3)
+        self.assertEqual(cache.lookup('b'), (None, None))
+        self.assertEqual(cache.lookup('a'), (1, ResponseCache.FRESH))
+        self.assertEqual(cache.stats, {'hits': 2, 'stale_hits': 0, 'misses': 1, 'evictions': 1})
+
+    def test_per_endpoint_ttl_and_stale_window(self):
+        cache = ResponseCache(ttl=10, ttls={'categories': 100}, stale_ttl=20)
+        cache.store('key', 'value')
+        with patch('cache.time.time', return_value=time.time() + 50):
+            self.assertEqual(cache.lookup('key', 'categories'), ('value', ResponseCache.FRESH))
+            self.assertEqual(cache.lookup('key', 'products'), (None, None))
+        with patch('cache.time.time', return_value=time.time() + 25):
+            self.assertEqual(cache.lookup('key', 'products'), ('value', ResponseCache.STALE))
+
+    def test_key_is_independent_of_param_order(self):
+        self.assertEqual(
+            ResponseCache.key('/v1/products', {'sort': 'name.asc', 'page': 2}),
+            ResponseCache.key('/v1/products', {'page': 2, 'sort': 'name.asc'}))
+
+    def test_counters_under_concurrent_lookups(self):
+        cache = ResponseCache()
+        cache.store('a', 1)
+
+        def lookups(key):
+            for _ in range(2000):
+                cache.lookup(key)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lookups, ['a', 'b'] * 4))
+        self.assertEqual(cache.stats['hits'], 8000)
+        self.assertEqual(cache.stats['misses'], 8000)
+
+    def test_sqlite_backend_is_shared_between_instances(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+        SqliteBackend(path).set('key', time.time(), {'products': []})
+        other = ResponseCache(SqliteBackend(path, max_entries=1))
+        self.assertEqual(other.lookup('key'), ({'products': []}, ResponseCache.FRESH))
+        other.store('other', {})
+        self.assertEqual(other.evictions, 1)
+        self.assertEqual(len(other.backend), 1)
+
+
+class TestCachedTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'categories': [{'id': 'abcat0010000', 'name': 'Gift Ideas'}]}).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_repeated_requests_hit_the_cache(self):
+        cache = ResponseCache(ttls={'categories': 3600})
+        best_buy = BestBuy(api_key='key', base_url=self.server.url, cache=cache)
+        best_buy.CategoryAPI.search_all_categories()
+        categories = best_buy.CategoryAPI.search_all_categories()
+        self.assertEqual(categories[0].name, 'Gift Ideas')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_stale_entries_are_refreshed_in_background(self):
+        cache = ResponseCache(ttl=0, stale_ttl=3600)
+        best_buy = BestBuy(api_key='key', base_url=self.server.url, cache=cache)
+        best_buy.CategoryAPI.search_all_categories()
+        time.sleep(0.01)
+        self.assertEqual(best_buy.CategoryAPI.search_all_categories()[0].name, 'Gift Ideas')
+        for _ in range(100):
+            if len(self.server.requests) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(cache.stale_hits, 1)
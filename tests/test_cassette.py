@@ -0,0 +1,49 @@
+import gzip
+import os
+import tempfile
+import unittest
+from cassette import Cassette, RecordingTransport, request_key
+from client import BestBuy
+from exceptions import APIError
+from stub import StubServer
+from transport import Transport
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'products.jsonl.gz')
+
+    def test_request_key_ignores_api_key_and_order(self):
+        self.assertEqual(
+            request_key('/v1/products(sku=1)?format=json&apiKey=secret&show=sku'),
+            request_key('/v1/products(sku=1)?show=sku&format=json&apiKey=other'))
+
+    def test_record_then_replay(self):
+        with StubServer({'products': [{'sku': 5, 'name': 'TV'}]}) as live:
+            best_buy = BestBuy(RecordingTransport(self.path, 'secret', live.url))
+            recorded = best_buy.ProductAPI.get_many([5, 6], fields=['name'])
+            best_buy.close()
+        with gzip.open(self.path, 'rt') as file:
+            self.assertNotIn('secret', file.read())
+
+        with StubServer(responder=Cassette(self.path)) as replay:
+            best_buy = BestBuy(Transport('other', replay.url))
+            replayed = best_buy.ProductAPI.get_many([5, 6], fields=['name'])
+            self.assertEqual([p and p.name for p in replayed], ['TV', None])
+            self.assertEqual(recorded[0].json, replayed[0].json)
+            with self.assertRaises(APIError) as error:
+                best_buy.ProductAPI.search_sku(7)
+            self.assertEqual(error.exception.status_code, 404)
+
+    def test_replay_with_error_injection(self):
+        cassette = Cassette()
+        cassette.record('/v1/categories?format=json', 200, {}, b'{"categories": []}')
+        with StubServer(responder=cassette) as replay:
+            replay.inject(503)
+            self.assertEqual(Transport('key', replay.url).get('/v1/categories'), {'categories': []})
+            self.assertEqual(len(replay.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
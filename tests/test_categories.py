@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from categories import CategoryTree
+from client import BestBuy
+
+ROOT = {'id': 'cat00000', 'name': 'Best Buy'}
+TV = {'id': 'abcat0100000', 'name': 'TV & Home Theater'}
+TVS = {'id': 'abcat0101000', 'name': 'TVs'}
+AUDIO = {'id': 'abcat0200000', 'name': 'Audio'}
+
+CATEGORIES = [
+    dict(TV, path=[ROOT, TV], subCategories=[TVS, {'id': 'abcat0107000', 'name': 'TV Mounts'}]),
+    dict(TVS, path=[ROOT, TV, TVS], subCategories=[{'id': 'pcmcat220700050011', 'name': 'OLED TVs'}]),
+    dict(AUDIO, path=[ROOT, AUDIO], subCategories=[]),
+]
+
+
+class TestCategoryTree(unittest.TestCase):
+
+    def setUp(self):
+        with patch('client._request', return_value={'totalPages': 1, 'categories': CATEGORIES}):
+            self.tree = CategoryTree.from_api(BestBuy().CategoryAPI)
+
+    def test_links(self):
+        self.assertEqual([node.id for node in self.tree.roots], ['cat00000'])
+        self.assertEqual(self.tree['pcmcat220700050011'].parent.id, 'abcat0101000')
+        self.assertEqual(
+            [node.id for node in self.tree.ancestors('pcmcat220700050011')],
+            ['abcat0101000', 'abcat0100000', 'cat00000'])
+        self.assertEqual(
+            [node.name for node in self.tree.descendants('abcat0100000')],
+            ['TVs', 'TV Mounts', 'OLED TVs'])
+
+    def test_lowest_common_ancestor(self):
+        self.assertEqual(self.tree.lowest_common_ancestor('pcmcat220700050011', 'abcat0107000').id, 'abcat0100000')
+        self.assertEqual(self.tree.lowest_common_ancestor('abcat0101000', 'abcat0200000').id, 'cat00000')
+        self.assertEqual(self.tree.lowest_common_ancestor('abcat0101000', 'abcat0101000').id, 'abcat0101000')
+
+    def test_search_name(self):
+        self.assertEqual([node.name for node in self.tree.search_name('tv')], ['TV & Home Theater', 'TV Mounts', 'TVs'])
+        self.assertEqual(self.tree.search_name('xyz'), [])
+
+    def test_category_api_searches_the_loaded_tree(self):
+        category_api = BestBuy().CategoryAPI
+        category_api.load_tree(self.tree)
+        with patch('client._request') as mock_request:
+            categories = category_api.search_category_name('tv')
+        mock_request.assert_not_called()
+        self.assertEqual([category.id for category in categories], ['abcat0100000', 'abcat0107000', 'abcat0101000'])
+        self.assertEqual([entry['id'] for entry in categories[2].path], ['cat00000', 'abcat0100000', 'abcat0101000'])
+        self.assertEqual(categories[2].subCategories, [{'id': 'pcmcat220700050011', 'name': 'OLED TVs'}])
+
+    def test_serialization_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), 'categories.json')
+        self.tree.save(path)
+        loaded = CategoryTree.load(path)
+        self.assertEqual(loaded.dumps(), self.tree.dumps())
+        self.assertEqual(loaded.lowest_common_ancestor('pcmcat220700050011', 'abcat0200000').id, 'cat00000')
+        self.assertEqual(len(loaded), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
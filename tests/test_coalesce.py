@@ -0,0 +1,56 @@
+import threading
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+from coalesce import SkuCoalescer
+
+
+class TestSkuCoalescer(unittest.TestCase):
+
+    def test_concurrent_lookups_share_one_batch(self):
+        calls = []
+
+        def fetch(skus):
+            calls.append(list(skus))
+            return ['product-{0}'.format(sku) for sku in skus]
+
+        coalescer = SkuCoalescer(fetch, window=0.05)
+        results = {}
+
+        def lookup(sku):
+            results[sku] = coalescer.get(sku)
+
+        threads = [threading.Thread(target=lookup, args=(sku % 5,)) for sku in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(calls[0]), ['0', '1', '2', '3', '4'])
+        self.assertEqual(results, {sku: 'product-{0}'.format(sku) for sku in range(5)})
+        self.assertEqual(coalescer.deduplicated, 15)
+
+    def test_full_batch_is_sent_immediately(self):
+        calls = []
+        coalescer = SkuCoalescer(lambda skus: calls.append(skus) or skus, window=60, max_items=2)
+        first = coalescer.submit(1)
+        second = coalescer.submit(2)
+        self.assertEqual(second.result(1), '2')
+        self.assertEqual(first.result(1), '1')
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_reach_every_caller(self):
+        def fetch(skus):
+            raise ValueError('boom')
+
+        coalescer = SkuCoalescer(fetch, window=0)
+        with self.assertRaises(ValueError):
+            coalescer.get(1)
+
+    @patch('client._request')
+    def test_search_sku_uses_batched_query(self, mock_request):
+        mock_request.return_value = {'products': [{'sku': 5721600, 'name': 'Test Product'}]}
+        best_buy = BestBuy(coalesce_window=0.001)
+        product = best_buy.ProductAPI.search_sku(5721600)
+        self.assertEqual(product.name, 'Test Product')
+        self.assertEqual(mock_request.call_args[0][0], '(sku in(5721600))')
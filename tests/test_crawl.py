@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+from crawl import (
+    CrawlState,
+    Crawler,
+    JSONLinesSink,
+    Partition,
+    category_partitions,
+    date_partitions,
+    sku_partitions)
+from stub import StubServer
+
+SKUS = list(range(1000, 1050))
+
+
+def catalog(path):
+    parts = urlsplit(path)
+    params = parse_qs(parts.query)
+    request = unquote(parts.path)
+    low = int(request[request.index('sku>=') + 5:request.index('&')])
+    high = int(request[request.index('sku<') + 4:request.index(')')])
+    skus = [sku for sku in SKUS if low <= sku < high]
+    page, size = int(params['page'][0]), int(params['pageSize'][0])
+    body = {'totalPages': -(-len(skus) // size),
+            'products': [{'sku': sku} for sku in skus[(page - 1) * size:page * size]]}
+    return 200, {'Content-Type': 'application/json'}, json.dumps(body).encode('utf-8')
+
+
+class FailingSink(JSONLinesSink):
+
+    def __init__(self, directory, fail_at):
+        super().__init__(directory)
+        self.fail_at = fail_at
+
+    def __call__(self, partition_id, page, products):
+        if (partition_id, page) == self.fail_at:
+            raise RuntimeError('Crashed')
+        super().__call__(partition_id, page, products)
+
+
+class TestPartitions(unittest.TestCase):
+
+    def test_sku_partitions(self):
+        self.assertEqual(sku_partitions(0, 250, 100), [
+            Partition('sku-0-100', '(sku>=0&sku<100)'),
+            Partition('sku-100-200', '(sku>=100&sku<200)'),
+            Partition('sku-200-250', '(sku>=200&sku<250)')])
+
+    def test_date_partitions(self):
+        partitions = date_partitions(datetime(2024, 1, 1), datetime(2024, 1, 3))
+        self.assertEqual(partitions[1], Partition(
+            'updated-2024-01-02T000000',
+            '(itemUpdateDate>=2024-01-02T00%3A00%3A00&itemUpdateDate<2024-01-03T00%3A00%3A00)'))
+
+    def test_category_partitions(self):
+        self.assertEqual(
+            category_partitions(None, ['abcat0100000']),
+            [Partition('category-abcat0100000', '(categoryPath.id=abcat0100000)')])
+
+
+class TestCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.directory, 'crawl.db')
+        self.output = os.path.join(self.directory, 'output')
+        self.server = StubServer(responder=catalog).start()
+        self.client_options = {'api_key': 'key', 'base_url': self.server.url}
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def crawler(self, sink):
+        return Crawler(
+            self.state_path, sink, page_size=10, client_options=self.client_options)
+
+    def crawled_skus(self):
+        skus = []
+        for root, _, files in os.walk(self.output):
+            for name in files:
+                with open(os.path.join(root, name)) as file:
+                    skus.extend(json.loads(line)['sku'] for line in file)
+        return sorted(skus)
+
+    def test_crawl_resumes_after_a_crash(self):
+        crawler = self.crawler(FailingSink(self.output, ('sku-1000-1030', 2)))
+        self.assertEqual(crawler.plan(sku_partitions(1000, 1060, 30)), 2)
+        with self.assertRaises(RuntimeError):
+            crawler.run()
+        self.assertEqual(crawler.progress['pages'], 1)
+        requests = len(self.server.requests)
+        crawler.sink = JSONLinesSink(self.output)
+        self.assertEqual(crawler.plan(sku_partitions(1000, 1060, 30)), 0)
+        self.assertEqual(crawler.run(), 4)
+        self.assertEqual(len(self.server.requests) - requests, 4)
+        self.assertEqual(self.crawled_skus(), SKUS)
+        self.assertEqual(crawler.progress, {'pending': 0, 'done': 2, 'pages': 5, 'items': 50})
+
+    def test_expired_leases_are_taken_over(self):
+        crawler = self.crawler(JSONLinesSink(self.output))
+        crawler.plan(sku_partitions(1000, 1050, 50))
+        state = CrawlState(self.state_path)
+        lease = state.lease('dead-worker', duration=-1)
+        self.assertEqual(lease.page, 0)
+        self.assertEqual(state.lease('other', duration=60).id, lease.id)
+        self.assertFalse(state.checkpoint(lease.id, 'dead-worker', 1, 5, 10, 60))
+        self.assertIsNone(state.lease('third', duration=60))
+        state.close()
+
+    def test_process_pool(self):
+        crawler = self.crawler(JSONLinesSink(self.output))
+        crawler.plan(sku_partitions(1000, 1050, 10))
+        self.assertEqual(crawler.run(workers=2), 5)
+        self.assertEqual(self.crawled_skus(), SKUS)
+
+
+if __name__ == '__main__':
+    unittest.main()
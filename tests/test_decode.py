@@ -0,0 +1,87 @@
+import json
+import unittest
+from client import BestBuy
+from decode import ITEM_PARSERS, JSONDecoder, get_decoder, ijson, msgspec, orjson
+from exceptions import APIError
+from query import Q
+from retry import RetryPolicy
+from stub import StubServer
+from transport import Transport
+
+
+class TestDecoders(unittest.TestCase):
+
+    def test_every_installed_backend_decodes(self):
+        names = ['json'] + [name for name, module in (('orjson', orjson), ('msgspec', msgspec)) if module]
+        for name in names:
+            decoder = get_decoder(name)
+            self.assertEqual(decoder.name, name)
+            self.assertEqual(decoder.loads(b'{"products": [{"sku": 1}]}'), {'products': [{'sku': 1}]})
+
+    def test_default_prefers_fast_backend(self):
+        expected = 'orjson' if orjson else 'msgspec' if msgspec else 'json'
+        self.assertEqual(get_decoder().name, expected)
+
+    def test_transport_uses_decoder(self):
+        with StubServer({'products': []}) as server:
+            with Transport('key', server.url, decoder=JSONDecoder()) as transport:
+                self.assertEqual(transport.get('/v1/products'), {'products': []})
+                self.assertEqual(transport.decoder.name, 'json')
+
+
+class TestItemParsers(unittest.TestCase):
+
+    def setUp(self):
+        self.page = {
+            'from': 1,
+            'canonicalUrl': '/v1/products?"products":[1]',
+            'totalPages': 2,
+            'products': [{'sku': sku, 'name': '\u00e9' * sku, 'salePrice': 9.99} for sku in range(30)],
+            'partial': False}
+        self.body = json.dumps(self.page).encode('utf-8')
+
+    def parsers(self):
+        return ['json'] + (['ijson'] if ijson else [])
+
+    def test_items_are_yielded_as_chunks_arrive(self):
+        for name in self.parsers():
+            for size in (1, 7, 4096):
+                parser = ITEM_PARSERS[name]('products')
+                items = []
+                for start in range(0, len(self.body), size):
+                    items.extend(parser.feed(self.body[start:start + size]))
+                parser.close()
+                self.assertEqual(items, self.page['products'], (name, size))
+
+    def test_numbers_split_at_every_offset(self):
+        body = b'{"total": -12.5e+3, "products": [12.5, {"salePrice": 1099.99, "rank": 3E-2}, -7], "totalPages": 2}'
+        for name in self.parsers():
+            for cut in range(1, len(body)):
+                parser = ITEM_PARSERS[name]('products')
+                items = parser.feed(body[:cut]) + parser.feed(body[cut:])
+                parser.close()
+                self.assertEqual(items, [12.5, {'salePrice': 1099.99, 'rank': 0.03}, -7], (name, cut))
+
+    def test_first_item_before_the_body_ends(self):
+        parser = ITEM_PARSERS['json']('products')
+        cut = self.body.index(b'{"sku": 2')
+        self.assertEqual([item['sku'] for item in parser.feed(self.body[:cut])], [0, 1])
+
+    def test_truncated_body(self):
+        parser = ITEM_PARSERS['json']('products')
+        parser.feed(self.body[:-20])
+        with self.assertRaises(ValueError):
+            parser.close()
+
+    def test_streaming_search(self):
+        with StubServer(self.page) as server:
+            server.inject(503)
+            best_buy = BestBuy(api_key='key', base_url=server.url, retry=RetryPolicy(backoff_factor=0.01))
+            products = best_buy.ProductAPI.search(onSale=True, stream=True, fields=['sku', 'name'])
+            self.assertEqual(next(products).sku, 0)
+            self.assertEqual([product.sku for product in products], list(range(1, 30)))
+            self.assertEqual(len(server.requests), 2)
+            self.assertEqual(list(best_buy.StoreAPI._query(Q(city='Richfield'), stream=True)), [])
+            server.inject(400, body=b'{"errorMessage": "Bad filter"}')
+            with self.assertRaises(APIError):
+                next(best_buy.OpenBoxAPI._query('', stream=True))
@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import unittest
+from files import atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replaces_the_file(self):
+        atomic_write(self.path, '{"a": 1}')
+        atomic_write(self.path, b'{"a": 2}')
+        with open(self.path) as file:
+            self.assertEqual(file.read(), '{"a": 2}')
+        self.assertEqual(os.listdir(self.directory), ['state.json'])
+
+    def test_failed_write_keeps_the_old_file(self):
+        atomic_write(self.path, 'old')
+        with self.assertRaises(TypeError):
+            atomic_write(self.path, 42)
+        with open(self.path) as file:
+            self.assertEqual(file.read(), 'old')
+        self.assertEqual(os.listdir(self.directory), ['state.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
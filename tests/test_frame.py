@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+from frame import ProductFrame, np
+
+RECORDS = [
+    {'sku': 1, 'name': 'TV', 'regularPrice': 500.0, 'salePrice': 400.0, 'percentSavings': '20'},
+    {'sku': 2, 'name': 'Laptop', 'regularPrice': 1000.0, 'salePrice': 950.0, 'percentSavings': '5'},
+    {'sku': 3, 'name': 'Phone', 'regularPrice': 800.0, 'salePrice': None},
+]
+
+
+@unittest.skipUnless(np, 'numpy is not installed')
+class TestProductFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = ProductFrame.from_records(RECORDS)
+
+    def test_columns(self):
+        self.assertEqual(len(self.frame), 3)
+        self.assertEqual(self.frame['salePrice'].dtype, np.float64)
+        self.assertTrue(np.isnan(self.frame['salePrice'][2]))
+        self.assertEqual(list(self.frame['name']), ['TV', 'Laptop', 'Phone'])
+
+    def test_filter_sort_top_k(self):
+        on_sale = self.frame.filter(self.frame['percentSavings'] > 10)
+        self.assertEqual(list(on_sale['sku']), [1])
+        by_price = self.frame.sort('regularPrice', descending=True)
+        self.assertEqual(list(by_price['sku']), [2, 3, 1])
+        cheapest = self.frame.top_k('salePrice', 2, largest=False)
+        self.assertEqual(list(cheapest['sku']), [1, 2])
+
+    def test_rows_are_products(self):
+        product = self.frame.sort('regularPrice')[0]
+        self.assertEqual(product.name, 'TV')
+        self.assertEqual([p.sku for p in self.frame], [1, 2, 3])
+
+    @patch('client._request')
+    def test_search_as_frame(self, mock_request):
+        mock_request.return_value = {'products': RECORDS}
+        frame = BestBuy().ProductAPI.search(keyword='tv', as_frame=True)
+        self.assertIsInstance(frame, ProductFrame)
+        self.assertEqual(frame['regularPrice'].sum(), 2300.0)
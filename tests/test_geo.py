@@ -0,0 +1,72 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+from geo import StoreIndex, haversine
+from models import Store
+
+
+def store(store_id, latitude, longitude, store_type='Big Box', services=()):
+    return {
+        'storeId': store_id,
+        'lat': latitude,
+        'lng': longitude,
+        'storeType': store_type,
+        'services': [{'service': service} for service in services]}
+
+
+class TestStoreIndex(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(7)
+        self.stores = [
+            Store(store(
+                i,
+                generator.uniform(25, 49),
+                generator.uniform(-125, -67),
+                generator.choice(['Big Box', 'Outlet Center']),
+                generator.sample(['Geek Squad Services', 'Apple Shop', 'Trade-In'], 2)))
+            for i in range(300)]
+        self.index = StoreIndex(self.stores)
+
+    def brute_force(self, latitude, longitude, matches=lambda store: True):
+        return sorted(
+            ((haversine(latitude, longitude, s.latitude, s.longitude), s.storeId)
+             for s in self.stores if matches(s)))
+
+    def test_haversine(self):
+        self.assertAlmostEqual(haversine(44.9778, -93.2650, 40.7128, -74.0060), 1634, delta=2)
+
+    def test_nearest_matches_brute_force(self):
+        generator = random.Random(1)
+        for _ in range(20):
+            latitude, longitude = generator.uniform(25, 49), generator.uniform(-125, -67)
+            expected = [store_id for _, store_id in self.brute_force(latitude, longitude)[:5]]
+            self.assertEqual(
+                [s.storeId for s, _ in self.index.nearest(latitude, longitude, k=5)], expected)
+
+    def test_filters_and_radius(self):
+        matches = lambda s: s.storeType == 'Outlet Center' and 'Apple Shop' in s.services
+        expected = [(round(d, 6), i) for d, i in self.brute_force(40, -100, matches) if d <= 800]
+        results = self.index.within(
+            40, -100, 800, store_services=['Apple Shop'], store_type=['Outlet Center'])
+        self.assertEqual([(round(d, 6), s.storeId) for s, d in results], expected)
+        nearest = self.index.nearest(40, -100, k=1, store_services=['Apple Shop'], store_type=['Outlet Center'])
+        self.assertEqual(nearest[0][0].storeId, expected[0][1])
+
+    def test_save_load_and_refresh(self):
+        path = os.path.join(tempfile.mkdtemp(), 'stores.json')
+        self.index.save(path)
+        loaded = StoreIndex.load(path)
+        self.assertEqual(len(loaded), 300)
+        crawl = [s.json for s in self.stores[1:]] + [store(1000, 45, -93)]
+        with patch('client._request', return_value={'totalPages': 1, 'stores': crawl}):
+            self.assertEqual(loaded.refresh(BestBuy().StoreAPI), (1, 1))
+        self.assertNotIn(0, loaded)
+        self.assertEqual(loaded.nearest(45, -93)[0][0].storeId, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+from async_client import AsyncTransport
+from cache import ResponseCache
+from client import BestBuy
+from hooks import EVENTS, Hooks, PrometheusHooks, query_template
+from retry import RetryPolicy
+from stub import StubServer
+from transport import Transport
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+class TestHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'products': [{'sku': 1}, {'sku': 2}]}).start()
+        self.events = []
+        self.hooks = Hooks()
+        for event in EVENTS:
+            self.hooks.add(event, lambda request, event=event: self.events.append((event, request)))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def names(self):
+        return [event for event, _ in self.events]
+
+    def test_query_template(self):
+        self.assertEqual(
+            query_template('/v1/products(sku in(1,2)&onSale=true&regularPrice<100)'),
+            '/v1/products(sku in(?)&onSale=?&regularPrice<?)')
+        self.assertEqual(
+            query_template('/v1/stores(area(55423,10)&storeType="Big%20Box")'),
+            '/v1/stores(area(?)&storeType=?)')
+
+    def test_request_events_carry_timings_and_sizes(self):
+        self.server.inject(503)
+        best_buy = BestBuy(hooks=self.hooks, base_url=self.server.url, retry=RetryPolicy(backoff_factor=0.01))
+        best_buy.ProductAPI.get_many([1, 2])
+        self.assertEqual(self.names(), ['before_request', 'on_retry', 'after_response', 'after_parse'])
+        response = self.events[2][1]
+        self.assertEqual((response.endpoint, response.status, response.attempt), ('products', 200, 1))
+        self.assertEqual(response.template, '/v1/products(sku in(?))')
+        self.assertGreater(response.response_bytes, 0)
+        self.assertLessEqual(
+            set(['ttfb', 'download', 'decode', 'backoff', 'total']), set(response.timings))
+        self.assertEqual(self.events[3][1].items, 2)
+        self.assertIn('parse', self.events[3][1].timings)
+
+    def test_connect_time_is_separate_from_server_time(self):
+        transport = Transport('key', self.server.url, hooks=self.hooks)
+        transport.get('/v1/products', endpoint='products')
+        transport.get('/v1/products', endpoint='products')
+        first, second = [request for event, request in self.events if event == 'after_response']
+        self.assertGreater(first.timings['connect'], 0)
+        self.assertEqual(second.timings['connect'], 0)
+        self.assertIn('ttfb', second.timings)
+
+    def test_streamed_responses_report_parse_time(self):
+        best_buy = BestBuy(hooks=self.hooks, base_url=self.server.url, api_key='key')
+        self.assertEqual(len(list(best_buy.ProductAPI.search(onSale=True, stream=True))), 2)
+        self.assertEqual(self.names(), ['before_request', 'after_response', 'after_parse'])
+        self.assertEqual(self.events[2][1].items, 2)
+        self.assertIn('parse', self.events[2][1].timings)
+
+    def test_failures_and_cache_hits(self):
+        transport = Transport('key', self.server.url, cache=ResponseCache(), hooks=self.hooks)
+        transport.get('/v1/products', endpoint='products')
+        transport.get('/v1/products', endpoint='products')
+        self.assertEqual(self.names(), ['before_request', 'after_response', 'on_cache_hit'])
+        self.assertEqual(self.events[2][1].cache_state, ResponseCache.FRESH)
+        self.events.clear()
+        self.server.inject(404)
+        with self.assertRaises(Exception):
+            transport.get('/v1/stores', endpoint='stores')
+        self.assertEqual(self.events[-1][1].status, 404)
+        self.assertIsNotNone(self.events[-1][1].error)
+
+    def test_async_transport(self):
+        async def fetch():
+            transport = AsyncTransport('key', self.server.url, hooks=self.hooks)
+            try:
+                return await transport.get('/v1/products', endpoint='products')
+            finally:
+                await transport.close()
+
+        asyncio.run(fetch())
+        self.assertEqual(self.names(), ['before_request', 'after_response'])
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            Hooks(on_everything=print)
+
+    @unittest.skipUnless(prometheus_client, 'prometheus_client is not installed')
+    def test_prometheus_adapter(self):
+        registry = prometheus_client.CollectorRegistry()
+        hooks = Hooks()
+        PrometheusHooks(hooks, registry)
+        Transport('key', self.server.url, hooks=hooks).get('/v1/products', endpoint='products')
+        self.assertEqual(
+            registry.get_sample_value('bestbuy_requests_total', {'endpoint': 'products', 'status': '200'}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest import mock
+from client import BestBuy
+from exceptions import QuotaExceededError
+from keys import KeyPool
+from stub import StubServer
+from transport import Transport
+
+
+class TestKeyPool(unittest.TestCase):
+
+    def test_requests_spread_by_remaining_budget(self):
+        pool = KeyPool(['a', 'b'], rate=1000, daily_limit=10)
+        keys = [pool.acquire() for _ in range(10)]
+        self.assertEqual(keys.count('a'), 5)
+        self.assertEqual(keys.count('b'), 5)
+        self.assertEqual(pool.stats['a']['remaining_today'], 5)
+
+    def test_per_key_options(self):
+        pool = KeyPool(['a', {'key': 'b', 'daily_limit': 2}], rate=1000, daily_limit=1)
+        keys = sorted(pool.acquire() for _ in range(3))
+        self.assertEqual(keys, ['a', 'b', 'b'])
+        with self.assertRaises(QuotaExceededError):
+            pool.acquire()
+
+    def test_throttled_key_cools_down(self):
+        pool = KeyPool(['a', 'b'], rate=1000, cooldown=60)
+        pool.report('a', 429, {})
+        pool.report('b', 500, {})
+        self.assertEqual({pool.acquire() for _ in range(5)}, {'b'})
+        stats = pool.stats
+        self.assertEqual(stats['a']['throttled'], 1)
+        self.assertGreater(stats['a']['cooling'], 59)
+        self.assertEqual(stats['b']['errors'], 1)
+        self.assertEqual(stats['b']['requests'], 5)
+
+    def test_retry_after_sets_cooldown(self):
+        pool = KeyPool(['a'], rate=1000, cooldown=60)
+        pool.report('a', 403, {'Retry-After': '0.05'})
+        self.assertEqual(pool.acquire(), 'a')
+
+    def test_needs_keys(self):
+        with self.assertRaises(ValueError):
+            KeyPool([])
+
+
+class TestTransportKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'products': [{'sku': 1}]}).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_throttled_request_moves_to_another_key(self):
+        pool = KeyPool(['a', 'b'], rate=1000)
+        self.server.inject(429, headers={'Retry-After': '60'})
+        transport = Transport(base_url=self.server.url, key_pool=pool)
+        self.assertEqual(transport.get('/v1/products'), {'products': [{'sku': 1}]})
+        first, second = [path.split('apiKey=')[1][0] for path in self.server.requests]
+        self.assertNotEqual(first, second)
+        self.assertEqual(pool.stats[first]['throttled'], 1)
+
+    def test_keys_from_environment(self):
+        with mock.patch.dict(os.environ, {'API_KEYS': 'a, b'}):
+            best_buy = BestBuy(base_url=self.server.url)
+        self.assertEqual(len(best_buy.transport.key_pool), 2)
+        with mock.patch.dict(os.environ, {'API_KEYS': '', 'API_KEY': 'c'}):
+            best_buy = BestBuy(base_url=self.server.url)
+        self.assertEqual(best_buy.transport.api_key, 'c')
+        self.assertIsNone(best_buy.transport.key_pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
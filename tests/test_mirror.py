@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+from mirror import BACK_IN_STOCK, NEW, PRICE_DROP, CatalogMirror
+
+
+def product(sku, price, available=True, updated='2024-01-01T00:00:00'):
+    return {
+        'sku': sku,
+        'salePrice': price,
+        'regularPrice': price,
+        'onlineAvailability': available,
+        'itemUpdateDate': updated,
+        'priceUpdateDate': updated,
+        'onlineAvailabilityUpdateDate': updated}
+
+
+def respond(products):
+    return lambda *args, **kwargs: {'totalPages': 1, 'products': products}
+
+
+class TestCatalogMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'mirror.db')
+        self.mirror = CatalogMirror(BestBuy().ProductAPI, self.path, fields=['name'])
+
+    @patch('client._request')
+    def test_bulk_load_then_local_lookups(self, mock_request):
+        mock_request.side_effect = respond([product(1, 10), product(2, 20)])
+        self.assertEqual(self.mirror.bulk_load(), 2)
+        mock_request.reset_mock()
+        self.assertEqual(self.mirror.search_sku(2).salePrice, 20)
+        self.assertEqual([p and p.sku for p in self.mirror.get_many([2, 3, 1])], [2, None, 1])
+        self.assertFalse(mock_request.called)
+        self.assertEqual(
+            self.mirror.watermarks['priceUpdateDate'], '2024-01-01T00:00:00')
+
+    @patch('client._request')
+    def test_sync_queries_since_watermarks_and_emits_changes(self, mock_request):
+        mock_request.side_effect = respond([product(1, 10, available=False), product(2, 20)])
+        self.mirror.bulk_load()
+        received = []
+        self.mirror.subscribe(received.append, types=[PRICE_DROP])
+        later = '2024-01-02T00:00:00'
+        mock_request.side_effect = respond([
+            product(1, 10, updated=later), product(2, 15, updated=later), product(3, 5, updated=later)])
+        events = self.mirror.sync()
+        self.assertIn('itemUpdateDate>=2024-01-01T00%3A00%3A00|', mock_request.call_args[0][0])
+        self.assertEqual(
+            sorted((event.type, event.sku) for event in events),
+            [(BACK_IN_STOCK, '1'), (NEW, '3'), (PRICE_DROP, '2')])
+        self.assertEqual([(event.old.salePrice, event.new.salePrice) for event in received], [(20, 15)])
+        self.assertEqual(len(self.mirror), 3)
+        self.assertEqual(CatalogMirror(None, self.path).watermarks['itemUpdateDate'], later)
+
+    @patch('client._request')
+    def test_pages_are_read_in_a_stable_order(self, mock_request):
+        catalog = [product(sku, 10) for sku in range(1, 7)]
+        orders = iter([False, True, False])
+
+        def page(*args, **kwargs):
+            # Without a sort the order of the result set changes between requests
+            products = catalog if args[2] == 'sku.asc' or next(orders) else catalog[::-1]
+            number = args[4]['page']
+            return {'totalPages': 3, 'products': products[(number - 1) * 2:number * 2]}
+
+        mock_request.side_effect = page
+        self.assertEqual(self.mirror.bulk_load(prefetch=0), 6)
+        self.assertEqual(len(self.mirror), 6)
+        self.assertEqual(mock_request.call_args[0][2], 'sku.asc')
+
+    @patch('client._request')
+    def test_failed_sync_does_not_move_watermarks(self, mock_request):
+        mock_request.side_effect = respond([product(1, 10)])
+        self.mirror.bulk_load()
+        newer = [product(sku, 10, updated='2024-01-03T00:00:00') for sku in range(100, 700)]
+        older = product(2, 20, updated='2024-01-02T00:00:00')
+
+        def pages(fail):
+            def page(*args, **kwargs):
+                if args[4]['page'] == 1:
+                    return {'totalPages': 2, 'products': newer}
+                if fail:
+                    raise ConnectionError('Network down')
+                return {'totalPages': 2, 'products': [older]}
+            return page
+
+        mock_request.side_effect = pages(fail=True)
+        with self.assertRaises(ConnectionError):
+            self.mirror.sync()
+        self.assertEqual(self.mirror.watermarks['itemUpdateDate'], '2024-01-01T00:00:00')
+        mock_request.side_effect = pages(fail=False)
+        events = self.mirror.sync()
+        self.assertIn((NEW, '2'), [(event.type, event.sku) for event in events])
+        self.assertEqual(self.mirror.watermarks['itemUpdateDate'], '2024-01-03T00:00:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
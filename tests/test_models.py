@@ -0,0 +1,55 @@
+import unittest
+from exceptions import FieldNotFetchedError
+from models import Category, OpenBox, Product, Recommendation, Store
+
+
+class TestModels(unittest.TestCase):
+
+    def test_product_reads_from_json(self):
+        product = Product({'sku': 1, 'class': 'LAPTOPS', 'images': [{'href': 'a.jpg'}],
+                           'relatedProducts': [{'sku': 2}]})
+        self.assertFalse(hasattr(product, '__dict__'))
+        self.assertEqual(product.sku, 1)
+        self.assertEqual(product.itemClass, 'LAPTOPS')
+        self.assertIsNone(product.salePrice)
+        self.assertEqual(product.images[0].href, 'a.jpg')
+        self.assertIs(product.images, product.images)
+        self.assertEqual(product.relatedProductsSKUs, [2])
+        self.assertEqual(product.includedItemList, [])
+
+    def test_attributes_can_be_assigned(self):
+        product = Product({'sku': 1})
+        product.salePrice = 5.0
+        self.assertEqual(product.salePrice, 5.0)
+
+    def test_projection(self):
+        product = Product({'sku': 1}, fields=['sku'])
+        self.assertEqual(product.sku, 1)
+        with self.assertRaises(FieldNotFetchedError):
+            product.images
+        with self.assertRaises(AttributeError):
+            product.notAField
+
+    def test_nested_models(self):
+        open_box = OpenBox({'sku': 1, 'prices': {'currentPrice': 10},
+                            'offers': [{'prices': {'currentPrice': 8}, 'condition': 'excellent'}]})
+        self.assertEqual(open_box.currentPrice, 10)
+        self.assertIsNone(open_box.name)
+        self.assertEqual(open_box.offers[0].currentPrice, 8)
+        recommendation = Recommendation({'customerReviews': {'averageScore': 4.5}})
+        self.assertEqual(recommendation.customerReviewAverage, 4.5)
+        self.assertIsNone(recommendation.regularPrice)
+
+    def test_store_and_category(self):
+        store = Store({'address': '1 Main St', 'address2': ' Suite 2', 'lat': 44.9,
+                       'services': [{'service': 'Geek Squad'}]})
+        self.assertEqual(store.address, '1 Main St Suite 2')
+        self.assertEqual(store.latitude, 44.9)
+        self.assertEqual(store.services, ['Geek Squad'])
+        self.assertIsNone(Store({}).address)
+        self.assertEqual(Category({'id': 'abcat0100000'}).subCategories, [])
+
+    def test_attributes(self):
+        attributes = Product.attributes()
+        self.assertEqual(attributes['itemClass'], 'class')
+        self.assertEqual(attributes['images'], 'images')
@@ -0,0 +1,61 @@
+import json
+import unittest
+from urllib.parse import parse_qs, urlparse
+from unittest.mock import patch
+from async_client import AsyncBestBuy
+from client import BestBuy
+from stub import StubServer
+
+
+def page(number, total_pages=3, key='products'):
+    return {
+        'currentPage': number,
+        'totalPages': total_pages,
+        key: [{'sku': number * 10 + i, 'address': '', 'address2': ''} for i in range(2)]}
+
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.best_buy = BestBuy()
+
+    @patch('client._request')
+    def test_iter_search_walks_every_page(self, mock_request):
+        mock_request.side_effect = lambda *args, **kwargs: page(args[4]['page'])
+        skus = [product.sku for product in self.best_buy.ProductAPI.iter_search('laptop', onSale='true')]
+        self.assertEqual(skus, [10, 11, 20, 21, 30, 31])
+        self.assertEqual(sorted(call[0][4]['page'] for call in mock_request.call_args_list), [1, 2, 3])
+        self.assertEqual(mock_request.call_args[0][4]['pageSize'], 100)
+        self.assertEqual(mock_request.call_args[0][0], '(search=laptop&onSale=true)')
+
+    @patch('client._request')
+    def test_prefetch_is_bounded(self, mock_request):
+        mock_request.side_effect = lambda *args, **kwargs: page(args[4]['page'], total_pages=50)
+        products = self.best_buy.ProductAPI.iter_search(prefetch=2)
+        next(products)
+        products.close()
+        self.assertLessEqual(mock_request.call_count, 3)
+
+    @patch('client._request')
+    def test_category_iter_all(self, mock_request):
+        mock_request.side_effect = lambda *args, **kwargs: {
+            'totalPages': 2, 'categories': [{'id': 'cat{0}'.format(args[4]['page'])}]}
+        ids = [category.id for category in self.best_buy.CategoryAPI.iter_all(prefetch=0)]
+        self.assertEqual(ids, ['cat1', 'cat2'])
+
+
+class TestAsyncPagination(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        def respond(path):
+            number = int(parse_qs(urlparse(path).query)['page'][0])
+            return 200, {}, json.dumps(page(number, key='stores')).encode('utf-8')
+        self.server = StubServer(responder=respond).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def test_iter_all_stores(self):
+        async with AsyncBestBuy(api_key='key', base_url=self.server.url) as bb:
+            stores = [store async for store in bb.StoreAPI.iter_all()]
+        self.assertEqual(len(stores), 6)
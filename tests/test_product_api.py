@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 from client import BestBuy, ProductAPI
+from exceptions import FieldNotFetchedError
 
 class TestBestBuyAPI(unittest.TestCase):
 
@@ -57,4 +58,70 @@ class TestBestBuyAPI(unittest.TestCase):
         self.assertEqual(products[0].name, 'Test Product')
         self.assertEqual(products[0].description, 'This is a test product')
 
+    @patch('client._request')
+    def test_get_many_keeps_input_order(self, mock_request):
+        mock_request.return_value = {'products': [{'sku': 2, 'name': 'Two'}, {'sku': 1, 'name': 'One'}]}
+        products = self.best_buy.ProductAPI.get_many([1, 3, 2])
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args[0][0], '(sku in(1,3,2))')
+        self.assertEqual([p.name if p else None for p in products], ['One', None, 'Two'])
+
+    @patch('client._request')
+    def test_get_many_splits_into_chunks(self, mock_request):
+        mock_request.return_value = {'products': []}
+        products = self.best_buy.ProductAPI.get_many(range(250))
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(sorted(call[0][4]['pageSize'] for call in mock_request.call_args_list), [50, 100, 100])
+        self.assertEqual(products, [None] * 250)
+
+    @patch('client._request')
+    def test_open_box_offers_skus_sends_every_sku(self, mock_request):
+        mock_request.return_value = {'results': []}
+        self.best_buy.OpenBoxAPI.open_box_offers_skus(['111', '222'])
+        self.assertEqual(mock_request.call_args[0][0], '(sku in(111,222))')
+
+    @patch('client._request')
+    def test_search_sku_with_fields(self, mock_request):
+        mock_request.return_value = {'products': [{'sku': 5721600, 'salePrice': 899.99}]}
+        product = self.best_buy.ProductAPI.search_sku(5721600, fields=['sku', 'salePrice'])
+        self.assertEqual(mock_request.call_args[0][4], {'show': 'sku,salePrice'})
+        self.assertEqual(product.salePrice, 899.99)
+        with self.assertRaises(FieldNotFetchedError):
+            product.regularPrice
 
+    @patch('client._request')
+    def test_get_many_with_fields_keeps_sku(self, mock_request):
+        mock_request.return_value = {'products': [{'sku': 1, 'salePrice': 9.99}]}
+        products = self.best_buy.ProductAPI.get_many([1], fields=['salePrice'])
+        self.assertEqual(mock_request.call_args[0][4]['show'], 'sku,salePrice')
+        self.assertEqual(products[0].salePrice, 9.99)
+
+    @patch('client._request')
+    def test_facets_use_one_minimal_request(self, mock_request):
+        mock_request.return_value = {'products': [{'sku': 1}], 'facets': {'manufacturer': {'lg': 3, 'samsung': 7}}}
+        counts = self.best_buy.ProductAPI.facets('manufacturer', {'onSale': True}, limit=5)
+        self.assertEqual(counts, [('samsung', 7), ('lg', 3)])
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args[0][0], '(onSale=true)')
+        self.assertEqual(
+            mock_request.call_args[0][4],
+            {'facet': 'manufacturer,5', 'pageSize': 1, 'show': 'sku'})
+
+    @patch('client._request')
+    def test_facets_fall_back_to_a_streaming_pass(self, mock_request):
+        mock_request.side_effect = [
+            {'products': [{'sku': 1}]},
+            {'totalPages': 1, 'products': [
+                {'categoryPath': [{'name': 'TVs'}, {'name': 'OLED'}]},
+                {'categoryPath': [{'name': 'TVs'}]}]}]
+        counts = self.best_buy.ProductAPI.facets('categoryPath.name')
+        self.assertEqual(counts, [('TVs', 2), ('OLED', 1)])
+        self.assertEqual(mock_request.call_args[0][4]['show'], 'categoryPath')
+
+    @patch('client._request')
+    def test_facets_price_bands(self, mock_request):
+        mock_request.return_value = {'totalPages': 1, 'products': [
+            {'salePrice': 50}, {'salePrice': 150}, {'salePrice': 199.99}, {'salePrice': 900}]}
+        counts = self.best_buy.ProductAPI.facets('salePrice', bins=[0, 100, 500])
+        self.assertEqual(counts, [('0-100', 1), ('100-500', 2), ('500+', 1)])
+        self.assertEqual(mock_request.call_count, 1)
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+from client import BestBuy
+from query import Q, _templates
+
+
+class TestQuery(unittest.TestCase):
+
+    def test_lookups(self):
+        self.assertEqual(Q(sku__in=[1, 2, 3]).compile(), 'sku in(1,2,3)')
+        self.assertEqual(Q(onSale=True, regularPrice__lt=100).compile(), 'onSale=true&regularPrice<100')
+        self.assertEqual(Q(name__startswith='Sam').compile(), 'name=Sam*')
+        self.assertEqual(Q(name__startswith='Home Theater').compile(), 'name=Home%20Theater*')
+        self.assertEqual(Q(name__startswith='TV & Home').compile(), 'name=TV%20%26%20Home*')
+        self.assertEqual(Q.area(55423, 10).compile(), 'area(55423,10)')
+
+    def test_operators_group_mixed_connectors(self):
+        query = Q(city='Richfield') & (Q(storeType='Big Box') | Q(storeType='Outlet Center'))
+        self.assertEqual(
+            query.compile(),
+            'city=Richfield&(storeType="Big%20Box"|storeType="Outlet%20Center")')
+        self.assertEqual((Q() & Q(sku=1)).compile(), 'sku=1')
+
+    def test_values_are_encoded(self):
+        self.assertEqual(Q(manufacturer='A&B').compile(), 'manufacturer="A%26B"')
+        self.assertEqual(Q(name='50% off').compile(), 'name="50%25%20off"')
+
+    def test_template_is_cached_per_shape(self):
+        Q(upc__in=['1', '2'], onSale=True).compile()
+        count = len(_templates)
+        self.assertEqual(Q(upc__in=['3', '4'], onSale=False).compile(), 'upc in(3,4)&onSale=false')
+        self.assertEqual(len(_templates), count)
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            Q(sku__like=1)
+
+
+class TestStoreQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.best_buy = BestBuy()
+
+    @patch('client._request')
+    def test_postal_code_with_filters(self, mock_request):
+        mock_request.return_value = {'stores': []}
+        self.best_buy.StoreAPI.search_postal_code(
+            55423, store_services=['Geek Squad Services'], store_type=['Big Box'])
+        self.assertEqual(
+            mock_request.call_args[0][0],
+            '(postalCode=55423&storeType="Big%20Box"&services.service="Geek%20Squad%20Services")')
+
+    @patch('client._request')
+    def test_region_filters_are_part_of_the_query(self, mock_request):
+        mock_request.return_value = {'stores': []}
+        self.best_buy.StoreAPI.search_region_state('MN', store_type=['Big Box', 'Outlet'])
+        self.assertEqual(
+            mock_request.call_args[0][0],
+            '(region=MN&(storeType="Big%20Box"|storeType=Outlet))')
+        self.assertEqual(mock_request.call_args[0][1], 'stores')
+
+    @patch('client._request')
+    def test_lat_long_area(self, mock_request):
+        mock_request.return_value = {'stores': []}
+        self.best_buy.StoreAPI.search_lat_long(44.88, -93.27, 5)
+        self.assertEqual(mock_request.call_args[0][0], '(area(44.88,-93.27,5))')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from exceptions import QuotaExceededError
+from ratelimit import (
+    FileBucketState,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    RateLimiter)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rate_is_enforced(self):
+        limiter = RateLimiter(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_interactive_requests_jump_the_queue(self):
+        limiter = RateLimiter(rate=10, capacity=1)
+        limiter.acquire()
+        order = []
+
+        def acquire(priority):
+            limiter.acquire(priority)
+            order.append(priority)
+
+        bulk = threading.Thread(target=acquire, args=(PRIORITY_BULK,))
+        interactive = threading.Thread(target=acquire, args=(PRIORITY_INTERACTIVE,))
+        bulk.start()
+        time.sleep(0.02)
+        interactive.start()
+        bulk.join()
+        interactive.join()
+        self.assertEqual(order, [PRIORITY_INTERACTIVE, PRIORITY_BULK])
+        stats = limiter.stats
+        self.assertEqual(stats[PRIORITY_BULK]['count'], 1)
+        self.assertGreater(stats[PRIORITY_BULK]['wait_max'], stats[PRIORITY_INTERACTIVE]['wait_max'])
+
+    def test_daily_limit(self):
+        limiter = RateLimiter(rate=1000, daily_limit=2)
+        limiter.acquire()
+        limiter.acquire()
+        with self.assertRaises(QuotaExceededError):
+            limiter.acquire()
+
+    def test_file_state_is_shared_between_limiters(self):
+        path = os.path.join(tempfile.mkdtemp(), 'bucket')
+        first = RateLimiter(rate=0.001, capacity=2, state=FileBucketState(path))
+        second = RateLimiter(rate=0.001, capacity=2, state=FileBucketState(path))
+        first.acquire()
+        second.acquire()
+        self.assertGreater(second.state.take(0.001, 2, None, time.time()), 0)
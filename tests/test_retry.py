@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from async_client import AsyncTransport
+from exceptions import APIError
+from retry import HedgePolicy, RetryPolicy
+from stub import StubServer
+from transport import Transport
+
+FAST = RetryPolicy(backoff_factor=0.01)
+
+
+class TestRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'products': [{'sku': 1}]}).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def transport(self, **options):
+        options.setdefault('retry', FAST)
+        return Transport('key', self.server.url, **options)
+
+    def test_retries_server_errors(self):
+        self.server.inject(503, count=2)
+        self.assertEqual(self.transport().get('/v1/products'), {'products': [{'sku': 1}]})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_dropped_connections(self):
+        self.server.inject(None)
+        self.assertEqual(self.transport().get('/v1/products'), {'products': [{'sku': 1}]})
+
+    def test_client_errors_are_not_retried(self):
+        self.server.inject(403, body=b'{"errorMessage": "Over quota"}')
+        with self.assertRaises(APIError) as error:
+            self.transport().get('/v1/products')
+        self.assertEqual(error.exception.status_code, 403)
+        self.assertEqual(error.exception.message, 'Over quota')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_gives_up_after_total_retries(self):
+        self.server.inject(503, count=5)
+        with self.assertRaises(APIError):
+            self.transport(retry=RetryPolicy(total=1, backoff_factor=0.01)).get('/v1/products')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retry_after_is_honored(self):
+        policy = RetryPolicy(backoff_factor=100)
+        self.assertEqual(policy.delay(3, {'Retry-After': '2'}), 2)
+        self.assertLessEqual(policy.delay(0), 100)
+        self.assertEqual(RetryPolicy(jitter=False, max_backoff=5).delay(10), 5)
+
+    def test_backoff_decision(self):
+        policy = RetryPolicy(total=2, jitter=False, backoff_factor=1)
+        self.assertEqual(policy.backoff(0), 1)
+        self.assertEqual(policy.backoff(1, 503), 2)
+        self.assertIsNone(policy.backoff(0, 404))
+        self.assertEqual(policy.backoff(0, 403, throttled=True), 0)
+        self.assertIsNone(policy.backoff(2, 503))
+
+    def test_hedged_request_hides_slow_response(self):
+        self.server.inject(200, delay=0.5)
+        hedge = HedgePolicy(delay=0.05)
+        start = time.monotonic()
+        self.assertEqual(self.transport(hedge=hedge).get('/v1/products'), {'products': [{'sku': 1}]})
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual((hedge.hedges, hedge.wins), (1, 1))
+
+    def test_hedged_request_covers_failing_primary(self):
+        self.server.inject(None, delay=0.3)
+        hedge = HedgePolicy(delay=0.05)
+        retry = RetryPolicy(backoff_factor=10)
+        start = time.monotonic()
+        self.assertEqual(
+            self.transport(hedge=hedge, retry=retry).get('/v1/products'), {'products': [{'sku': 1}]})
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual((hedge.hedges, hedge.wins), (1, 1))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_concurrent_callers_are_not_hedged(self):
+        self.server.latency = 0.05
+        hedge = HedgePolicy(delay=0.15)
+        transport = self.transport(hedge=hedge, pool_maxsize=4)
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            list(executor.map(lambda _: transport.get('/v1/products'), range(32)))
+        self.assertEqual(hedge.hedges, 0)
+        self.assertEqual(len(self.server.requests), 32)
+
+    def test_hedge_delay_follows_latency_percentile(self):
+        hedge = HedgePolicy(percentile=0.9, min_samples=10)
+        self.assertIsNone(hedge.delay())
+        for latency in range(1, 11):
+            hedge.record(latency / 100)
+        self.assertEqual(hedge.delay(), 0.1)
+
+    def test_async_transport_retries(self):
+        self.server.inject(502)
+
+        async def fetch():
+            transport = AsyncTransport('key', self.server.url, retry=FAST)
+            try:
+                return await transport.get('/v1/products')
+            finally:
+                await transport.close()
+
+        self.assertEqual(asyncio.run(fetch()), {'products': [{'sku': 1}]})
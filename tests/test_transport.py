@@ -0,0 +1,35 @@
+import unittest
+from client import BestBuy
+from stub import StubServer
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({'products': [{'sku': 5721600, 'regularPrice': 999.99}]}).start()
+        self.best_buy = BestBuy(api_key='test-key', base_url=self.server.url)
+
+    def tearDown(self):
+        self.best_buy.close()
+        self.server.stop()
+
+    def test_request_goes_through_shared_transport(self):
+        product = self.best_buy.ProductAPI.search_sku(5721600, sort='name')
+        self.assertEqual(product.regularPrice, 999.99)
+        path = self.server.requests[0]
+        self.assertTrue(path.startswith('/v1/products(sku=5721600)?'))
+        self.assertIn('apiKey=test-key', path)
+        self.assertIn('sort=name.asc', path)
+
+    def test_api_classes_share_one_transport(self):
+        transport = self.best_buy.transport
+        self.assertIs(self.best_buy.ProductAPI._transport, transport)
+        self.assertIs(self.best_buy.StoreAPI._transport, transport)
+        self.assertIs(self.best_buy.CategoryAPI._transport, transport)
+        self.assertIs(self.best_buy.OpenBoxAPI._transport, transport)
+        self.assertIs(self.best_buy.RecommendationAPI._transport, transport)
+
+    def test_open_box_uses_beta_path(self):
+        self.best_buy.OpenBoxAPI.open_box_offers_category_id('abcat0502000')
+        self.assertTrue(self.server.requests[0].startswith(
+            '/beta/products/openBox(categoryId=abcat0502000)?'))
@@ -0,0 +1,113 @@
+import asyncio
+import heapq
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from async_client import AsyncBestBuy
+from client import BestBuy
+from watch import OPEN_BOX_PRICE, SALE_PRICE, PriceChange, PriceWatcher
+
+
+class Catalog:
+
+    def __init__(self):
+        self.prices = {}
+        self.open_box = {}
+        self.queries = []
+
+    def __call__(self, query, category, *args, **kwargs):
+        self.queries.append((category, query))
+        skus = query[len('(sku in('):-2].split(',')
+        if category == 'products':
+            return {'products': [{'sku': int(sku), 'salePrice': self.prices[sku]} for sku in skus]}
+        return {'results': [
+            {'sku': sku, 'offers': [{'prices': {'currentPrice': price}} for price in self.open_box[sku]]}
+            for sku in skus if sku in self.open_box]}
+
+
+class TestPriceWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog()
+        self.catalog.prices = {str(sku): 100.0 for sku in range(1, 151)}
+        self.catalog.open_box = {'1': [80.0, 70.0]}
+        self.path = os.path.join(tempfile.mkdtemp(), 'watch.json')
+        best_buy = BestBuy()
+        self.watcher = PriceWatcher(
+            best_buy.ProductAPI, best_buy.OpenBoxAPI, min_interval=10, initial_interval=100,
+            backoff=2, state_path=self.path)
+        self.changes = []
+        self.watcher.on_change(self.changes.append)
+
+    @patch('client._request')
+    def test_adaptive_intervals_and_changes(self, mock_request):
+        mock_request.side_effect = self.catalog
+        self.watcher.watch(['1', '2'], now=0)
+        self.assertEqual(self.watcher.tick(now=0), [])
+        self.catalog.prices['1'] = 90.0
+        self.catalog.open_box['1'] = [60.0]
+        self.assertEqual(self.watcher.tick(now=50), [])
+        self.watcher.tick(now=100)
+        self.assertEqual(self.changes, [
+            PriceChange('1', SALE_PRICE, 100.0, 90.0), PriceChange('1', OPEN_BOX_PRICE, 70.0, 60.0)])
+        state = PriceWatcher(None, state_path=self.path)._state
+        self.assertEqual((state['1']['interval'], state['1']['due']), (50, 150))
+        self.assertEqual((state['2']['interval'], state['2']['due']), (200, 300))
+        self.assertEqual(len(self.catalog.queries), 4)
+
+    @patch('client._request')
+    def test_partial_batches_are_topped_up(self, mock_request):
+        mock_request.side_effect = self.catalog
+        self.watcher.open_box_api = None
+        self.watcher.watch(range(1, 151), now=0)
+        self.watcher.tick(now=0)
+        restored = PriceWatcher(self.watcher.product_api, state_path=self.path)
+        restored._state['7']['due'] = 10
+        heapq.heappush(restored._heap, (10, '7'))
+        self.catalog.queries = []
+        restored.tick(now=20)
+        self.assertEqual(len(self.catalog.queries), 1)
+        self.assertEqual(restored.polls, 100)
+
+    @patch('client._request')
+    def test_failed_poll_keeps_skus_watched(self, mock_request):
+        mock_request.side_effect = ConnectionError('Network down')
+        self.watcher.watch(['1', '2'], now=0)
+        with self.assertRaises(ConnectionError):
+            self.watcher.tick(now=0)
+        self.assertEqual(self.watcher.next_due(), 10)
+        self.assertEqual((self.watcher.polls, self.watcher.errors), (0, 1))
+        mock_request.side_effect = self.catalog
+        self.assertEqual(self.watcher.tick(now=5), [])
+        self.watcher.tick(now=10)
+        self.assertEqual(self.watcher.polls, 2)
+
+    @patch('client._request')
+    def test_run_survives_errors(self, mock_request):
+        mock_request.side_effect = ConnectionError('Network down')
+        self.watcher.open_box_api = None
+        self.watcher.watch(['1'])
+        with self.assertLogs('watch', level='ERROR'):
+            self.watcher.start(poll_interval=0.01)
+            time.sleep(0.05)
+        self.assertTrue(self.watcher._thread.is_alive())
+        self.watcher.stop()
+        self.assertEqual(len(self.watcher), 1)
+
+    @patch('async_client._async_request')
+    def test_async_tick(self, mock_request):
+        async def respond(*args, **kwargs):
+            return self.catalog(*args)
+
+        mock_request.side_effect = respond
+        best_buy = AsyncBestBuy()
+        watcher = PriceWatcher(best_buy.ProductAPI, best_buy.OpenBoxAPI)
+        watcher.watch(['1'], now=0)
+        asyncio.run(watcher.tick_async(now=0))
+        self.assertEqual(watcher._state['1'][OPEN_BOX_PRICE], 70.0)
+
+
+if __name__ == '__main__':
+    unittest.main()